@@ -0,0 +1,305 @@
+"""
+Parallel generation of questions for many sentences
+
+Sentences are taken from a range of the examples, a file with one sentence per line,
+a plain text or a stream of sentences and syntax analysis results in JSON Lines format.
+Graphs are built and questions are generated in a pool of processes, results are written
+in JSON Lines format as soon as they are ready. Input is read lazily and only a window of
+jobs is in flight, so memory doesn't grow with the size of the input
+
+    python batch_questions.py --examples 0:100 -o questions.jsonl
+    python batch_questions.py --sentences sentences.txt -j 4 --backend local
+    python batch_questions.py --text dump.txt --backend local --window 512 -o questions.jsonl
+    cat analyses.jsonl | python batch_questions.py --json -
+"""
+
+import argparse
+import collections
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from pymorphy2 import MorphAnalyzer
+
+from krasoteevo.backends import BACKEND_MODES, ParserBackend, make_backend
+from krasoteevo.examples import example_range, get_count, get_example_json
+from krasoteevo.sentence_graph import SentenceGraph
+from krasoteevo.text import split_text
+from main import get_questions, render_all
+from snapshot import warm_start
+
+
+class Job(NamedTuple):
+    """
+    Sentence or syntax analysis result to generate questions for.
+    Source is an exception if the input couldn't be read, such job fails
+    """
+    key: Union[int, str]
+    source: Union[str, dict, Exception]
+
+
+_analyzer: Optional[MorphAnalyzer] = None
+_backend_mode = 'remote'
+_backend: Optional[ParserBackend] = None
+
+
+def _init_worker(backend_mode: str = None):
+    """
+    Create `MorphAnalyzer`, restore the warm-start snapshot and create the parser backend
+    once per process. Forked workers inherit objects created in the parent,
+    so nothing is loaded again
+    """
+    global _analyzer, _backend, _backend_mode
+    if _analyzer is None:
+        _analyzer = warm_start()
+    if backend_mode is not None and backend_mode != _backend_mode:
+        _backend_mode = backend_mode
+        _backend = None
+    if _backend is None:
+        _backend = make_backend(_backend_mode)
+
+
+def process_job(job: Job) -> dict:
+    """
+    :return: JSON object with key of the job, the sentence, questions and error message
+    """
+    if isinstance(job.source, Exception):
+        return _failed_result(job.key, None, job.source)
+    _init_worker()
+    sentence = job.source if isinstance(job.source, str) else job.source.get('sentence')
+    try:
+        graph = SentenceGraph(job.source, analyzer=_analyzer, backend=_backend)
+        sentence = graph['sentence']
+        questions = render_all(get_questions(graph, analyzer=_analyzer))
+    except Exception as exc:  # pylint: disable=broad-except
+        return _failed_result(job.key, sentence, exc)
+    return {'key': job.key, 'sentence': sentence, 'questions': questions, 'error': None}
+
+
+def _failed_result(key, sentence: Optional[str], exc: Exception) -> dict:
+    return {'key': key, 'sentence': sentence, 'questions': [],
+            'error': f'{type(exc).__name__}: {exc}'}
+
+
+def _process_chunk(jobs: List[Job]) -> List[dict]:
+    return [process_job(job) for job in jobs]
+
+
+def _pool_context():
+    """
+    :return: fork context if it is available, so workers share loaded dictionaries
+        with the parent through copy-on-write pages
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def generate_questions(jobs: Iterable[Job], processes: int = None,
+                       chunksize: int = 4, backend: str = 'remote',
+                       window: int = None) -> Iterator[dict]:
+    """
+    Generate questions for jobs in a pool of processes
+
+    :param jobs: jobs to process, they are taken lazily
+    :param processes: count of worker processes, count of CPUs if it is None.
+        If it is 1, jobs are processed in the current process
+    :param chunksize: count of jobs sent to a worker at once
+    :param backend: mode of `krasoteevo.backends.make_backend` to parse sentences with
+    :param window: maximal count of jobs which have been taken but whose results haven't
+        been yielded yet. It is 4 chunks per process if it is None
+    :return: iterator of results of `process_job` in order of jobs
+    """
+    if processes == 1:
+        _init_worker(backend)
+        yield from map(process_job, jobs)
+        return
+    context = _pool_context()
+    initializer = None
+    initargs = ()
+    frozen = context.get_start_method() == 'fork'
+    if frozen:
+        _init_worker(backend)
+        # objects of the parent are moved to the permanent generation, so garbage collection
+        # in workers doesn't touch their pages and they stay shared. Garbage is collected
+        # first, so it isn't frozen too
+        gc.collect()
+        gc.freeze()
+    else:
+        initializer = _init_worker
+        initargs = (backend,)
+    if window is None:
+        window = 4 * chunksize * (processes or os.cpu_count() or 1)
+    try:
+        with context.Pool(processes, initializer=initializer, initargs=initargs) as pool:
+            yield from _windowed_map(pool, jobs, chunksize, window)
+    finally:
+        if frozen:
+            gc.unfreeze()
+
+
+def _windowed_map(pool, jobs: Iterable[Job], chunksize: int, window: int) -> Iterator[dict]:
+    """
+    Ordered map over the pool which takes new jobs only when results are yielded.
+    `Pool.imap` reads the whole input in advance, so it isn't used
+    """
+    chunksize = max(1, min(chunksize, window))
+    jobs = iter(jobs)
+    pending = collections.deque()
+    in_flight = 0
+    while True:
+        while in_flight < window:
+            chunk = list(itertools.islice(jobs, min(chunksize, window - in_flight)))
+            if not chunk:
+                break
+            pending.append((len(chunk), pool.apply_async(_process_chunk, (chunk,))))
+            in_flight += len(chunk)
+        if not pending:
+            return
+        size, async_result = pending.popleft()
+        in_flight -= size
+        yield from async_result.get()
+
+
+def example_jobs(start: int = 0, stop: int = None) -> Iterator[Job]:
+    """
+    :param start: number of the first example
+    :param stop: number after the last example, count of examples if it is None
+    """
+    if stop is None:
+        stop = get_count()
+    return (Job(number, get_example_json(number)) for number in range(start, stop))
+
+
+def sentence_jobs(file: IO[str]) -> Iterator[Job]:
+    """
+    :param file: text file with one sentence per line. Empty lines are skipped
+    """
+    for line_number, line in enumerate(file, start=1):
+        sentence = line.strip()
+        if sentence:
+            yield Job(line_number, sentence)
+
+
+def text_jobs(file: IO[str]) -> Iterator[Job]:
+    """
+    :param file: text file, every line is split into sentences with `krasoteevo.text.split_text`.
+        Keys of jobs are strings 'LINE:INDEX'
+    """
+    for line_number, line in enumerate(file, start=1):
+        for index, sentence in enumerate(split_text(line)):
+            yield Job(f'{line_number}:{index}', sentence)
+
+
+def json_jobs(file: IO[str]) -> Iterator[Job]:
+    """
+    :param file: text file in JSON Lines format. Every line is a syntax analysis result
+        of `krasoteevo.ru`, a sentence string or an object with fields 'sentence'
+        and optional 'key'. Keys of jobs are line numbers unless they are passed.
+        Malformed lines give failed jobs, so they are reported in results
+        and don't stop the stream
+    """
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            json_obj = json.loads(line)
+        except ValueError as exc:
+            yield Job(line_number, exc)
+            continue
+        if isinstance(json_obj, str) or isinstance(json_obj, dict) and 'tokens' in json_obj:
+            yield Job(line_number, json_obj)
+        elif isinstance(json_obj, dict) and isinstance(json_obj.get('sentence'), str):
+            yield Job(json_obj.get('key', line_number), json_obj['sentence'])
+        else:
+            yield Job(line_number, ValueError(f'line {line_number} is neither a sentence nor '
+                                              f'a syntax analysis result'))
+
+
+def write_jsonl(results: Iterable[dict], file: IO[str], flush_every: int = 1) -> int:
+    """
+    :param flush_every: count of results written between flushes of the file
+    :return: count of written results
+    """
+    count = 0
+    for result in results:
+        file.write(json.dumps(result, ensure_ascii=False) + '\n')
+        count += 1
+        if count % flush_every == 0:
+            file.flush()
+    file.flush()
+    return count
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--examples', type=example_range, metavar='START:STOP',
+                        help='range of numbers of the examples, both bounds are optional')
+    source.add_argument('--sentences', type=argparse.FileType('r', encoding='utf-8'),
+                        metavar='FILE', help="file with one sentence per line, '-' for stdin")
+    source.add_argument('--text', type=argparse.FileType('r', encoding='utf-8'),
+                        metavar='FILE', help="text split into sentences line by line, "
+                                             "'-' for stdin")
+    source.add_argument('--json', type=argparse.FileType('r', encoding='utf-8'),
+                        metavar='FILE', help="JSON Lines of sentences and syntax analysis "
+                                             "results, '-' for stdin")
+    parser.add_argument('-o', '--output', type=argparse.FileType('w', encoding='utf-8'),
+                        default='-', help='output file, stdout by default')
+    parser.add_argument('-j', '--processes', type=_positive_int, default=None,
+                        help='count of worker processes, count of CPUs by default')
+    parser.add_argument('--backend', choices=BACKEND_MODES, default='remote',
+                        help='parser of sentences, see krasoteevo.backends.make_backend')
+    parser.add_argument('--limit', type=_positive_int, default=None, help='maximal count of sentences')
+    parser.add_argument('--window', type=_positive_int, default=None,
+                        help='maximal count of sentences in flight, 4 chunks per process '
+                             'by default')
+    parser.add_argument('--chunksize', type=_positive_int, default=4,
+                        help='count of sentences sent to a worker at once')
+    parser.add_argument('--flush-every', type=_positive_int, default=1,
+                        help='count of results written between flushes of the output')
+    args = parser.parse_args(argv)
+
+    if args.examples is not None:
+        jobs = example_jobs(*args.examples)
+    elif args.sentences is not None:
+        jobs = sentence_jobs(args.sentences)
+    elif args.text is not None:
+        jobs = text_jobs(args.text)
+    else:
+        jobs = json_jobs(args.json)
+    if args.limit is not None:
+        jobs = itertools.islice(jobs, args.limit)
+
+    results = generate_questions(jobs, processes=args.processes, chunksize=args.chunksize,
+                                 backend=args.backend, window=args.window)
+    failed = 0
+
+    def count_failed():
+        nonlocal failed
+        for result in results:
+            failed += result['error'] is not None
+            yield result
+
+    with args.output:
+        count = write_jsonl(count_failed(), args.output, flush_every=args.flush_every)
+    print(f'{count} sentences processed, {failed} failed', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Offline benchmarks. Run them as modules, for example `python -m benchmarks.matching_scaling`"""
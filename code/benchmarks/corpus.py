@@ -0,0 +1,254 @@
+"""
+Offline benchmark of the question generation stages over the example corpus
+
+Every stage is timed separately for every example. Throughput and p50/p95/p99 latencies
+of the stages are printed and saved as JSON. The results can be compared against a baseline
+
+    python -m benchmarks.corpus --save-baseline
+    python -m benchmarks.corpus --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import time
+import warnings
+from collections import defaultdict
+from typing import Dict, List
+
+from pymorphy2 import MorphAnalyzer
+
+from krasoteevo.examples import example_range, get_count, get_example_text
+from krasoteevo.sentence_graph import SentenceGraph, _extract_vertices, _extract_edges
+from krasoteevo.visualization import prepare_plot
+from main import Question, get_questions
+from parse_proxy import parse_cache, inflection_cache
+from parse_proxy.question_type import QuestionType as QType
+
+_dir_path = pathlib.Path(__file__).parent.absolute()
+
+DEFAULT_OUTPUT = _dir_path / 'results.json'
+DEFAULT_BASELINE = _dir_path / 'baseline.json'
+
+STAGES = ('load_json', 'extract_vertices', 'extract_edges', 'choose_parse', 'get_questions',
+          'render', 'layout')
+
+PERCENTILES = (50, 95, 99)
+
+
+def _percentile(sorted_samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, -(-len(sorted_samples) * percent // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+def summarize(samples: List[float]) -> dict:
+    """
+    :param samples: durations in seconds
+    :return: count, total time and throughput per second, mean and percentiles in milliseconds
+    """
+    samples = sorted(samples)
+    total = sum(samples)
+    summary = {
+        'count': len(samples),
+        'total_s': total,
+        'throughput': len(samples) / total if total else 0.0,
+        'mean_ms': total / len(samples) * 1000 if samples else 0.0,
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = _percentile(samples, percent) * 1000
+    return summary
+
+
+def _resolve_parses(graph: SentenceGraph) -> int:
+    """
+    :return: count of words without parse
+    """
+    failed = 0
+    for morph_info_list in graph.vs['morph_info_list']:
+        for morph_info in morph_info_list or ():
+            try:
+                morph_info.parse  # pylint: disable=pointless-statement
+            except (RuntimeError, ValueError):
+                failed += 1
+    return failed
+
+
+def _render(questions: List[Question]) -> int:
+    """
+    :return: count of questions which failed to render
+    """
+    failed = 0
+    for question in questions:
+        try:
+            str(question)
+        except Warning:
+            failed += 1
+    return failed
+
+
+def run_once(numbers, analyzer: MorphAnalyzer, layout: bool = True):
+    """
+    Run all stages for every example with cold parse and inflection caches
+
+    :return: dict from stage name to list of durations and dict of error counters
+    """
+    parse_cache.clear()
+    inflection_cache.clear()
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    clock = time.perf_counter
+
+    for number in numbers:
+        start = clock()
+        json_obj = json.loads(get_example_text(number))
+        timings['load_json'].append(clock() - start)
+
+        start = clock()
+        _extract_vertices(json_obj, analyzer)
+        timings['extract_vertices'].append(clock() - start)
+
+        start = clock()
+        _extract_edges(json_obj)
+        timings['extract_edges'].append(clock() - start)
+
+        graph = SentenceGraph(json_obj, analyzer=analyzer)
+        start = clock()
+        errors['choose_parse'] += _resolve_parses(graph)
+        timings['choose_parse'].append(clock() - start)
+
+        start = clock()
+        try:
+            questions = get_questions(graph, analyzer=analyzer)
+        except (RuntimeError, ValueError, TypeError, Warning):
+            questions = []
+            errors['get_questions'] += 1
+        timings['get_questions'].append(clock() - start)
+
+        start = clock()
+        errors['render'] += _render(questions)
+        timings['render'].append(clock() - start)
+
+        if layout:
+            start = clock()
+            prepare_plot(graph)
+            timings['layout'].append(clock() - start)
+    return timings, errors
+
+
+def run(numbers, repeat: int = 3, warmup: int = 1, layout: bool = True) -> dict:
+    """
+    :param numbers: numbers of the examples
+    :param repeat: count of measured runs over the examples
+    :param warmup: count of runs before measuring
+    :param layout: measure the layout stage
+    :return: JSON object with environment, summaries of the stages and error counters
+    """
+    numbers = list(numbers)
+    analyzer = MorphAnalyzer()
+    QType.init(analyzer)
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for _ in range(warmup):
+            run_once(numbers, analyzer, layout)
+        for _ in range(repeat):
+            run_timings, errors = run_once(numbers, analyzer, layout)
+            for stage, samples in run_timings.items():
+                timings[stage].extend(samples)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'examples': len(numbers),
+            'repeat': repeat,
+            'created_at': time.time(),
+        },
+        'stages': {stage: summarize(timings[stage]) for stage in STAGES if stage in timings},
+        'errors': dict(errors),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1,
+            metrics=('p50_ms', 'p95_ms')) -> List[str]:
+    """
+    :param threshold: allowed relative slowdown
+    :param metrics: compared summary fields
+    :return: descriptions of regressions
+    """
+    regressions = []
+    for stage, summary in results['stages'].items():
+        old = baseline['stages'].get(stage)
+        if old is None:
+            continue
+        for metric in metrics:
+            if old[metric] and summary[metric] > old[metric] * (1 + threshold):
+                regressions.append(f'{stage} {metric}: {old[metric]:.3f} -> '
+                                   f'{summary[metric]:.3f} '
+                                   f'(+{(summary[metric] / old[metric] - 1) * 100:.0f}%)')
+    return regressions
+
+
+def format_table(results: dict, baseline: dict = None) -> str:
+    header = f"{'stage':<18}{'per s':>10}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if baseline is not None:
+        header += f"{'p50 old':>9}"
+    lines = [header + '   (ms)']
+    for stage, summary in results['stages'].items():
+        line = (f"{stage:<18}{summary['throughput']:>10.0f}{summary['mean_ms']:>9.3f}"
+                f"{summary['p50_ms']:>9.3f}{summary['p95_ms']:>9.3f}{summary['p99_ms']:>9.3f}")
+        if baseline is not None and stage in baseline['stages']:
+            line += f"{baseline['stages'][stage]['p50_ms']:>9.3f}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--examples', type=example_range, default=(0, None),
+                        metavar='START:STOP', help='range of numbers of the examples')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--no-layout', dest='layout', action='store_false',
+                        help='skip the layout stage')
+    parser.add_argument('-o', '--output', type=pathlib.Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', type=pathlib.Path, default=None,
+                        help='results to compare with')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help=f'save results also to {DEFAULT_BASELINE.name}')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative slowdown of p50 and p95')
+    args = parser.parse_args(argv)
+
+    start, stop = args.examples
+    if stop is None:
+        stop = get_count()
+    results = run(range(start, stop), repeat=args.repeat, warmup=args.warmup, layout=args.layout)
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    print(format_table(results, baseline))
+    print('errors:', results['errors'])
+
+    text = json.dumps(results, indent=1)
+    args.output.write_text(text, encoding='utf-8')
+    if args.save_baseline:
+        DEFAULT_BASELINE.write_text(text, encoding='utf-8')
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
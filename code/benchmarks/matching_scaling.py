@@ -0,0 +1,104 @@
+"""
+Scaling benchmark of tree pattern matching on wide and deep synthetic graphs
+
+    python -m benchmarks.matching_scaling
+"""
+
+import argparse
+import time
+import warnings
+
+from krasoteevo.sentence_graph import SentenceGraph
+from matching import Node, TreeMatcher
+
+
+def synthetic_graph(lemmas, edges, tags=None):
+    """
+    :param lemmas: lemma of every token
+    :param edges: pairs (head, dependent)
+    :param tags: tag of every token in the new JSON format of `krasoteevo.ru`,
+        all tokens are nouns 'S' if it is None
+    :return: `SentenceGraph` without analyzer
+    """
+    if tags is None:
+        tags = ['S'] * len(lemmas)
+    json_obj = {
+        'sentence': ' '.join(lemmas),
+        'tokens': list(lemmas),
+        'morphs': [{'index': index, 'token': lemma,
+                    'homonyms': [{'index': 0, 'word': lemma, 'lexem': lemma, 'tags': tag,
+                                  'active': True}]}
+                   for index, (lemma, tag) in enumerate(zip(lemmas, tags))],
+        'synts': [{'head_i': head, 'dependent_i': dependent, 'dep_type': 'сочин'}
+                  for head, dependent in edges]
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return SentenceGraph(json_obj)
+
+
+def wide_case(width: int):
+    """
+    Root with `width - 1` children 'x' and one child 'y'. The pattern requires `width - 2`
+    children 'x' and two children 'y'. Every child pattern has candidates but there is
+    no assignment, so naive backtracking tries all permutations of the children 'x'
+    """
+    graph = synthetic_graph(['root'] + ['x'] * (width - 1) + ['y'],
+                            [(0, child) for child in range(1, width + 1)])
+    pattern = Node(white_list='root').children(
+        *[Node(white_list='x') for _ in range(width - 2)],
+        Node(white_list='y'), Node(white_list='y'))
+    return graph, pattern, 0, False
+
+
+def deep_case(depth: int, pattern_depth: int = 5):
+    """
+    Chain of `depth` vertices 'x' and the chain pattern of `pattern_depth` nodes
+    matched from every vertex
+    """
+    graph = synthetic_graph(['x'] * depth, [(index, index + 1) for index in range(depth - 1)])
+    pattern = Node(white_list='x')
+    for _ in range(pattern_depth - 1):
+        pattern = Node(white_list='x').children(pattern)
+    return graph, pattern, None, True
+
+
+def greedy_trap():
+    """
+    The first child pattern matches both children, the second one only the first child.
+    Greedy assignment gives the first child to the first pattern and misses the match
+    """
+    graph = synthetic_graph(['root', 'x', 'y'], [(0, 1), (0, 2)])
+    pattern = Node(white_list='root').children(Node(white_list=('x', 'y')), Node(white_list='x'))
+    return graph, pattern
+
+
+def run(graph, pattern, vertex):
+    matcher = TreeMatcher(graph)
+    start = time.perf_counter()
+    if vertex is None:
+        result = [matcher.match(pattern, index) for index in range(graph.vcount())]
+    else:
+        result = matcher.match(pattern, vertex)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 40, 80, 160, 320])
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'wide, ms':>10} {'deep, ms':>10}")
+    for size in args.sizes:
+        graph, pattern, vertex, expected = wide_case(size)
+        result, wide_time = run(graph, pattern, vertex)
+        assert result == expected
+        graph, pattern, vertex, _ = deep_case(size)
+        result, deep_time = run(graph, pattern, vertex)
+        assert sum(result) == size - 4
+        print(f'{size:>6} {wide_time * 1000:>10.2f} {deep_time * 1000:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Telegram bot which asks questions about sentences of received messages
+
+Parsing and question generation are blocking, so they run in a bounded pool of threads.
+Messages wait in a bounded queue and the bot replies that it is busy when the queue is full.
+Each chat is rate limited. On shutdown the bot stops accepting messages and answers
+the queued ones
+
+    TELEGRAM_TOKEN=... python bot.py
+
+Sentences are parsed by the service with the local parser as a fallback. Set environment
+variable KRASOTEEVO_BACKEND to another mode of `krasoteevo.backends.make_backend` to change it
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+
+from pymorphy2 import MorphAnalyzer
+from telegram import Update
+from telegram.ext import Application, ContextTypes, MessageHandler, filters
+
+from krasoteevo.backends import ParserBackend, make_backend
+from krasoteevo.cache import ResponseCache
+from krasoteevo.request import SyntaxClient
+from krasoteevo.sentence_graph import SentenceGraph
+from krasoteevo.text import split_text
+from main import get_questions, render_all
+from snapshot import warm_start
+
+logger = logging.getLogger(__name__)
+
+BUSY_MESSAGE = 'Слишком много запросов, попробуйте позже'
+RATE_LIMIT_MESSAGE = 'Не так быстро, подождите немного'
+FAIL_MESSAGE = 'Не получилось разобрать текст'
+EMPTY_MESSAGE = 'Не знаю, что спросить'
+
+
+class RateLimiter:
+    """Token bucket per key"""
+
+    def __init__(self, capacity: int = 3, period: float = 10.0, max_keys: int = 10000):
+        """
+        :param capacity: count of requests allowed at once
+        :param period: seconds to restore the whole capacity
+        :param max_keys: count of keys after which full buckets and then the least recently
+            used buckets are forgotten
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        # ordered by time of update, the oldest bucket is the first
+        self._buckets: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def allow(self, key, now: float = None) -> bool:
+        """
+        :return: True if the request is allowed, the token is spent in this case
+        """
+        if now is None:
+            now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return allowed
+
+    def _prune(self, now: float):
+        # buckets are removed from the oldest one, so every call takes amortized O(1) time
+        while self._buckets:
+            tokens, updated = next(iter(self._buckets.values()))
+            if tokens + (now - updated) * self.rate < self.capacity:
+                break
+            self._buckets.popitem(last=False)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+
+class _Task(NamedTuple):
+    text: str
+    reply: Callable[[str], Awaitable]
+
+
+class QuestionService:
+    """
+    Bounded queue of texts answered by a fixed count of workers
+
+    Each worker runs blocking parsing in its own thread of the executor, so one slow
+    request to the syntax service delays only its own message. A text which is not answered
+    in time is stopped before its next sentence, and its thread isn't given a new text
+    until it finishes, so timed out texts don't pile up in the executor
+    """
+
+    def __init__(self, analyzer: MorphAnalyzer, *, workers: int = 4, queue_size: int = 32,
+                 timeout: float = 60.0, max_sentences: int = 5,
+                 cache: ResponseCache = None, client: SyntaxClient = None,
+                 backend: ParserBackend = None):
+        """
+        :param analyzer: `MorphAnalyzer` object shared by workers
+        :param workers: count of texts processed at the same time
+        :param queue_size: count of texts waiting for a worker
+        :param timeout: seconds to wait for the answer for one text
+        :param max_sentences: count of sentences of the text to ask questions about
+        :param cache: `ResponseCache` object to look up sentences before sending requests
+        :param client: `SyntaxClient` object to send requests with
+        :param backend: parser backend, `cache` and `client` are ignored if it is passed
+        """
+        self.analyzer = analyzer
+        self.workers = workers
+        self.timeout = timeout
+        self.max_sentences = max_sentences
+        self.cache = cache
+        self.client = client
+        self.backend = backend
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+
+    def answer(self, text: str, cancelled: threading.Event = None) -> List[str]:
+        """
+        Blocking generation of questions about sentences of the text
+
+        :param cancelled: event which stops generation before the next sentence
+        """
+        questions = []
+        for sentence in split_text(text)[:self.max_sentences]:
+            if cancelled is not None and cancelled.is_set():
+                break
+            graph = SentenceGraph(sentence, analyzer=self.analyzer, cache=self.cache,
+                                  client=self.client, backend=self.backend)
+            questions.extend(render_all(get_questions(graph, analyzer=self.analyzer)))
+        return questions
+
+    async def start(self):
+        self._queue = asyncio.Queue(self._queue_size)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='questions')
+        # a slot is taken by every text submitted to the executor and released when its
+        # thread finishes, not when the worker stops waiting for it
+        self._slots = asyncio.Semaphore(self.workers)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._accepting = True
+
+    def submit(self, text: str, reply: Callable[[str], Awaitable]) -> bool:
+        """
+        :param text: text of the message
+        :param reply: coroutine function to send the answer with
+        :return: False if the service is busy or stopped
+        """
+        if not self._accepting:
+            return False
+        try:
+            self._queue.put_nowait(_Task(text, reply))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    @property
+    def pending(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            task = await self._queue.get()
+            try:
+                cancelled = threading.Event()
+                try:
+                    await self._slots.acquire()
+                    future = self._executor.submit(self.answer, task.text, cancelled)
+                    future.add_done_callback(lambda _future: self._release_slot(loop))
+                    questions = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except asyncio.TimeoutError:
+                    cancelled.set()
+                    logger.warning('Timed out answering %r', task.text)
+                    text = FAIL_MESSAGE
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('Failed to answer %r', task.text)
+                    text = FAIL_MESSAGE
+                else:
+                    text = '\n'.join(questions) or EMPTY_MESSAGE
+                try:
+                    await task.reply(text)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('Failed to send reply')
+            finally:
+                self._queue.task_done()
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            pass  # the loop is closed, the service has been stopped
+
+    async def drain(self, timeout: float = None):
+        """
+        Stop accepting texts, wait until queued texts are answered and stop workers
+
+        :param timeout: seconds to wait for queued texts, forever if it is None
+        """
+        self._accepting = False
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('%d texts were not answered before shutdown', self.pending)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+
+def build_application(token: str, service: QuestionService,
+                      rate_limiter: RateLimiter = None,
+                      drain_timeout: float = 30.0) -> Application:
+    """
+    :param token: token of the bot
+    :param service: `QuestionService` object which is started and drained with the application
+    :param rate_limiter: limiter of messages per chat
+    :param drain_timeout: seconds to answer queued messages on shutdown
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+
+    async def on_message(update: Update, _context: ContextTypes.DEFAULT_TYPE):
+        message = update.effective_message
+        if not rate_limiter.allow(update.effective_chat.id):
+            await message.reply_text(RATE_LIMIT_MESSAGE)
+            return
+        if not service.submit(message.text, message.reply_text):
+            await message.reply_text(BUSY_MESSAGE)
+
+    async def post_init(_application: Application):
+        await service.start()
+
+    async def post_stop(_application: Application):
+        await service.drain(drain_timeout)
+
+    application = (Application.builder().token(token)
+                   .post_init(post_init).post_stop(post_stop).build())
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, on_message))
+    return application
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    analyzer = warm_start()
+    backend = make_backend(os.environ.get('KRASOTEEVO_BACKEND', 'fallback'),
+                           client=SyntaxClient(), cache=ResponseCache())
+    service = QuestionService(analyzer, backend=backend)
+    build_application(os.environ['TELEGRAM_TOKEN'], service).run_polling()
+
+
+if __name__ == '__main__':
+    main()
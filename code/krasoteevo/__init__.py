@@ -1,13 +1,23 @@
 """
 The wrapper for syntax analysis service https://krasoteevo.ru
 """
-from .request import request_syntax_analysis
+from . import metrics
+from .request import request_syntax_analysis, SyntaxClient
+from .backends import make_backend, KrasoteevoBackend, NatashaBackend, FallbackBackend
+from .cache import ResponseCache
 from .sentence_graph import SentenceGraph
 from .visualization import show
 
 
 __all__ = [
+    'metrics',
+    'make_backend',
+    'KrasoteevoBackend',
+    'NatashaBackend',
+    'FallbackBackend',
     'request_syntax_analysis',
+    'ResponseCache',
+    'SyntaxClient',
     'SentenceGraph',
     'show'
 ]
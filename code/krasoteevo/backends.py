@@ -0,0 +1,244 @@
+"""
+Syntax parser backends producing JSON objects in the format of `krasoteevo.ru`
+
+`KrasoteevoBackend` sends requests to the service. `NatashaBackend` parses sentences locally
+with `natasha` and converts the result into the old JSON format of the service,
+so `SentenceGraph` gets the same vertex and edge attributes from both backends.
+`FallbackBackend` uses the second backend when the first one fails
+
+>>> backend = make_backend('fallback')
+>>> graph = SentenceGraph('Ваня идёт гулять.', backend=backend)  # doctest: +SKIP
+"""
+
+import threading
+from typing import List, Optional, Protocol, Tuple
+
+import requests
+
+from krasoteevo import metrics
+from krasoteevo.cache import ResponseCache
+from krasoteevo.request import (
+    is_analysis_result, request_syntax_analysis, SyntaxClient, TooLongSentenceException,
+    check_sentence)
+
+
+class ParserBackend(Protocol):
+    """Interface of syntax parsers"""
+
+    name: str
+
+    def analyse(self, sentence: str) -> dict:
+        """
+        :return: syntax analysis result in the format of `krasoteevo.ru`
+        """
+
+
+class KrasoteevoBackend:
+    """Backend sending requests to `krasoteevo.ru`"""
+
+    name = 'krasoteevo'
+
+    def __init__(self, client: SyntaxClient = None, cache: ResponseCache = None,
+                 old_format: bool = True):
+        """
+        :param client: `SyntaxClient` object to send requests with
+        :param cache: `ResponseCache` object to look up sentences before sending requests
+        :param old_format: request old or new JSON format
+        """
+        self.client = client
+        self.cache = cache
+        self.old_format = old_format
+
+    def analyse(self, sentence: str) -> dict:
+        """
+        :raises EmptySentenceException: empty sentence is not allowed
+        :raises TooLongSentenceException: sentence with more than 300 characters is not allowed
+        :raises requests.RequestException: the service is not available
+            or responded with error status
+        :raises ValueError: the service returned invalid JSON or not a syntax analysis result
+        """
+        if self.cache is not None:
+            return self.cache.request(sentence, old_format=self.old_format, client=self.client)
+        response = request_syntax_analysis(sentence, old_format=self.old_format,
+                                           client=self.client)
+        response.raise_for_status()
+        json_obj = response.json()
+        if not is_analysis_result(json_obj):
+            raise ValueError(f'Response for {sentence!r} is not a syntax analysis result')
+        return json_obj
+
+
+# Universal Dependencies relations to relations of `krasoteevo.ru`.
+# Relations 'case', 'cc' and 'conj' are restructured, 'punct' and 'root' are dropped
+_RELATIONS = {
+    'nsubj': 'предик', 'nsubj:pass': 'предик', 'csubj': 'предик', 'csubj:pass': 'предик',
+    'obj': '1-компл', 'xcomp': '1-компл', 'ccomp': '1-компл',
+    'iobj': '2-компл',
+    'obl': 'обст', 'obl:tmod': 'обст', 'advmod': 'обст', 'advcl': 'обст',
+    'obl:agent': 'агент',
+    'amod': 'опред', 'det': 'опред', 'acl': 'опред',
+    'acl:relcl': 'релят',
+    'nmod': 'атриб',
+    'nummod': 'количест', 'nummod:gov': 'количест', 'nummod:entity': 'количест',
+    'appos': 'аппоз', 'flat': 'аппоз', 'flat:name': 'аппоз', 'flat:foreign': 'аппоз',
+    'aux': 'аналит', 'cop': 'аналит',
+    'aux:pass': 'пасс-анал',
+    'mark': 'подч-союзн',
+    'expl': 'эксплет',
+    'parataxis': 'сочин', 'orphan': 'сочин',
+}
+_DEFAULT_RELATION = 'огранич'
+_NOT_WORDS = ('PUNCT', 'SYM')
+
+
+def _restructure(pos: List[str], heads: List[int], relations: List[str]):
+    """
+    Convert Universal Dependencies tree into the structure of `krasoteevo.ru`:
+    prepositions and coordinating conjunctions become heads of their nouns and conjuncts
+
+    :return: list of triples (head, dependent, relation of `krasoteevo.ru`)
+    """
+    heads = list(heads)
+    relations = list(relations)
+    conjunction_of = {}
+    for index, relation in enumerate(relations):
+        if relation == 'cc' and heads[index] >= 0:
+            conjunction_of.setdefault(heads[index], index)
+    # head -> preposition -> noun
+    for index, relation in enumerate(relations):
+        if relation != 'case' or pos[index] != 'ADP':
+            continue
+        noun = heads[index]
+        if noun < 0 or relations[noun] == 'предл':
+            continue
+        heads[index], relations[index] = heads[noun], relations[noun]
+        heads[noun], relations[noun] = index, 'предл'
+        if noun in conjunction_of:
+            conjunction_of[index] = conjunction_of.pop(noun)
+    # first conjunct -> conjunction -> second conjunct
+    for index, relation in enumerate(relations):
+        if relation != 'conj':
+            continue
+        conjunction = conjunction_of.get(index)
+        if conjunction is None:
+            relations[index] = 'сочин'
+            continue
+        heads[conjunction], relations[conjunction] = heads[index], 'сочин'
+        heads[index], relations[index] = conjunction, 'соч-союзн'
+    edges = []
+    for index, (head, relation) in enumerate(zip(heads, relations)):
+        if head < 0 or relation in ('punct', 'root') or pos[index] == 'PUNCT':
+            continue
+        if relation not in ('предл', 'сочин', 'соч-союзн'):
+            if relation == 'advmod' and pos[index] == 'PART':
+                relation = 'огранич'
+            else:
+                relation = _RELATIONS.get(relation, _DEFAULT_RELATION)
+        edges.append((head, index, relation))
+    return edges
+
+
+class NatashaBackend:
+    """
+    Local backend built on `natasha` models. Models are loaded on the first call.
+    There are no limits on the sentence length and no network requests
+    """
+
+    name = 'natasha'
+
+    def __init__(self):
+        self._models: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._models is None:
+                # natasha is imported here because the models take time and memory
+                from natasha import (  # pylint: disable=import-outside-toplevel
+                    Segmenter, NewsEmbedding, NewsMorphTagger, NewsSyntaxParser, MorphVocab)
+                embedding = NewsEmbedding()
+                self._models = (Segmenter(), NewsMorphTagger(embedding),
+                                NewsSyntaxParser(embedding), MorphVocab())
+        return self._models
+
+    def analyse(self, sentence: str) -> dict:
+        """
+        Every word gets one `pymorphy2` parse which agrees best with `natasha` morphology
+
+        :raises EmptySentenceException: empty sentence is not allowed
+        :return: syntax analysis result in the old JSON format of `krasoteevo.ru`
+        """
+        if not sentence:
+            check_sentence(sentence)
+        # pylint: disable=import-outside-toplevel
+        from natasha import Doc
+        from natasha.morph.lemma import best_form
+        segmenter, morph_tagger, syntax_parser, morph_vocab = self._models or self._load()
+        doc = Doc(sentence)
+        doc.segment(segmenter)
+        doc.tag_morph(morph_tagger)
+        doc.parse_syntax(syntax_parser)
+
+        tokens, morphs, pos, heads, relations = [], [], [], [], []
+        for sent in doc.sents:
+            offset = len(tokens)
+            for token in sent.tokens:
+                form = None
+                if token.pos not in _NOT_WORDS:
+                    forms = morph_vocab(token.text.lower())
+                    form = best_form(forms, token.pos, token.feats or {}) or forms[0]
+                tokens.append(token.text)
+                morphs.append([] if form is None else [
+                    {'word': form.word, 'lexem': form.normal_form,
+                     'tags': f"OpencorporaTag('{form.tag}')"}])
+                pos.append(token.pos)
+                head = int(token.head_id.split('_')[1]) - 1 if token.head_id else -1
+                heads.append(head + offset if head >= 0 else -1)
+                relations.append(token.rel)
+        synts = [[head, dependent, relation, tokens[head].lower(), tokens[dependent].lower()]
+                 for head, dependent, relation in _restructure(pos, heads, relations)]
+        return {'sentence': sentence, 'tokens': tokens, 'morphs': morphs, 'synts': synts}
+
+
+class FallbackBackend:
+    """Backend which uses `fallback` when `primary` fails"""
+
+    errors = (requests.RequestException, TooLongSentenceException, ValueError, KeyError)
+
+    def __init__(self, primary: ParserBackend, fallback: ParserBackend):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f'{primary.name}+{fallback.name}'
+
+    def analyse(self, sentence: str) -> dict:
+        try:
+            json_obj = self.primary.analyse(sentence)
+            json_obj['sentence']  # pylint: disable=pointless-statement
+            return json_obj
+        except self.errors:
+            metrics.count('backend_fallbacks_total', labels={'backend': self.fallback.name})
+            return self.fallback.analyse(sentence)
+
+
+BACKEND_MODES = ('remote', 'local', 'fallback', 'local-first')
+
+
+def make_backend(mode: str = 'remote', client: SyntaxClient = None,
+                 cache: ResponseCache = None) -> ParserBackend:
+    """
+    :param mode: 'remote' for `krasoteevo.ru`, 'local' for `natasha`,
+        'fallback' for `krasoteevo.ru` with `natasha` when the service fails,
+        'local-first' for `natasha` with `krasoteevo.ru` when `natasha` fails
+    :param client: `SyntaxClient` object of `KrasoteevoBackend`
+    :param cache: `ResponseCache` object of `KrasoteevoBackend`
+    """
+    if mode == 'local':
+        return NatashaBackend()
+    remote = KrasoteevoBackend(client=client, cache=cache)
+    if mode == 'remote':
+        return remote
+    if mode == 'fallback':
+        return FallbackBackend(remote, NatashaBackend())
+    if mode == 'local-first':
+        return FallbackBackend(NatashaBackend(), remote)
+    raise ValueError(f'unknown backend mode {mode!r}, expected one of {BACKEND_MODES}')
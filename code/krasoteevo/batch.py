@@ -0,0 +1,117 @@
+"""Functions to parse many sentences concurrently"""
+
+import asyncio
+import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, List, NamedTuple, Optional
+
+import requests
+
+from krasoteevo.request import SyntaxClient, check_sentence
+
+
+class BatchResult(NamedTuple):
+    """
+    Result of syntax analysis for one sentence of the batch
+
+    Exactly one of `response` and `error` is not None. `error` is `EmptySentenceException`,
+    `TooLongSentenceException` or exception raised by `requests`
+    """
+    index: int
+    sentence: str
+    response: Optional[requests.Response]
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def json(self):
+        return self.response.json()
+
+
+async def analyse_batch(sentences: Iterable[str], old_format: bool = False, *,
+                        client: SyntaxClient = None, concurrency: int = 8,
+                        ordered: bool = True) -> AsyncIterator[BatchResult]:
+    """
+    Send requests for all sentences, at most `concurrency` requests at the same time.
+    Sentences are read from `sentences` lazily, as earlier requests complete
+
+    :param sentences: the Russian sentences you want to parse
+    :param old_format: mark to get old or new format of JSON
+    :param client: `SyntaxClient` object to send requests with. If it is None,
+        temporary client with connection pool of size `concurrency` is used
+    :param concurrency: maximal count of requests in flight
+    :param ordered: if it is True, results are yielded in order of `sentences`,
+        otherwise they are yielded as they complete
+
+    :return: async iterator of `BatchResult` objects, one per sentence.
+        Errors are reported in results and don't abort the batch
+    """
+    own_client = client is None
+    if own_client:
+        client = SyntaxClient(pool_size=concurrency)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def fetch(index, sentence):
+        try:
+            check_sentence(sentence)
+            response = await loop.run_in_executor(
+                executor, client.request_syntax_analysis, sentence, old_format)
+            response.raise_for_status()
+        except Exception as error:  # pylint: disable=broad-except
+            return BatchResult(index, sentence, None, error)
+        return BatchResult(index, sentence, response, None)
+
+    # sentences are pulled from the iterator only when a task finishes,
+    # so at most `concurrency` of them are held in memory
+    pending = enumerate(sentences)
+
+    def start_tasks(count):
+        return [asyncio.ensure_future(fetch(index, sentence))
+                for index, sentence in itertools.islice(pending, count)]
+
+    in_flight = collections.deque(start_tasks(concurrency))
+    try:
+        if ordered:
+            while in_flight:
+                result = await in_flight[0]
+                in_flight.popleft()
+                in_flight.extend(start_tasks(1))
+                yield result
+        else:
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    in_flight.remove(task)
+                in_flight.extend(start_tasks(len(done)))
+                for task in sorted(done, key=lambda task: task.result().index):
+                    yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if own_client:
+            # cancelled tasks don't stop requests already running in threads,
+            # the session is closed when they finish
+            await loop.run_in_executor(None, _close_after, executor, client)
+
+
+def _close_after(executor: ThreadPoolExecutor, client: SyntaxClient):
+    executor.shutdown(wait=True)
+    client.close()
+
+
+def analyse_sentences(sentences: Iterable[str], old_format: bool = False, *,
+                      client: SyntaxClient = None, concurrency: int = 8) -> List[BatchResult]:
+    """
+    Synchronous wrapper for `analyse_batch`
+
+    :return: list of `BatchResult` objects in order of `sentences`
+    """
+    async def collect():
+        return [result async for result in analyse_batch(sentences, old_format, client=client,
+                                                         concurrency=concurrency)]
+    return asyncio.run(collect())
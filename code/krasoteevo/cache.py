@@ -0,0 +1,213 @@
+"""Persistent cache for syntax analysis results of the service https://krasoteevo.ru"""
+
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Union
+
+from krasoteevo import metrics
+from krasoteevo.request import is_analysis_result, request_syntax_analysis, SyntaxClient
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    :param sentence: the Russian sentence
+    :return: sentence in NFC form with collapsed whitespace. Sentences with the same
+        normalized form share one cache entry
+    """
+    return ' '.join(unicodedata.normalize('NFC', sentence).split())
+
+
+def cache_key(sentence: str, old_format: bool = False) -> str:
+    """
+    :return: content address of the syntax analysis result for `sentence`
+    """
+    prefix = 'old' if old_format else 'new'
+    payload = f'{prefix}\n{normalize_sentence(sentence)}'.encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of JSON objects returned by the service
+
+    The first tier is an in-memory LRU dict, the second one is a directory with one JSON file
+    per entry. Files are named by `cache_key`, so the directory can be shared between processes.
+    The object is thread-safe
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike, None] = None, *,
+                 memory_size: int = 1024, max_entries: Optional[int] = 100_000,
+                 max_age: Optional[float] = None, client: SyntaxClient = None):
+        """
+        :param directory: directory for the disk tier. If it is None, only memory tier is used
+        :param memory_size: maximal count of entries in the memory tier
+        :param max_entries: maximal count of files in the disk tier, None means no limit
+        :param max_age: entries older than `max_age` seconds are treated as missing,
+            None means that entries never expire
+        :param client: `SyntaxClient` object to send requests on cache misses
+        """
+        self.directory = None if directory is None else pathlib.Path(directory)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.client = client
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_count = len(self._files())
+
+    def get(self, sentence: str, old_format: bool = False):
+        """
+        :return: cached JSON object for `sentence` or None
+        """
+        key = cache_key(sentence, old_format)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, json_obj = entry
+                if self.max_age is None or now - stored_at <= self.max_age:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    metrics.count('response_cache_total', labels={'result': 'memory'})
+                    return json_obj
+                del self._memory[key]
+        json_obj, stored_at = self._read(key, now)
+        with self._lock:
+            if json_obj is None:
+                self.misses += 1
+                metrics.count('response_cache_total', labels={'result': 'miss'})
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            metrics.count('response_cache_total', labels={'result': 'disk'})
+            self._remember(key, stored_at, json_obj)
+        return json_obj
+
+    def put(self, sentence: str, json_obj, old_format: bool = False):
+        """Save JSON object returned by the service for `sentence`"""
+        key = cache_key(sentence, old_format)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, json_obj)
+        self._write(key, json_obj)
+
+    def request(self, sentence: str, old_format: bool = False, client: SyntaxClient = None):
+        """
+        Return JSON object for `sentence` from cache or request it from the service
+
+        :param client: `SyntaxClient` object to send request with on cache miss,
+            `client` of the cache is used if it is None
+
+        :raises EmptySentenceException: empty sentence is not allowed
+        :raises TooLongSentenceException: sentence with more than 300 characters is not allowed
+        :raises requests.HTTPError: the service responded with error status
+        :raises ValueError: the response is not a syntax analysis result, it isn't cached
+        """
+        json_obj = self.get(sentence, old_format)
+        if json_obj is None:
+            response = request_syntax_analysis(sentence, old_format=old_format,
+                                                client=client or self.client)
+            response.raise_for_status()
+            json_obj = response.json()
+            if not is_analysis_result(json_obj):
+                raise ValueError(f'Response for {sentence!r} is not a syntax analysis result')
+            self.put(sentence, json_obj, old_format)
+        return json_obj
+
+    def clear(self):
+        """Remove all entries from both tiers and reset counters"""
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        with self._disk_lock:
+            for path in self._files():
+                path.unlink(missing_ok=True)
+            self._disk_count = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """
+        :return: dict with counters of the cache
+        """
+        with self._lock:
+            stats = {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                     'memory_entries': len(self._memory), 'hit_rate': self.hit_rate}
+        with self._disk_lock:
+            stats['disk_entries'] = self._disk_count
+        return stats
+
+    def _remember(self, key, stored_at, json_obj):
+        self._memory[key] = (stored_at, json_obj)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return self.directory / f'{key}.json'
+
+    def _files(self):
+        if self.directory is None:
+            return []
+        return list(self.directory.glob('*.json'))
+
+    def _read(self, key, now):
+        if self.directory is None:
+            return None, None
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if self.max_age is not None and now - stored_at > self.max_age:
+                path.unlink(missing_ok=True)
+                return None, None
+            with open(path, encoding='utf-8') as file:
+                return json.load(file), stored_at
+        except (OSError, json.JSONDecodeError):
+            return None, None
+
+    def _write(self, key, json_obj):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(json_obj, file, ensure_ascii=False)
+        with self._disk_lock:
+            is_new = not path.exists()
+            os.replace(tmp_path, path)
+            if is_new:
+                self._disk_count += 1
+            if self.max_entries is not None and self._disk_count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # called with `_disk_lock` held. Oldest files are removed down to 90% of the limit,
+        # so the directory is not scanned on every write
+        files = self._files()
+        files.sort(key=_mtime)
+        keep = int(self.max_entries * 0.9)
+        for path in files[:max(len(files) - keep, 0)]:
+            path.unlink(missing_ok=True)
+        self._disk_count = min(len(files), keep)
+
+
+def _mtime(path: pathlib.Path):
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
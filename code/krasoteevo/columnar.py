@@ -0,0 +1,361 @@
+"""
+Compact columnar representation of many syntax analysis results
+
+All sentences of `ColumnarCorpus` share one string buffer and one set of NumPy columns.
+A sentence is a light view on ranges of these columns, and `SentenceGraph` is built only
+on demand, so thousands of parsed sentences can be held in memory
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pymorphy2
+
+from krasoteevo.sentence_graph import SentenceGraph
+
+_LEFT_OPENCORPORA_TAG = "OpencorporaTag('"
+_RIGHT_OPENCORPORA_TAG = "')"
+
+
+class StringTable:
+    """Class interning strings into small integer codes"""
+
+    def __init__(self, strings: Iterable[str] = ()):
+        self._codes: Dict[str, int] = {}
+        self.strings: List[str] = []
+        for string in strings:
+            self.code(string)
+
+    def code(self, string: str) -> int:
+        code = self._codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self._codes[string] = code
+            self.strings.append(string)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.strings[code]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class _Column:
+    """Growable NumPy array"""
+
+    __slots__ = ('data', 'length')
+
+    def __init__(self, dtype):
+        self.data = np.empty(16, dtype=dtype)
+        self.length = 0
+
+    def extend(self, values):
+        count = len(values)
+        if self.length + count > len(self.data):
+            # old views keep referencing the old array, so they stay valid
+            data = np.empty(max(2 * len(self.data), self.length + count), dtype=self.data.dtype)
+            data[:self.length] = self.data[:self.length]
+            self.data = data
+        self.data[self.length:self.length + count] = values
+        self.length += count
+
+    def append(self, value):
+        self.extend((value,))
+
+    def view(self) -> np.ndarray:
+        view = self.data[:self.length]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+
+class ColumnarCorpus:
+    """
+    Columnar storage of syntax analysis results
+
+    Columns are NumPy arrays (see `COLUMNS`): token spans in the shared string buffer,
+    homonyms (only active ones) with tag and POS codes, dependency edges with edge type codes.
+    Indices of tokens in homonym and edge columns are local to the sentence.
+    Row ranges of every sentence are stored in `*_offsets` columns
+
+    >>> corpus = ColumnarCorpus()
+    >>> sentence = corpus.add(json_obj)  # doctest: +SKIP
+    >>> graph = sentence.graph(analyzer)  # doctest: +SKIP
+    """
+
+    COLUMNS = {
+        'sentence_start': np.int64, 'sentence_stop': np.int64, 'old_format': np.bool_,
+        'token_offsets': np.int64, 'homonym_offsets': np.int64, 'edge_offsets': np.int64,
+        'token_start': np.int64, 'token_stop': np.int64, 'is_word': np.bool_,
+        'homonym_token': np.int32, 'word_start': np.int64, 'word_stop': np.int64,
+        'lemma_start': np.int64, 'lemma_stop': np.int64, 'tag': np.int32, 'pos': np.int16,
+        'head': np.int32, 'dependent': np.int32, 'edge_type': np.uint8,
+    }
+
+    def __init__(self, keep_json: bool = False):
+        """
+        :param keep_json: keep original JSON objects. Otherwise they are rebuilt from columns
+        """
+        self.keep_json = keep_json
+        self.edge_types = StringTable()
+        self.tags = StringTable()
+        self.pos = StringTable()
+        self._json = []
+        self._pieces = []
+        self._length = 0
+        self._buffer = ''
+        self._columns = {name: _Column(dtype) for name, dtype in self.COLUMNS.items()}
+        for name in ('token_offsets', 'homonym_offsets', 'edge_offsets'):
+            self._columns[name].append(0)
+
+    def __len__(self):
+        return self._columns['sentence_start'].length
+
+    def __getitem__(self, index: int) -> 'ColumnarSentence':
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('sentence index out of range')
+        return ColumnarSentence(self, index)
+
+    def __iter__(self):
+        return (ColumnarSentence(self, index) for index in range(len(self)))
+
+    @property
+    def buffer(self) -> str:
+        """String with all sentences, tokens, words and lemmas"""
+        if len(self._buffer) != self._length:
+            self._buffer = ''.join(self._pieces)
+            self._pieces = [self._buffer]
+        return self._buffer
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        :return: read-only NumPy view of the column
+        """
+        return self._columns[name].view()
+
+    def nbytes(self) -> int:
+        """
+        :return: approximate memory used by columns and string buffer
+        """
+        return sum(column.nbytes for column in self._columns.values()) + self._length * 4
+
+    def extend(self, json_objects: Iterable) -> 'ColumnarCorpus':
+        for json_obj in json_objects:
+            self.add(json_obj)
+        return self
+
+    def add(self, json_obj) -> 'ColumnarSentence':
+        """
+        Add syntax analysis result in any format of `krasoteevo.ru`
+
+        :return: view of the added sentence
+        """
+        rows = {name: [] for name in self.COLUMNS}
+        morphs = json_obj['morphs']
+        old_format = any(isinstance(item, list) for item in morphs)
+
+        start, stop = self._add_string(json_obj['sentence'])
+        rows['sentence_start'].append(start)
+        rows['sentence_stop'].append(stop)
+        rows['old_format'].append(old_format)
+
+        for token_index, (token, homonyms) in enumerate(zip(json_obj['tokens'], morphs)):
+            start, stop = self._add_string(token)
+            rows['token_start'].append(start)
+            rows['token_stop'].append(stop)
+            if isinstance(homonyms, dict):
+                homonyms = [item for item in homonyms['homonyms'] if item['active']]
+            rows['is_word'].append(bool(homonyms))
+            for item in homonyms:
+                self._add_homonym(rows, token_index, item, old_format)
+
+        for head, dependent, edge_type in _unique_synts(json_obj['synts']):
+            rows['head'].append(head)
+            rows['dependent'].append(dependent)
+            rows['edge_type'].append(self.edge_types.code(edge_type))
+
+        columns = self._columns
+        for name, values in rows.items():
+            if values:
+                columns[name].extend(values)
+        columns['token_offsets'].append(columns['token_start'].length)
+        columns['homonym_offsets'].append(columns['homonym_token'].length)
+        columns['edge_offsets'].append(columns['head'].length)
+        if self.keep_json:
+            self._json.append(json_obj)
+        return ColumnarSentence(self, len(self) - 1)
+
+    def _add_homonym(self, rows, token_index, item, old_format):
+        tags = item['tags']
+        if old_format:
+            tags = tags[len(_LEFT_OPENCORPORA_TAG):-len(_RIGHT_OPENCORPORA_TAG)]
+            pos = tags.replace(' ', ',').split(',')[0]
+        else:
+            pos = tags.split(' ')[0]
+        rows['homonym_token'].append(token_index)
+        start, stop = self._add_string(item['word'])
+        rows['word_start'].append(start)
+        rows['word_stop'].append(stop)
+        start, stop = self._add_string(item['lexem'])
+        rows['lemma_start'].append(start)
+        rows['lemma_stop'].append(stop)
+        rows['tag'].append(self.tags.code(tags))
+        rows['pos'].append(self.pos.code(pos))
+
+    def _add_string(self, string: str):
+        start = self._length
+        self._pieces.append(string)
+        self._length += len(string)
+        return start, self._length
+
+    def _json_obj(self, index):
+        if self.keep_json:
+            return self._json[index]
+        return None
+
+
+def _unique_synts(synts):
+    if not synts:
+        return []
+    if isinstance(synts[0], list):
+        unique = {(item[0], item[1], item[2]) for item in synts}
+    elif isinstance(synts[0], dict):
+        unique = {(item['head_i'], item['dependent_i'], item['dep_type']) for item in synts}
+    else:
+        raise Exception('bad format')
+    return sorted(unique)
+
+
+class ColumnarSentence:
+    """View of one sentence of `ColumnarCorpus`"""
+
+    __slots__ = ('corpus', 'index')
+
+    def __init__(self, corpus: ColumnarCorpus, index: int):
+        self.corpus = corpus
+        self.index = index
+
+    def _rows(self, name):
+        offsets = self.corpus.column(name)
+        return slice(int(offsets[self.index]), int(offsets[self.index + 1]))
+
+    def _column(self, name, rows):
+        return self.corpus.column(name)[rows]
+
+    def _strings(self, starts, stops):
+        buffer = self.corpus.buffer
+        return [buffer[start:stop] for start, stop in zip(starts.tolist(), stops.tolist())]
+
+    @property
+    def sentence(self) -> str:
+        corpus = self.corpus
+        start = int(corpus.column('sentence_start')[self.index])
+        stop = int(corpus.column('sentence_stop')[self.index])
+        return corpus.buffer[start:stop]
+
+    @property
+    def old_format(self) -> bool:
+        return bool(self.corpus.column('old_format')[self.index])
+
+    def __len__(self):
+        rows = self._rows('token_offsets')
+        return rows.stop - rows.start
+
+    @property
+    def tokens(self) -> List[str]:
+        rows = self._rows('token_offsets')
+        return self._strings(self._column('token_start', rows), self._column('token_stop', rows))
+
+    @property
+    def is_word(self) -> np.ndarray:
+        return self._column('is_word', self._rows('token_offsets')).astype(bool)
+
+    @property
+    def heads(self) -> np.ndarray:
+        return self._column('head', self._rows('edge_offsets'))
+
+    @property
+    def dependents(self) -> np.ndarray:
+        return self._column('dependent', self._rows('edge_offsets'))
+
+    @property
+    def edge_types(self) -> np.ndarray:
+        """Codes of edge types, see `ColumnarCorpus.edge_types`"""
+        return self._column('edge_type', self._rows('edge_offsets'))
+
+    @property
+    def homonym_tokens(self) -> np.ndarray:
+        return self._column('homonym_token', self._rows('homonym_offsets'))
+
+    @property
+    def tags(self) -> np.ndarray:
+        """Codes of homonym tags, see `ColumnarCorpus.tags`"""
+        return self._column('tag', self._rows('homonym_offsets'))
+
+    @property
+    def pos(self) -> np.ndarray:
+        """Codes of homonym POS, see `ColumnarCorpus.pos`"""
+        return self._column('pos', self._rows('homonym_offsets'))
+
+    @property
+    def first_homonyms(self) -> np.ndarray:
+        """
+        :return: for every token index of its first homonym in homonym columns
+            of the sentence or -1 for punctuation marks
+        """
+        homonym_tokens = self.homonym_tokens
+        result = np.searchsorted(homonym_tokens, np.arange(len(self)))
+        result[~self.is_word] = -1
+        return result
+
+    def to_json(self):
+        """
+        :return: JSON object in the format of the original syntax analysis result
+            with active homonyms only
+        """
+        json_obj = self.corpus._json_obj(self.index)  # noqa
+        if json_obj is not None:
+            return json_obj
+        corpus = self.corpus
+        tokens = self.tokens
+        rows = self._rows('homonym_offsets')
+        words = self._strings(self._column('word_start', rows), self._column('word_stop', rows))
+        lemmas = self._strings(self._column('lemma_start', rows),
+                               self._column('lemma_stop', rows))
+        tags = [corpus.tags[code] for code in self.tags.tolist()]
+        old_format = self.old_format
+        homonyms = [[] for _ in tokens]
+        for token_index, word, lemma, tag in zip(self.homonym_tokens.tolist(), words, lemmas,
+                                                 tags):
+            if old_format:
+                item = {'word': word, 'lexem': lemma,
+                        'tags': f'{_LEFT_OPENCORPORA_TAG}{tag}{_RIGHT_OPENCORPORA_TAG}'}
+            else:
+                item = {'index': len(homonyms[token_index]), 'word': word, 'lexem': lemma,
+                        'tags': tag, 'active': True}
+            homonyms[token_index].append(item)
+        edges = zip(self.heads.tolist(), self.dependents.tolist(),
+                    [corpus.edge_types[code] for code in self.edge_types.tolist()])
+        if old_format:
+            morphs = homonyms
+            synts = [[head, dependent, edge_type, tokens[head].lower(), tokens[dependent].lower()]
+                     for head, dependent, edge_type in edges]
+        else:
+            morphs = [{'index': index, 'token': token, 'homonyms': items}
+                      for index, (token, items) in enumerate(zip(tokens, homonyms))]
+            synts = [{'dep_type': edge_type, 'head': tokens[head], 'dependent': tokens[dependent],
+                      'head_i': head, 'head_homonym_i': 0, 'dependent_i': dependent,
+                      'dependent_homonym_i': 0} for head, dependent, edge_type in edges]
+        return {'sentence': self.sentence, 'tokens': tokens, 'morphs': morphs, 'synts': synts}
+
+    def graph(self, analyzer: pymorphy2.MorphAnalyzer = None) -> SentenceGraph:
+        """
+        :return: `SentenceGraph` built from the sentence
+        """
+        return SentenceGraph(self.to_json(), analyzer=analyzer)
@@ -1,26 +1,41 @@
 """Functions to load locally saved examples of SentenceGraphs"""
 
+import argparse
+import asyncio
+import hashlib
 import json
 import pathlib
 import os
 import re
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
 
 import pymorphy2
 
 from krasoteevo.sentence_graph import SentenceGraph
-from krasoteevo.request import (
-    request_syntax_analysis,
-    TooLongSentenceException,
-    EmptySentenceException)
+from krasoteevo.request import SyntaxClient, is_analysis_result
+from krasoteevo.batch import BatchResult, analyse_batch
+from krasoteevo.examples.packed import (
+    PackedCorpus,
+    StalePackException,
+    build_pack,
+    open_examples_pack,
+    DEFAULT_PATH as PACK_PATH)
+from krasoteevo.examples.manifest import Manifest, load_manifest
 
 
 __all__ = [
+    'example_range',
     'get_count',
     'get_example_filename',
     'get_example_json',
     'get_example_graph',
     'get_example_text',
-    'update_examples'
+    'iter_examples',
+    'load_manifest',
+    'pack_examples',
+    'update_examples',
+    'UpdateSummary'
 ]
 
 
@@ -29,14 +44,73 @@ _dir_path = pathlib.Path(__file__).parent.absolute()
 filename_pattern = re.compile(r'^(0|[1-9][0-9]*)\.json$')
 filename_format = '{}.json'
 
+MANIFEST_NAME = 'manifest.json'
+CHECKPOINT_NAME = 'update_checkpoint.json'
 
-def get_count():
+
+_pack = None
+
+
+def _get_pack() -> PackedCorpus:
+    """
+    :return: opened pack of examples or None if the pack doesn't exist or it is stale
+    """
+    global _pack
+    if _pack is None:
+        try:
+            _pack = open_examples_pack()
+        except (OSError, ValueError, StalePackException):
+            _pack = False
+    return _pack or None
+
+
+def _forget_pack():
+    global _pack
+    if _pack:
+        _pack.close()
+    _pack = None
+
+
+def _invalidate_pack():
+    _forget_pack()
+    PACK_PATH.unlink(missing_ok=True)
+
+
+def pack_examples() -> int:
     """
+    Build the pack of all examples, see `krasoteevo.examples.packed`
+
+    :return: count of packed examples
+    """
+    _forget_pack()
+    return build_pack()
+
+
+def get_count(packed: bool = True):
+    """
+    :param packed: use the pack built by `krasoteevo.examples.packed` if it exists
     :return: return count of existing examples
     """
+    pack = _get_pack() if packed else None
+    if pack is not None:
+        return len(pack)
     return len(list(filter(filename_pattern.match, os.listdir(_dir_path))))
 
 
+def example_range(value: str) -> Tuple[int, Optional[int]]:
+    """
+    Argument type of command line options selecting examples
+
+    :param value: range 'START:STOP', both bounds are optional
+    :return: pair (start, stop), stop is None if it isn't passed
+    """
+    start, _, stop = value.partition(':')
+    try:
+        return int(start or 0), int(stop) if stop else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value} is not a range START:STOP') from None
+
+
 def get_example_filename(number: int):
     """
     :param number: number of example. Starts from 0, upper bound is equal to `get_count() - 1`
@@ -50,11 +124,24 @@ def get_example_json(number: int):
     :param number: number of example. Starts from 0, upper bound is equal to `get_count() - 1`
     :return: JSON object that is loaded from example with number `number`
     """
+    pack = _get_pack()
+    if pack is not None and 0 <= number < len(pack):
+        return pack[number]
     name = get_example_filename(number)
     with open(_dir_path / name) as file:
         return json.load(file)
 
 
+def iter_examples():
+    """
+    :return: iterator over JSON objects of all examples in order of their numbers
+    """
+    pack = _get_pack()
+    if pack is not None:
+        return iter(pack)
+    return (get_example_json(number) for number in range(get_count()))
+
+
 def get_example_graph(number: int, analyzer: pymorphy2.MorphAnalyzer = None):
     """
     :param analyzer: it is pymorphy2.MorphAnlyzer class passed from pymorphy2
@@ -76,55 +163,284 @@ def get_example_text(number: int):
         return file.read()
 
 
-def _load(sentence: str, file_index: int):
-    try:
-        response = request_syntax_analysis(sentence)
-    except (TooLongSentenceException, EmptySentenceException):
-        return False
-    text = response.text
-    
+def _valid_content(result: BatchResult) -> Optional[bytes]:
+    """
+    :return: content of the response if it is a correct syntax analysis result, otherwise None
+    """
+    if not result.ok:
+        return None
+    text = result.response.text
+
     try:
         json_new = json.loads(text)
     except json.JSONDecodeError:
-        return False
+        return None
+
+    if not is_analysis_result(json_new):
+        return None
+    return text.encode('utf-8')
+
+
+def _write_atomic(path: pathlib.Path, content: bytes):
+    """Write the file through a temporary file, so it is never left half-written"""
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
 
-    correct = all(item in json_new for item in {'sentence', 'tokens', 'morphs', 'synts'})
-    if not correct:
+def _read_bytes(path: pathlib.Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+class UpdateSummary(NamedTuple):
+    """
+    Result of `update_examples`. Lists contain numbers of examples,
+    except `failed_new` which contains indices of new sentences
+    """
+    created: List[int]
+    changed: List[int]
+    unchanged: List[int]
+    skipped: List[int]
+    failed_new: List[int]
+    failed_old: List[int]
+    resumed: bool
+    seconds: float
+
+
+class _Checkpoint:
+    """
+    Progress of `update_examples` saved to a file. A run with the same arguments
+    continues from the saved progress
+    """
+
+    def __init__(self, path: pathlib.Path, key: str):
+        self.path = path
+        self.key = key
+        self.created: Dict[int, int] = {}  # index of new sentence -> number of example
+        self.changed: List[int] = []
+        self.unchanged: List[int] = []
+        self.resumed = False
+
+    def load(self) -> '_Checkpoint':
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self
+        if state.get('key') != self.key:
+            return self
+        self.created = {int(index): number for index, number in state['created'].items()}
+        self.changed = state['changed']
+        self.unchanged = state['unchanged']
+        self.resumed = True
+        return self
+
+    @property
+    def refreshed(self) -> Set[int]:
+        return set(self.changed) | set(self.unchanged)
+
+    def save(self):
+        state = {'key': self.key, 'created': {str(index): number
+                                              for index, number in self.created.items()},
+                 'changed': self.changed, 'unchanged': self.unchanged}
+        _write_atomic(self.path, json.dumps(state).encode('utf-8'))
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+
+def _checkpoint_key(new_sentences: Optional[list], only_new: bool) -> str:
+    arguments = json.dumps([new_sentences, only_new], ensure_ascii=False)
+    return hashlib.sha256(arguments.encode('utf-8')).hexdigest()
+
+
+def _open_manifest(directory: pathlib.Path, count: int) -> Manifest:
+    path = directory / MANIFEST_NAME
+    try:
+        return Manifest.load(path)
+    except FileNotFoundError:
+        return Manifest(path=path).update(range(count), directory=directory)
+
+
+def _is_fresh(manifest: Manifest, number: int, path: pathlib.Path, max_age: Optional[float],
+              now: float) -> bool:
+    """
+    :return: True if the example was fetched less than `max_age` seconds ago
+        and its file hasn't changed since then
+    """
+    if max_age is None or number not in manifest:
         return False
-    path = _dir_path / get_example_filename(file_index)
-    with open(path, 'w') as file:
-        file.write(text)
-    return True
-    
-
-def update_examples(new_sentences: list = None, only_new: bool = True):
-    """Function to reload existing examples and add new examples"""
-    count = get_count()
-    fails_new = []
-    fails_old = []
+    entry = manifest[number]
+    if now - entry['fetched_at'] >= max_age:
+        return False
+    content = _read_bytes(path)
+    return content is not None and hashlib.sha256(content).hexdigest() == entry['sha256']
+
+
+def _fetch(sentences: List[Tuple[int, str]], handle: Callable[[int, BatchResult], None],
+           client: Optional[SyntaxClient], concurrency: int, ordered: bool):
+    """
+    Parse sentences concurrently and pass every result to `handle` as soon as it is ready
+
+    :param sentences: pairs (key, sentence), the key is passed to `handle`
+    """
+    async def run():
+        async for result in analyse_batch([sentence for _, sentence in sentences],
+                                          client=client, concurrency=concurrency,
+                                          ordered=ordered):
+            handle(sentences[result.index][0], result)
+
+    if sentences:
+        asyncio.run(run())
+
+
+def update_examples(new_sentences: list = None, only_new: bool = True,
+                    client: SyntaxClient = None, concurrency: int = 8, *,
+                    max_age: float = None, checkpoint_every: int = 20,
+                    directory: Union[str, os.PathLike] = _dir_path) -> UpdateSummary:
+    """
+    Function to reload existing examples and add new examples
+
+    Results are saved as soon as they are received, files are replaced atomically and only
+    if their content changed. Progress is saved with every new example, every
+    `checkpoint_every` reloaded examples and on interruption, so a call with the same
+    arguments continues where the interrupted one stopped
+
+    :param new_sentences: pairs (index of the sentence, sentence) to add as new examples
+    :param only_new: don't reload existing examples
+    :param client: `SyntaxClient` object to send requests with
+    :param concurrency: maximal count of requests sent at the same time
+    :param max_age: existing examples fetched less than `max_age` seconds ago are not
+        reloaded unless their files changed. All examples are reloaded if it is None
+    :param checkpoint_every: count of reloaded examples between checkpoints
+    :param directory: directory with examples
+    :return: summary of the update
+    """
+    if checkpoint_every < 1:
+        raise ValueError('checkpoint_every must be positive')
+    started = time.monotonic()
+    directory = pathlib.Path(directory)
     if new_sentences is not None:
-        file_index = count
-        print('Start to load new sentences')
-        for sentence_index, sentence in new_sentences:
-            if _load(sentence, file_index):
+        new_sentences = [(index, sentence) for index, sentence in new_sentences]
+    checkpoint = _Checkpoint(directory / CHECKPOINT_NAME,
+                             _checkpoint_key(new_sentences, only_new)).load()
+    # an example is added to the checkpoint before its file is written
+    checkpoint.created = {index: number for index, number in checkpoint.created.items()
+                          if (directory / get_example_filename(number)).exists()}
+    count = len(list(filter(filename_pattern.match, os.listdir(directory))))
+    manifest = _open_manifest(directory, count)
+    manifest.update([number for number in checkpoint.created.values()
+                     if number not in manifest], directory=directory)
+    failed_new = []
+    failed_old = []
+    skipped = []
+    processed = 0
+
+    def progress():
+        nonlocal processed
+        processed += 1
+        if processed % checkpoint_every == 0:
+            manifest.save()
+            checkpoint.save()
+
+    completed = False
+    try:
+        if new_sentences is not None:
+            file_index = count
+            print('Start to load new sentences')
+
+            def handle_new(sentence_index, result):
+                nonlocal file_index
+                content = _valid_content(result)
+                if content is None:
+                    print('Sentence with index', sentence_index, 'did not load')
+                    failed_new.append(sentence_index)
+                    return
+                name = get_example_filename(file_index)
+                checkpoint.created[sentence_index] = file_index
+                checkpoint.save()
+                _write_atomic(directory / name, content)
+                manifest.update([file_index], fetched_at=time.time(), directory=directory)
+                manifest.save()
+                print(f'{name} created')
                 file_index += 1
-                print(f'{get_example_filename(file_index)} created')
-            else:
-                print('Sentence with index', sentence_index, 'did not load')
-                fails_new.append(sentence_index)
-    if not only_new:
-        print('Start to reload old sentences')
-        for file_index in range(count):
-            with open(_dir_path / get_example_filename(file_index)) as file:
-                json_old = json.load(file)
-            sentence = json_old['sentence']
-            if _load(sentence, file_index):
-                print(f'{get_example_filename(file_index)} reloading succeed')
-            else:
-                print(f'{get_example_filename(file_index)} reloading failed')
-                fails_old.append(file_index)
-
-    if fails_new:
-        print('Fails in new sentences:', fails_new)
-    if fails_old:
-        print('Reloading of the following files failed:', fails_old)
+
+            _fetch([item for item in new_sentences if item[0] not in checkpoint.created],
+                   handle_new, client, concurrency, ordered=True)
+        if not only_new:
+            print('Start to reload old sentences')
+            created = set(checkpoint.created.values())
+            refreshed = checkpoint.refreshed
+            now = time.time()
+            sentences = []
+            for number in range(count):
+                if number in created or number in refreshed:
+                    continue
+                path = directory / get_example_filename(number)
+                if _is_fresh(manifest, number, path, max_age, now):
+                    skipped.append(number)
+                    continue
+                if number in manifest:
+                    sentences.append((number, manifest[number]['sentence']))
+                    continue
+                try:
+                    with open(path) as file:
+                        sentences.append((number, json.load(file)['sentence']))
+                except (OSError, ValueError, KeyError):
+                    print(f'{path.name} can not be read')
+                    failed_old.append(number)
+
+            def handle_old(number, result):
+                name = get_example_filename(number)
+                content = _valid_content(result)
+                if content is None:
+                    print(f'{name} reloading failed')
+                    failed_old.append(number)
+                    return
+                path = directory / name
+                if _read_bytes(path) == content and number in manifest:
+                    manifest[number]['fetched_at'] = time.time()
+                    checkpoint.unchanged.append(number)
+                    print(f'{name} is up to date')
+                else:
+                    _write_atomic(path, content)
+                    manifest.update([number], fetched_at=time.time(), directory=directory)
+                    checkpoint.changed.append(number)
+                    print(f'{name} reloading succeed')
+                progress()
+
+            _fetch(sentences, handle_old, client, concurrency, ordered=False)
+        completed = True
+    finally:
+        if not completed:
+            # the update is interrupted, it is continued by the next call
+            manifest.save()
+            checkpoint.save()
+
+    manifest.save()
+    if failed_new or failed_old:
+        # failed sentences are requested again by the next call with the same arguments
+        checkpoint.save()
+    else:
+        checkpoint.remove()
+    if (checkpoint.created or checkpoint.changed) and directory == _dir_path:
+        _invalidate_pack()
+
+    summary = UpdateSummary(created=sorted(checkpoint.created.values()),
+                            changed=sorted(checkpoint.changed),
+                            unchanged=sorted(checkpoint.unchanged),
+                            skipped=skipped, failed_new=sorted(failed_new),
+                            failed_old=sorted(failed_old), resumed=checkpoint.resumed,
+                            seconds=time.monotonic() - started)
+    if failed_new:
+        print('Fails in new sentences:', summary.failed_new)
+    if failed_old:
+        print('Reloading of the following files failed:', summary.failed_old)
+    print(f'{len(summary.created)} created, {len(summary.changed)} changed, '
+          f'{len(summary.unchanged)} unchanged, {len(summary.skipped)} skipped, '
+          f'{len(failed_new) + len(failed_old)} failed in {summary.seconds:.1f} s')
+    return summary
@@ -0,0 +1,178 @@
+"""
+Manifest of the examples with metadata of every example
+
+The manifest allows to select examples by simple filters without deserializing the corpus
+
+>>> manifest = load_manifest()  # doctest: +SKIP
+>>> manifest.select(pos=['ПРИЧ'], min_tokens=20)  # doctest: +SKIP
+[12, 48, 301]
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Union
+
+_dir_path = pathlib.Path(__file__).parent.absolute()
+
+DEFAULT_PATH = _dir_path / 'manifest.json'
+
+_VERBAL_FORMS = ('ПРИЧ', 'ДЕЕПР', 'ИНФ')
+
+
+def _pos(tags: str) -> str:
+    """
+    :param tags: tags of homonym in any format of `krasoteevo.ru`
+    :return: part of speech. Participles, gerunds and infinitives of new format are
+        'ПРИЧ', 'ДЕЕПР' and 'ИНФ' instead of 'V'
+    """
+    if tags.startswith("OpencorporaTag('"):
+        return tags[len("OpencorporaTag('"):].replace(' ', ',').split(',')[0]
+    grammemes = tags.split(' ')
+    for verbal_form in _VERBAL_FORMS:
+        if verbal_form in grammemes:
+            return verbal_form
+    return grammemes[0]
+
+
+def describe(json_obj, content: bytes, fetched_at: float) -> dict:
+    """
+    :param json_obj: syntax analysis result
+    :param content: content of the example file
+    :param fetched_at: UNIX time of the example download
+    :return: manifest entry of the example
+    """
+    pos = Counter()
+    for morphs in json_obj['morphs']:
+        if isinstance(morphs, dict):  # new JSON format
+            morphs = [item for item in morphs['homonyms'] if item['active']]
+        if morphs:
+            pos[_pos(morphs[0]['tags'])] += 1
+    synts = json_obj['synts']
+    if synts and isinstance(synts[0], dict):
+        edge_types = {item['dep_type'] for item in synts}
+    else:
+        edge_types = {item[2] for item in synts}
+    return {
+        'sentence': json_obj['sentence'],
+        'tokens': len(json_obj['tokens']),
+        'pos': dict(pos),
+        'edge_types': sorted(edge_types),
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'fetched_at': fetched_at,
+    }
+
+
+class Manifest:
+    """Mapping from numbers of examples to their metadata"""
+
+    def __init__(self, entries: Dict[int, dict] = None,
+                 path: Union[str, os.PathLike] = DEFAULT_PATH):
+        self.entries = {} if entries is None else entries
+        self.path = pathlib.Path(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, number: int) -> dict:
+        return self.entries[number]
+
+    def __contains__(self, number: int):
+        return number in self.entries
+
+    def update(self, numbers: Iterable[int], fetched_at: float = None,
+               directory: Union[str, os.PathLike] = _dir_path):
+        """
+        Recompute entries of the examples from their files.
+        Entries of missing and broken files are removed
+
+        :param numbers: numbers of the examples
+        :param fetched_at: UNIX time of the download. Mtime of the file is used if it is None
+        :param directory: directory with examples
+        """
+        directory = pathlib.Path(directory)
+        for number in numbers:
+            path = directory / f'{number}.json'
+            try:
+                content = path.read_bytes()
+                file_time = path.stat().st_mtime
+            except FileNotFoundError:
+                self.entries.pop(number, None)
+                continue
+            try:
+                json_obj = json.loads(content)
+            except json.JSONDecodeError:
+                self.entries.pop(number, None)
+                continue
+            self.entries[number] = describe(json_obj, content,
+                                            file_time if fetched_at is None else fetched_at)
+        return self
+
+    def select(self, *, min_tokens: int = None, max_tokens: int = None, pos: Iterable[str] = (),
+               edge_types: Iterable[str] = (),
+               where: Callable[[dict], bool] = None) -> List[int]:
+        """
+        :param min_tokens: minimal count of tokens
+        :param max_tokens: maximal count of tokens
+        :param pos: parts of speech which must be present in the sentence
+        :param edge_types: dependency types which must be present in the sentence
+        :param where: arbitrary predicate for the manifest entry
+        :return: sorted numbers of examples satisfying all filters
+        """
+        pos = set(pos)
+        edge_types = set(edge_types)
+        result = []
+        for number, entry in self.entries.items():
+            if min_tokens is not None and entry['tokens'] < min_tokens:
+                continue
+            if max_tokens is not None and entry['tokens'] > max_tokens:
+                continue
+            if not pos.issubset(entry['pos']):
+                continue
+            if not edge_types.issubset(entry['edge_types']):
+                continue
+            if where is not None and not where(entry):
+                continue
+            result.append(number)
+        return sorted(result)
+
+    def save(self):
+        """Write the manifest atomically"""
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({str(number): entry for number, entry in sorted(self.entries.items())},
+                      file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike] = DEFAULT_PATH) -> 'Manifest':
+        with open(path, encoding='utf-8') as file:
+            entries = {int(number): entry for number, entry in json.load(file).items()}
+        return cls(entries, path)
+
+
+def build_manifest(count: int, path: Union[str, os.PathLike] = DEFAULT_PATH) -> Manifest:
+    """
+    Build manifest of examples from 0 to `count - 1` and save it
+    """
+    manifest = Manifest(path=path).update(range(count))
+    manifest.save()
+    return manifest
+
+
+def load_manifest(path: Union[str, os.PathLike] = DEFAULT_PATH) -> Manifest:
+    """
+    Load the manifest of the examples, it is built if it doesn't exist
+    """
+    try:
+        return Manifest.load(path)
+    except FileNotFoundError:
+        # imported here because the examples package uses this module
+        from krasoteevo.examples import get_count  # pylint: disable=import-outside-toplevel
+        return build_manifest(get_count(packed=False), path)
+
+
+if __name__ == '__main__':
+    print(f'{len(load_manifest())} examples in {DEFAULT_PATH}')
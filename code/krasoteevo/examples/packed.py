@@ -0,0 +1,181 @@
+"""
+Packed memory-mapped store of the examples
+
+JSON files of the examples stay the source of truth. The pack is a single binary file
+with compact JSON records and an offset index. It is memory-mapped, so reading an example
+decodes only the requested record. Build the pack with
+
+    python -m krasoteevo.examples.packed
+"""
+
+import json
+import mmap
+import os
+import pathlib
+import re
+import shutil
+import struct
+from array import array
+from typing import Iterable, Iterator, Union
+
+_dir_path = pathlib.Path(__file__).parent.absolute()
+
+DEFAULT_PATH = _dir_path / 'examples.pack'
+
+_MAGIC = b'KRPK'
+_VERSION = 1
+# magic, version, record count, the latest mtime of the source files in nanoseconds
+_HEADER = struct.Struct('<4sIIQ')
+# offset of the record, length of the record
+_INDEX_ITEM = struct.Struct('<QI')
+
+
+_filename_pattern = re.compile(r'^(0|[1-9][0-9]*)\.json$')
+
+
+class StalePackException(Exception):
+    """Class for cases in which the pack doesn't match JSON files of the examples"""
+
+
+def _source_state():
+    """
+    :return: count of example files and the latest mtime of them in nanoseconds
+    """
+    count = 0
+    mtime_ns = 0
+    with os.scandir(_dir_path) as entries:
+        for entry in entries:
+            if _filename_pattern.match(entry.name):
+                count += 1
+                mtime_ns = max(mtime_ns, entry.stat().st_mtime_ns)
+    return count, mtime_ns
+
+
+class PackedCorpus:
+    """Read-only memory-mapped pack of JSON objects"""
+
+    def __init__(self, path: Union[str, os.PathLike] = DEFAULT_PATH):
+        """
+        :param path: path to the pack built by `build_pack`
+        :raises ValueError: file is not a pack of a supported version or it is truncated
+        """
+        self.path = pathlib.Path(path)
+        with open(self.path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        if size < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f'{self.path} is not a pack of version {_VERSION}')
+        magic, version, self._count, self.source_mtime_ns = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f'{self.path} is not a pack of version {_VERSION}')
+        # the index and the last record must be within the file
+        index_end = _HEADER.size + self._count * _INDEX_ITEM.size
+        truncated = index_end > size
+        if not truncated and self._count:
+            offset, length = _INDEX_ITEM.unpack_from(self._mmap, index_end - _INDEX_ITEM.size)
+            truncated = offset + length > size
+        if truncated:
+            self._mmap.close()
+            raise ValueError(f'{self.path} is truncated')
+
+    def __len__(self):
+        return self._count
+
+    def raw(self, number: int) -> bytes:
+        """
+        :return: compact JSON of the record with number `number` as bytes
+        """
+        if not 0 <= number < self._count:
+            raise IndexError('record number out of range')
+        offset, length = _INDEX_ITEM.unpack_from(self._mmap,
+                                                 _HEADER.size + number * _INDEX_ITEM.size)
+        return self._mmap[offset:offset + length]
+
+    def __getitem__(self, number: int):
+        return json.loads(self.raw(number))
+
+    def __iter__(self) -> Iterator:
+        return (self[number] for number in range(self._count))
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_pack(json_objects: Iterable = None, path: Union[str, os.PathLike] = DEFAULT_PATH,
+               source_mtime_ns: int = None) -> int:
+    """
+    Write JSON objects to the pack. The file is replaced atomically.
+    Records are streamed to a temporary file, only their offsets are kept in memory
+
+    :param json_objects: JSON objects to pack. All examples are packed if it is None
+    :param path: path to the pack
+    :param source_mtime_ns: the latest mtime of the source files saved in the header.
+        If it is None, the latest mtime of the example files is used
+    :return: count of packed records
+    """
+    if json_objects is None:
+        json_objects = _read_examples()
+        if source_mtime_ns is None:
+            source_mtime_ns = _source_state()[1]
+    path = pathlib.Path(path)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    data_path = path.with_suffix(f'.{os.getpid()}.data.tmp')
+    lengths = array('I')
+    try:
+        with open(data_path, 'wb') as data:
+            for json_obj in json_objects:
+                record = json.dumps(json_obj, ensure_ascii=False,
+                                    separators=(',', ':')).encode('utf-8')
+                data.write(record)
+                lengths.append(len(record))
+        offset = _HEADER.size + len(lengths) * _INDEX_ITEM.size
+        with open(tmp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(lengths), source_mtime_ns or 0))
+            for length in lengths:
+                file.write(_INDEX_ITEM.pack(offset, length))
+                offset += length
+            with open(data_path, 'rb') as data:
+                shutil.copyfileobj(data, file)
+        os.replace(tmp_path, path)
+    finally:
+        data_path.unlink(missing_ok=True)
+        tmp_path.unlink(missing_ok=True)
+    return len(lengths)
+
+
+def _read_examples():
+    number = 0
+    while True:
+        try:
+            with open(_dir_path / f'{number}.json') as file:
+                yield json.load(file)
+        except FileNotFoundError:
+            return
+        number += 1
+
+
+def open_examples_pack(path: Union[str, os.PathLike] = DEFAULT_PATH) -> PackedCorpus:
+    """
+    Open the pack of the examples
+
+    :raises FileNotFoundError: the pack has not been built
+    :raises StalePackException: examples have been added, removed or modified
+        after the pack was built
+    """
+    pack = PackedCorpus(path)
+    if (len(pack), pack.source_mtime_ns) != _source_state():
+        pack.close()
+        raise StalePackException(f'{path} is older than examples')
+    return pack
+
+
+if __name__ == '__main__':
+    print(f'{build_pack()} examples packed to {DEFAULT_PATH}')
@@ -0,0 +1,233 @@
+"""
+Lightweight metrics of the question generation pipeline
+
+Counters, histograms and timing spans are collected into the module registry only after
+`enable()` call or with environment variable KRASOTEEVO_METRICS=1. When metrics are disabled,
+every function returns immediately and `span` returns a shared no-op context manager
+
+>>> enable()
+>>> with span('graph'):
+...     graph = SentenceGraph(json_obj, analyzer=analyzer)  # doctest: +SKIP
+>>> count('syntax_requests_total')
+>>> observe('sentence_tokens', 12)
+>>> print(to_prometheus())  # doctest: +SKIP
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+PREFIX = 'krasoteevo_'
+
+# seconds
+DEFAULT_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                        1.0, 2.5, 5.0, 10.0)
+HISTOGRAM_BUCKETS = {
+    'sentence_tokens': (5, 10, 15, 20, 30, 40, 60, 80, 120),
+    'questions_per_sentence': (0, 1, 2, 3, 5, 8, 13, 21),
+}
+
+_LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Optional[dict]) -> _LabelsKey:
+    if not labels:
+        return ()
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds of buckets"""
+
+    __slots__ = ('bounds', 'buckets', 'sum', 'count')
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        :return: list of pairs (upper bound, count of values not greater than the bound)
+        """
+        result = []
+        total = 0
+        for bound, bucket in zip(self.bounds + (float('inf'),), self.buckets):
+            total += bucket
+            result.append((bound, total))
+        return result
+
+
+class MetricsRegistry:
+    """Thread-safe storage of counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, _LabelsKey], float] = {}
+        self.histograms: Dict[Tuple[str, _LabelsKey], Histogram] = {}
+
+    def count(self, name: str, value: float = 1, labels: dict = None):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: dict = None):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                bounds = HISTOGRAM_BUCKETS.get(name, DEFAULT_TIME_BUCKETS)
+                histogram = self.histograms[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> dict:
+        """
+        :return: JSON object with values of counters and histograms
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'count': histogram.count,
+                           'sum': histogram.sum,
+                           'buckets': [[bound if bound != float('inf') else '+Inf', total]
+                                       for bound, total in histogram.cumulative()]}
+                          for (name, labels), histogram in sorted(self.histograms.items())]
+        return {'time': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        """
+        :return: metrics in Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+            histograms = [(key, histogram.count, histogram.sum, histogram.cumulative())
+                          for key, histogram in histograms]
+        typed = set()
+        for (name, labels), value in counters:
+            name = PREFIX + name
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+        for (name, labels), total, value_sum, cumulative in histograms:
+            name = PREFIX + name
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            for bound, bucket_total in cumulative:
+                bound = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} '
+                             f'{bucket_total}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value_sum}')
+            lines.append(f'{name}_count{_format_labels(labels)} {total}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: _LabelsKey) -> str:
+    if not labels:
+        return ''
+    values = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f'{{{values}}}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+_enabled = os.environ.get('KRASOTEEVO_METRICS', '') not in ('', '0')
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def count(name: str, value: float = 1, labels: dict = None):
+    """Increase counter `name`"""
+    if _enabled:
+        registry.count(name, value, labels)
+
+
+def observe(name: str, value: float, labels: dict = None):
+    """Add value to histogram `name`"""
+    if _enabled:
+        registry.observe(name, value, labels)
+
+
+class _Span:
+    __slots__ = ('labels', 'start')
+
+    def __init__(self, labels: dict):
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        registry.observe('stage_seconds', time.perf_counter() - self.start, self.labels)
+        if exc_type is not None:
+            registry.count('stage_errors_total', 1, self.labels)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage: str):
+    """
+    :param stage: name of the stage, it is label 'stage' of histogram 'stage_seconds'
+    :return: context manager measuring time of the block
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span({'stage': stage})
+
+
+def snapshot() -> dict:
+    return registry.snapshot()
+
+
+def to_json() -> str:
+    return json.dumps(registry.snapshot(), ensure_ascii=False)
+
+
+def to_prometheus() -> str:
+    return registry.to_prometheus()
@@ -1,6 +1,21 @@
 """Function to send request to service to parse sentence"""
 
+import threading
+from typing import Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from krasoteevo import metrics
+
+NEW_FORMAT_HOST = 'krasoteevo.ru'
+OLD_FORMAT_HOST = '185.17.143.225'
+
+RESULT_KEYS = frozenset({'sentence', 'tokens', 'morphs', 'synts'})
+
+# longer sentences break the service
+MAX_SENTENCE_LENGTH = 300
 
 
 class EmptySentenceException(Exception):
@@ -11,12 +26,110 @@ class TooLongSentenceException(Exception):
     """Class for cases in which sentence length more than some adequate number"""
 
 
-def request_syntax_analysis(sentence: str, old_format: bool = False) -> requests.Response:
+def check_sentence(sentence: str):
+    """
+    :raises EmptySentenceException: empty sentence is not allowed
+    :raises TooLongSentenceException: sentence with more than 300 characters is not allowed,
+    because it breaks the service
+    """
+    if not sentence:
+        raise EmptySentenceException('Empty sentence')
+    if len(sentence) > MAX_SENTENCE_LENGTH:
+        raise TooLongSentenceException('Too big sentence')
+
+
+def is_analysis_result(json_obj) -> bool:
+    """
+    :return: True if JSON object returned by the service is a syntax analysis result,
+        not an error message
+    """
+    return isinstance(json_obj, dict) and RESULT_KEYS.issubset(json_obj)
+
+
+class SyntaxClient:
+    """
+    Reusable client for the service
+
+    It holds `requests.Session` with keep-alive connection pool for both hosts,
+    so TCP and TLS handshakes are made once per connection instead of once per sentence.
+    Requests have connect/read timeouts and are retried with exponential backoff
+    on connection errors and 5xx responses
+    """
+
+    def __init__(self, *, connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 retries: int = 3, backoff_factor: float = 0.5, pool_size: int = 10):
+        """
+        :param connect_timeout: seconds to wait for connection to the host
+        :param read_timeout: seconds to wait for response data
+        :param retries: maximal count of retries for one request
+        :param backoff_factor: delay before n-th retry is `backoff_factor * 2 ** (n - 1)` seconds
+        :param pool_size: maximal count of kept-alive connections per host
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                      backoff_factor=backoff_factor, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=frozenset({'GET'}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+
+    def request_syntax_analysis(self, sentence: str, old_format: bool = False) -> requests.Response:
+        """
+        Send request to the service to parse Russian sentence
+
+        :param old_format: mark to get old or new format of JSON
+        :param sentence: the Russian sentence you want to parse
+
+        :raises EmptySentenceException: empty sentence is not allowed
+        :raises TooLongSentenceException: sentence with more than 300 characters is not allowed,
+        because it breaks the service
+
+        :return: the requests.Response object with syntax analysis result data in JSON format
+        """
+        check_sentence(sentence)
+        host = OLD_FORMAT_HOST if old_format else NEW_FORMAT_HOST
+        params = {'format': 'json', 'text': sentence}
+        metrics.count('syntax_requests_total', labels={'format': 'old' if old_format else 'new'})
+        with metrics.span('syntax_request'):
+            # SSL certificate isn't verified. It is passed to every call because
+            # `Session.verify` is overridden by REQUESTS_CA_BUNDLE and CURL_CA_BUNDLE
+            return self.session.get(f"https://{host}/syntax", params=params,
+                                    timeout=self.timeout, verify=False)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_client: Optional[SyntaxClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> SyntaxClient:
+    """
+    :return: `SyntaxClient` object shared by calls without explicitly passed client
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SyntaxClient()
+        return _default_client
+
+
+def request_syntax_analysis(sentence: str, old_format: bool = False,
+                            client: SyntaxClient = None) -> requests.Response:
     """
     Send request to the service to parse Russian sentence
 
     :param old_format: mark to get old or new format of JSON
     :param sentence: the Russian sentence you want to parse
+    :param client: `SyntaxClient` object to send request with,
+        the shared default client is used if it is None
 
     :raises EmptySentenceException: empty sentence is not allowed
     :raises TooLongSentenceException: sentence with more than 300 characters is not allowed,
@@ -24,16 +137,6 @@ def request_syntax_analysis(sentence: str, old_format: bool = False) -> requests
 
     :return: the requests.Response object with syntax analysis result data in JSON format
     """
-    if not sentence:
-        raise EmptySentenceException('Empty sentence')
-    if len(sentence) > 300:
-        raise TooLongSentenceException('Too big sentence')
-    if old_format:
-        host = '185.17.143.225'
-    else:
-        host = 'krasoteevo.ru'
-    params = {'format': 'json', 'text': sentence}
-    response = requests.get(f"https://{host}/syntax", params=params,
-                            verify=False  # don't verify SSL certificate
-                            )
-    return response
+    if client is None:
+        client = get_default_client()
+    return client.request_syntax_analysis(sentence, old_format=old_format)
@@ -0,0 +1,180 @@
+"""
+Importer of texts with morpho-syntactic markup of the Russian National Corpus (SynTagRus)
+
+https://ruscorpora.ru/new/instruction-syntax.html
+
+Sentences are elements `S`, words are elements `W` with attributes ID, DOM (ID of the head
+or '_root'), LINK (type of the relation), LEMMA and FEAT (grammemes), punctuation marks are
+text between words. The markup uses the same grammemes and relations as `krasoteevo.ru`,
+so sentences are converted into the new JSON format of the service and go to
+`SentenceGraph`, `ColumnarCorpus` and `build_pack` unchanged.
+Files are parsed incrementally and every sentence is released after it is converted
+
+    python -m krasoteevo.ruscorpora corpus/*.tgt --jsonl sentences.jsonl
+    python -m krasoteevo.ruscorpora corpus/*.tgt --pack syntagrus.pack
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import IO, Iterable, Iterator, List, Optional, Union
+from xml.etree.ElementTree import iterparse
+
+import pymorphy2
+from razdel import tokenize
+
+from krasoteevo.examples.packed import build_pack
+from krasoteevo.sentence_graph import SentenceGraph
+
+Source = Union[str, os.PathLike, IO[bytes]]
+
+PUNCTUATION_TAG = 'NID'
+
+# grammemes of the corpus which are written differently by `krasoteevo.ru`
+_GRAMMEMES = {
+    'СРЕД': 'СР',
+}
+# grammemes which `krasoteevo.ru` doesn't use
+_SKIPPED_GRAMMEMES = frozenset({'СЛ', 'СМЯГ', 'НЕСТАНД', 'МЕТА', 'НЕПРАВ'})
+
+_ROOT = '_root'
+_FANTOM = 'FANTOM'
+
+_spaces = re.compile(r'\s+')
+
+
+def convert_feat(feat: str) -> str:
+    """
+    :param feat: value of attribute FEAT, for example 'S ЕД МУЖ ИМ ОД'
+    :return: tag of the new JSON format of `krasoteevo.ru`
+    """
+    return ' '.join(_GRAMMEMES.get(grammeme, grammeme) for grammeme in feat.split()
+                    if grammeme not in _SKIPPED_GRAMMEMES)
+
+
+def _punctuation(text: Optional[str]) -> List[str]:
+    if not text or text.isspace():
+        return []
+    return [token.text for token in tokenize(text)]
+
+
+def _homonym(word: str, lexem: str, tags: str, active: bool) -> dict:
+    return {'index': 0, 'word': word, 'lexem': lexem, 'tags': tags, 'active': active}
+
+
+def convert_sentence(element) -> Optional[dict]:
+    """
+    Convert element `S` into syntax analysis result. Phantom words restored by annotators
+    are dropped and their dependents are attached to the nearest real ancestor
+
+    :return: JSON object in the new format of `krasoteevo.ru` or None if there are no words
+    """
+    tokens = _punctuation(element.text)
+    morphs = [_homonym(mark, mark, PUNCTUATION_TAG, False) for mark in tokens]
+    pieces = [element.text or '']
+    index_of = {}  # ID of the word -> index of the token
+    heads = {}  # ID of the word -> (ID of the head or None, relation)
+    fantoms = {}
+    for word in element.iter('W'):
+        word_id = word.get('ID')
+        head = word.get('DOM')
+        head = None if head in (None, _ROOT) else head
+        if word.get('NODETYPE') == _FANTOM:
+            fantoms[word_id] = head
+        else:
+            text = (word.text or '').strip()
+            if text:
+                index_of[word_id] = len(tokens)
+                tokens.append(text)
+                morphs.append(_homonym(text.lower(), (word.get('LEMMA') or text).lower(),
+                                       convert_feat(word.get('FEAT', '')), True))
+                heads[word_id] = (head, word.get('LINK'))
+                pieces.append(text)
+        for mark in _punctuation(word.tail):
+            tokens.append(mark)
+            morphs.append(_homonym(mark, mark, PUNCTUATION_TAG, False))
+        pieces.append(word.tail or '')
+    if not index_of:
+        return None
+
+    synts = []
+    for word_id, (head, relation) in heads.items():
+        visited = set()
+        while head in fantoms and head not in visited:
+            visited.add(head)
+            head = fantoms[head]
+        if head is None or head not in index_of or relation is None:
+            continue
+        head_index, dependent_index = index_of[head], index_of[word_id]
+        synts.append({'dep_type': relation,
+                      'head': morphs[head_index]['word'],
+                      'dependent': morphs[dependent_index]['word'],
+                      'head_i': head_index, 'head_homonym_i': 0,
+                      'dependent_i': dependent_index, 'dependent_homonym_i': 0})
+    sentence = _spaces.sub(' ', ''.join(pieces)).strip()
+    morphs = [{'index': index, 'token': token, 'homonyms': [homonym]}
+              for index, (token, homonym) in enumerate(zip(tokens, morphs))]
+    return {'sentence': sentence, 'tokens': tokens, 'morphs': morphs, 'synts': synts}
+
+
+def iter_ruscorpora(source: Source) -> Iterator[dict]:
+    """
+    :param source: path to XML file or binary file object. The encoding is taken
+        from the XML declaration
+    :return: iterator of JSON objects in the new format of `krasoteevo.ru`
+    """
+    root = None
+    for event, element in iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = element
+        if event != 'end' or element.tag != 'S':
+            continue
+        json_obj = convert_sentence(element)
+        # converted sentences are removed from the tree, so memory doesn't grow
+        element.clear()
+        if root is not element:
+            root.clear()
+        if json_obj is not None:
+            yield json_obj
+
+
+def iter_ruscorpora_files(sources: Iterable[Source]) -> Iterator[dict]:
+    for source in sources:
+        yield from iter_ruscorpora(source)
+
+
+def iter_ruscorpora_graphs(source: Source, analyzer: pymorphy2.MorphAnalyzer = None
+                           ) -> Iterator[SentenceGraph]:
+    """
+    :param analyzer: `pymorphy2.MorphAnalyzer` object passed to every `SentenceGraph`
+    :return: iterator of graphs of sentences of the file
+    """
+    return (SentenceGraph(json_obj, analyzer=analyzer) for json_obj in iter_ruscorpora(source))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert SynTagRus XML files into JSON Lines '
+                                                 'or a pack of syntax analysis results')
+    parser.add_argument('files', nargs='+', help='XML files of the corpus')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--jsonl', type=argparse.FileType('w', encoding='utf-8'),
+                        help="output file in JSON Lines format, '-' for stdout")
+    output.add_argument('--pack', help='output pack, see krasoteevo.examples.packed')
+    args = parser.parse_args(argv)
+
+    json_objects = iter_ruscorpora_files(args.files)
+    if args.pack is not None:
+        count = build_pack(json_objects, path=args.pack)
+    else:
+        count = 0
+        with args.jsonl:
+            for json_obj in json_objects:
+                args.jsonl.write(json.dumps(json_obj, ensure_ascii=False) + '\n')
+                count += 1
+    print(f'{count} sentences converted', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,17 @@
 """Classes to use syntax analysis results"""
 
 import json
-from typing import Any
+from typing import Any, Dict, FrozenSet, List, Optional
 from warnings import warn
 
 from igraph import Graph
 import pymorphy2
 
 from parse_proxy.morph_info import MorphInfo
-from krasoteevo.request import request_syntax_analysis
+from krasoteevo import metrics
+from krasoteevo.request import request_syntax_analysis, SyntaxClient
+from krasoteevo.cache import ResponseCache
+from krasoteevo.backends import ParserBackend
 from krasoteevo.krasoteevo_tag import KrasoteevoTag
 
 
@@ -48,14 +51,25 @@ class SentenceGraph(Graph):
     Edge attribute 'type' is the type of connection between words, such as 'предик, 'обст', 'сочин',
     'соч-союз', '1-компл', 'огранич', 'предл', etc
 
+    Property 'adjacency' is `AdjacencyIndex` of the graph for rules which walk over the tree
+
+>>> graph.adjacency.children(1, 'обст')
+[2]
+
     """
 
     def __init__(self, sentence: Any = None, *args, analyzer: pymorphy2.MorphAnalyzer = None,
-                 **kwargs):
+                 cache: ResponseCache = None, client: SyntaxClient = None,
+                 backend: ParserBackend = None, **kwargs):
         """
         :param sentence: a sentence to parse or JSON (string or object) from `krasoteevo.ru`
         :param analyzer: it is `pymorphy2.MorphAnlyzer` class passed from `pymorphy2`.
             It uses big dict (~15 GB) so the object of such class should be created one time
+        :param cache: `ResponseCache` object to look up the sentence before sending request
+        :param client: `SyntaxClient` object to send request with, it is used on cache miss
+            if `cache` is passed
+        :param backend: parser backend from `krasoteevo.backends` to parse the sentence with.
+            `cache` and `client` are ignored if it is passed
         """
         if sentence is not None:
             if isinstance(sentence, str):
@@ -64,23 +78,118 @@ class SentenceGraph(Graph):
                     json_obj = json.loads(sentence)
                 except json.JSONDecodeError:
                     # sentence passed
-                    response = request_syntax_analysis(sentence, old_format=True)
-                    json_obj = response.json()
+                    if backend is not None:
+                        json_obj = backend.analyse(sentence)
+                    elif cache is not None:
+                        json_obj = cache.request(sentence, old_format=True, client=client)
+                    else:
+                        response = request_syntax_analysis(sentence, old_format=True,
+                                                           client=client)
+                        json_obj = response.json()
             else:
                 # JSON object passed
                 json_obj = sentence
             sentence = json_obj['sentence']
             if analyzer is None:
                 warn("pymorphy2.MorphAnalyzer object has not been passed to SentenceGraph")
-            vertex_count, vertex_attrs = _extract_vertices(json_obj, analyzer)
-            edges, edge_attrs = _extract_edges(json_obj)
+            with metrics.span('graph'):
+                vertex_count, vertex_attrs = _extract_vertices(json_obj, analyzer)
+                edges, edge_attrs = _extract_edges(json_obj)
+            metrics.observe('sentence_tokens', vertex_count)
 
             super().__init__(self, directed=True, n=vertex_count, vertex_attrs=vertex_attrs,
                              graph_attrs={'json': json_obj, 'sentence': sentence},
                              edges=edges, edge_attrs=edge_attrs)
+            self._adjacency = AdjacencyIndex(self)
         else:
             super().__init__(self, *args, **kwargs)
 
+    @property
+    def adjacency(self) -> 'AdjacencyIndex':
+        """
+        Index built when the graph is created from JSON, otherwise on the first access.
+        It isn't updated when the graph is modified
+        """
+        try:
+            return self._adjacency
+        except AttributeError:
+            self._adjacency = AdjacencyIndex(self)
+            return self._adjacency
+
+
+class AdjacencyIndex:
+    """
+    Children, parents and first homonyms of vertices in plain lists and dicts,
+    so rules don't look up igraph attributes in their inner loops.
+    Children are listed once in the order of `Vertex.out_edges()`
+    """
+
+    __slots__ = ('parents', 'first_homonyms', '_children', '_children_by_type', '_edge_types')
+
+    def __init__(self, graph: Graph):
+        vertex_count = graph.vcount()
+        edge_list = graph.get_edgelist()
+        if 'type' in graph.es.attributes():
+            types = graph.es['type']
+        else:
+            types = [None] * len(edge_list)
+        if 'morph_info_list' in graph.vs.attributes():
+            self.first_homonyms: List[Optional[MorphInfo]] = [
+                morph_info_list[0] if morph_info_list else None
+                for morph_info_list in graph.vs['morph_info_list']]
+        else:
+            self.first_homonyms = [None] * vertex_count
+        self.parents: List[int] = [-1] * vertex_count
+        self._children: List[List[int]] = []
+        self._children_by_type: List[Dict[str, List[int]]] = []
+        self._edge_types: List[FrozenSet[str]] = []
+        for vertex, edge_ids in enumerate(graph.get_inclist(mode='out')):
+            children = {}
+            children_by_type = {}
+            for edge_id in edge_ids:
+                child = edge_list[edge_id][1]
+                children[child] = None
+                children_by_type.setdefault(types[edge_id], []).append(child)
+                if self.parents[child] == -1:
+                    self.parents[child] = vertex
+            self._children.append(list(children))
+            self._children_by_type.append(children_by_type)
+            self._edge_types.append(frozenset(children_by_type))
+
+    def children(self, vertex: int, edge_type: str = None) -> List[int]:
+        """
+        :param edge_type: type of edges to the children, all children are returned if it is None
+        :return: indices of children, the list must not be modified
+        """
+        if edge_type is None:
+            return self._children[vertex]
+        return self._children_by_type[vertex].get(edge_type, [])
+
+    def child_edges(self, vertex: int) -> Dict[str, List[int]]:
+        """
+        :return: dict from edge types to indices of children, it must not be modified
+        """
+        return self._children_by_type[vertex]
+
+    def edge_types(self, vertex: int) -> FrozenSet[str]:
+        """
+        :return: types of edges to children of the vertex
+        """
+        return self._edge_types[vertex]
+
+    def parent(self, vertex: int) -> Optional[int]:
+        """
+        :return: index of the head of the vertex or None for roots
+        """
+        parent = self.parents[vertex]
+        return None if parent == -1 else parent
+
+    def first_homonym(self, vertex: int) -> Optional[MorphInfo]:
+        """
+        :return: the first MorphInfo of the vertex or None for punctuation marks
+        """
+        return self.first_homonyms[vertex]
+
 
 _LEFT_OPENCORPORA_TAG = "OpencorporaTag('"
 _RIGHT_OPENCORPORA_TAG = "')"
@@ -0,0 +1,16 @@
+"""Configuration of the tests"""
+import inspect
+
+from pymorphy2.units.base import BaseAnalyzerUnit
+
+
+def _get_param_names(cls):
+    if cls.__init__ is object.__init__:
+        return []
+    return sorted(inspect.getfullargspec(cls.__init__).args[1:])
+
+
+if not hasattr(inspect, 'getargspec'):
+    # pymorphy2 0.9.1 uses `inspect.getargspec` removed in Python 3.11, so `MorphAnalyzer`
+    # can't be created without this patch. It doesn't depend on modules imported by other tests
+    BaseAnalyzerUnit._get_param_names = classmethod(_get_param_names)  # noqa
@@ -0,0 +1,84 @@
+"""Tests for krasoteevo.backends module"""
+import pytest
+import requests
+
+from krasoteevo.backends import FallbackBackend, KrasoteevoBackend, NatashaBackend, make_backend
+from krasoteevo.cache import ResponseCache
+from krasoteevo.sentence_graph import SentenceGraph
+
+
+@pytest.fixture(scope='module')
+def natasha():
+    return NatashaBackend()
+
+
+def _edges(graph: SentenceGraph):
+    return {(graph.vs[e.source]['token'], e['type'], graph.vs[e.target]['token'])
+            for e in graph.es}
+
+
+def test_natasha_graph(natasha):
+    graph = SentenceGraph('Ваня идёт гулять в парк.', backend=natasha)
+    assert graph.vs['token'] == ['Ваня', 'идёт', 'гулять', 'в', 'парк', '.']
+    assert graph.vs['is_word'] == [True, True, True, True, True, False]
+    assert graph.vs[1]['morph_info_list'][0].normal_form == 'идти'
+    assert {('идёт', 'предик', 'Ваня'), ('в', 'предл', 'парк')} <= _edges(graph)
+
+
+def test_natasha_coordination(natasha):
+    graph = SentenceGraph('Мы купили хлеб и молоко.', backend=natasha)
+    assert {('хлеб', 'сочин', 'и'), ('и', 'соч-союзн', 'молоко')} <= _edges(graph)
+
+
+class _FailingBackend:
+    name = 'failing'
+
+    def analyse(self, sentence):
+        raise requests.ConnectionError(sentence)
+
+
+def test_fallback(natasha):
+    backend = FallbackBackend(_FailingBackend(), natasha)
+    assert backend.analyse('Ваня идёт гулять.')['tokens'] == ['Ваня', 'идёт', 'гулять', '.']
+    with pytest.raises(ValueError):
+        make_backend('unknown')
+
+
+class _Response:
+    def __init__(self, status_code, json_obj):
+        self.status_code = status_code
+        self.json_obj = json_obj
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error')
+
+    def json(self):
+        return self.json_obj
+
+
+class _Client:
+    def __init__(self, status_code, json_obj):
+        self.response = _Response(status_code, json_obj)
+        self.sentences = []
+
+    def request_syntax_analysis(self, sentence, old_format=False):
+        self.sentences.append(sentence)
+        return self.response
+
+
+def test_krasoteevo_errors(natasha):
+    for client in [_Client(500, {'error': 'Internal error'}), _Client(200, {'error': 'Bad'})]:
+        with pytest.raises((requests.HTTPError, ValueError)):
+            KrasoteevoBackend(client=client).analyse('Ваня идёт гулять.')
+        backend = FallbackBackend(KrasoteevoBackend(client=client), natasha)
+        assert backend.analyse('Ваня идёт гулять.')['tokens'] == ['Ваня', 'идёт', 'гулять', '.']
+
+
+def test_krasoteevo_cache_uses_client():
+    json_obj = {'sentence': 'Ваня спит.', 'tokens': [], 'morphs': [], 'synts': []}
+    client = _Client(200, json_obj)
+    backend = make_backend('remote', client=client, cache=ResponseCache())
+    assert backend.analyse('Ваня спит.') == json_obj
+    assert backend.analyse('Ваня спит.') == json_obj
+    assert client.sentences == ['Ваня спит.']
@@ -0,0 +1,94 @@
+"""Tests for krasoteevo.batch module"""
+import asyncio
+import time
+
+from krasoteevo.batch import analyse_batch, analyse_sentences
+from krasoteevo.request import EmptySentenceException, TooLongSentenceException
+
+
+class _Response:
+    def __init__(self, sentence):
+        self.sentence = sentence
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'sentence': self.sentence}
+
+
+class _SlowClient:
+    """Client answering after delay proportional to length of the sentence"""
+
+    def request_syntax_analysis(self, sentence, old_format=False):
+        time.sleep(0.01 * len(sentence))
+        return _Response(sentence)
+
+
+def test_errors_are_reported_per_item():
+    results = analyse_sentences(['а' * 3, '', 'а' * 301, 'а'], client=_SlowClient())
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert isinstance(results[1].error, EmptySentenceException)
+    assert isinstance(results[2].error, TooLongSentenceException)
+    assert results[0].json() == {'sentence': 'а' * 3}
+    assert results[3].ok
+
+
+def test_as_completed():
+    async def collect():
+        return [result.index async for result in
+                analyse_batch(['а' * 20, 'а'], client=_SlowClient(), ordered=False)]
+    assert asyncio.run(collect()) == [1, 0]
+
+
+def test_input_is_read_lazily():
+    consumed = []
+
+    def sentences():
+        for i in range(20):
+            consumed.append(i)
+            yield 'а' * (i % 3 + 1)
+
+    async def collect(ordered):
+        consumed.clear()
+        indices = []
+        async for result in analyse_batch(sentences(), client=_SlowClient(), concurrency=2,
+                                          ordered=ordered):
+            # two tasks in flight, two more may have been started after they finished
+            assert len(consumed) <= len(indices) + 4
+            indices.append(result.index)
+        return indices
+    assert asyncio.run(collect(True)) == list(range(20))
+    assert sorted(asyncio.run(collect(False))) == list(range(20))
+
+
+class _OwnedClient(_SlowClient):
+    """Client recording requests which are running when it is closed"""
+    instances = []
+
+    def __init__(self, pool_size):
+        self.running = 0
+        self.running_on_close = None
+        _OwnedClient.instances.append(self)
+
+    def request_syntax_analysis(self, sentence, old_format=False):
+        self.running += 1
+        try:
+            return super().request_syntax_analysis(sentence, old_format)
+        finally:
+            self.running -= 1
+
+    def close(self):
+        self.running_on_close = self.running
+
+
+def test_owned_client_closed_after_requests(monkeypatch):
+    monkeypatch.setattr('krasoteevo.batch.SyntaxClient', _OwnedClient)
+
+    async def take_first():
+        results = analyse_batch(['а', 'а' * 20, 'а' * 20], concurrency=3)
+        async for result in results:
+            await results.aclose()
+            return result.index
+    assert asyncio.run(take_first()) == 0
+    assert _OwnedClient.instances[-1].running_on_close == 0
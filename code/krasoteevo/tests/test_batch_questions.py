@@ -0,0 +1,67 @@
+"""Tests for batch_questions module"""
+import gc
+import io
+import random
+import time
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+import batch_questions
+from batch_questions import Job, _windowed_map, generate_questions, json_jobs, main, \
+    process_job
+
+
+def test_json_jobs():
+    lines = ['"Мама мыла раму."', '', '{"sentence": "Папа спит.", "key": "a"}',
+             '{"sentence"', '[1, 2]', '{"key": 7}', '{"tokens": [], "sentence": "."}']
+    jobs = list(json_jobs(io.StringIO('\n'.join(lines))))
+    assert [job.key for job in jobs] == [1, 'a', 4, 5, 6, 7]
+    assert jobs[0].source == 'Мама мыла раму.' and jobs[1].source == 'Папа спит.'
+    assert jobs[5].source == {'tokens': [], 'sentence': '.'}
+    results = [process_job(job) for job in jobs[2:4]]
+    assert [result['key'] for result in results] == [4, 5]
+    assert results[0]['error'].startswith('JSONDecodeError')
+    assert results[1]['error'].startswith('ValueError')
+    assert all(not result['questions'] for result in results)
+
+
+@pytest.mark.parametrize('option', ['--window', '--flush-every', '--chunksize', '-j', '--limit'])
+def test_non_positive_options(option, capsys):
+    with pytest.raises(SystemExit):
+        main(['--sentences', '-', option, '0'])
+    assert 'is not a positive integer' in capsys.readouterr().err
+
+
+def _echo(job):
+    time.sleep(random.random() * 0.002)
+    return {'key': job.key}
+
+
+def test_windowed_map(monkeypatch):
+    """Results are in order of jobs and no more than `window` jobs are taken in advance"""
+    monkeypatch.setattr(batch_questions, 'process_job', _echo)
+    taken = 0
+
+    def jobs():
+        nonlocal taken
+        for number in range(100):
+            taken += 1
+            yield Job(number, '')
+
+    window = 7
+    keys = []
+    with ThreadPool(4) as pool:
+        for result in _windowed_map(pool, jobs(), chunksize=3, window=window):
+            assert taken - len(keys) <= window
+            keys.append(result['key'])
+    assert keys == list(range(100))
+
+
+def test_pool_unfreezes_gc(monkeypatch):
+    """Objects of the parent are frozen only while the pool is alive"""
+    monkeypatch.setattr(batch_questions, '_init_worker', lambda backend_mode=None: None)
+    jobs = [Job(number, ValueError('broken input')) for number in range(3)]
+    results = list(generate_questions(jobs, processes=2))
+    assert [result['key'] for result in results] == [0, 1, 2]
+    assert gc.get_freeze_count() == 0
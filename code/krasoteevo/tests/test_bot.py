@@ -0,0 +1,107 @@
+"""Tests for bot module"""
+import asyncio
+import threading
+
+from bot import FAIL_MESSAGE, QuestionService, RateLimiter
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(capacity=2, period=10.0, max_keys=2)
+    assert [limiter.allow('a', now=0.0) for _ in range(3)] == [True, True, False]
+    assert limiter.allow('b', now=0.0)
+    assert not limiter.allow('a', now=4.0)
+    assert limiter.allow('a', now=5.0)
+    # the full bucket of 'b' is forgotten when the third key comes
+    assert limiter.allow('c', now=20.0)
+    assert len(limiter) == 1
+
+
+def test_rate_limiter_many_active_keys():
+    limiter = RateLimiter(capacity=2, period=10.0, max_keys=100)
+    for step in range(1000):
+        assert limiter.allow(step, now=step * 0.001)
+        assert len(limiter) <= 100
+    # active keys which are not the oldest ones keep their buckets
+    assert limiter.allow(999, now=1.0)
+    assert not limiter.allow(999, now=1.0)
+
+
+class _Service(QuestionService):
+    """Service answering with the text itself, texts starting with 'wait' block until
+    `release` is set"""
+
+    def __init__(self, **kwargs):
+        super().__init__(analyzer=None, **kwargs)
+        self.release = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self.finished = []
+        self._lock = threading.Lock()
+
+    def answer(self, text, cancelled=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if text.startswith('wait'):
+                self.release.wait(5)
+            return [text]
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.finished.append((text, cancelled is not None and cancelled.is_set()))
+
+
+class _Replies(list):
+    async def __call__(self, text):
+        self.append(text)
+
+
+def test_busy():
+    async def run():
+        service = _Service(workers=1, queue_size=1)
+        replies = _Replies()
+        assert not service.submit('before start', replies)
+        await service.start()
+        assert service.submit('first', replies)
+        assert not service.submit('second', replies)
+        await service.drain()
+        assert not service.submit('after drain', replies)
+        return replies
+    assert asyncio.run(run()) == ['first']
+
+
+def test_timeout():
+    """Timed out text is cancelled, other texts wait until its thread is free"""
+    async def run():
+        service = _Service(workers=1, queue_size=4, timeout=0.05)
+        replies = _Replies()
+        await service.start()
+        assert service.submit('wait', replies)
+        assert service.submit('next', replies)
+        while not replies:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        # the worker gave up waiting, but the thread is still busy
+        assert replies == [FAIL_MESSAGE] and service.finished == []
+        service.release.set()
+        await service.drain(1.0)
+        return service, replies
+    service, replies = asyncio.run(run())
+    assert replies == [FAIL_MESSAGE, 'next']
+    assert service.finished == [('wait', True), ('next', False)]
+    assert service.max_running == 1
+
+
+def test_drain():
+    async def run():
+        service = _Service(workers=2, queue_size=8)
+        replies = _Replies()
+        await service.start()
+        for index in range(6):
+            assert service.submit(str(index), replies)
+        await service.drain()
+        return service, replies
+    service, replies = asyncio.run(run())
+    assert sorted(replies) == [str(index) for index in range(6)]
+    assert service.pending == 0 and service.max_running <= 2
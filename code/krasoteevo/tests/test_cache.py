@@ -0,0 +1,114 @@
+"""Tests for krasoteevo.cache module"""
+import os
+import threading
+import time
+
+import pytest
+import pytest_cases
+import requests
+
+from krasoteevo.cache import ResponseCache, cache_key
+from krasoteevo.sentence_graph import SentenceGraph
+from krasoteevo.tests.cases import case_sentence_1
+
+
+def test_key_normalization():
+    assert cache_key('Ваня  идёт\tгулять.') == cache_key(' Ваня идёт гулять. ')
+    assert cache_key('Ваня идёт гулять.') != cache_key('Ваня идёт гулять.', old_format=True)
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_disk_tier(sentence, json_obj, tmp_path):
+    ResponseCache(tmp_path).put(sentence, json_obj, old_format=True)
+    cache = ResponseCache(tmp_path)
+    assert cache.get(sentence) is None
+    assert cache.get(sentence, old_format=True) == json_obj
+    assert cache.get(sentence, old_format=True) == json_obj
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.hits == 2 and cache.misses == 1
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_graph_from_cache(sentence, json_obj):
+    cache = ResponseCache()
+    cache.put(sentence, json_obj, old_format=True)
+    graph = SentenceGraph(sentence, cache=cache)
+    assert graph['json'] == json_obj
+    assert cache.misses == 0
+
+
+def test_eviction(tmp_path):
+    cache = ResponseCache(tmp_path, memory_size=2, max_entries=10)
+    for i in range(15):
+        cache.put(str(i), {'sentence': str(i)})
+    assert len(list(tmp_path.glob('*.json'))) <= 10
+    assert cache.stats()['memory_entries'] == 2
+    assert cache.get('14') == {'sentence': '14'}
+
+
+def test_max_age(tmp_path):
+    ResponseCache(tmp_path).put('1', {'sentence': '1'})
+    path = next(tmp_path.glob('*.json'))
+    old = time.time() - 100
+    os.utime(path, (old, old))
+    assert ResponseCache(tmp_path, max_age=10).get('1') is None
+    assert not path.exists()
+
+
+class _Response:
+    def __init__(self, status_code, json_obj):
+        self.status_code = status_code
+        self.json_obj = json_obj
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error')
+
+    def json(self):
+        return self.json_obj
+
+
+class _Client:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def request_syntax_analysis(self, sentence, old_format=False):
+        return self.responses[sentence]
+
+
+def test_request_errors_are_not_cached(tmp_path):
+    sentence, json_obj = case_sentence_1()
+    client = _Client({'Ошибка.': _Response(500, {'error': 'Internal error'}),
+                      'Пусто.': _Response(200, {'error': 'Bad request'}),
+                      sentence: _Response(200, json_obj)})
+    cache = ResponseCache(tmp_path, client=client)
+    with pytest.raises(requests.HTTPError):
+        cache.request('Ошибка.')
+    with pytest.raises(ValueError):
+        cache.request('Пусто.')
+    assert cache.request(sentence) == json_obj
+    assert cache.get('Ошибка.') is None and cache.get('Пусто.') is None
+    assert len(list(tmp_path.glob('*.json'))) == 1
+
+
+def test_graph_client_passed_to_cache():
+    sentence, json_obj = case_sentence_1()
+    cache = ResponseCache(client=_Client({}))
+    client = _Client({sentence: _Response(200, json_obj)})
+    graph = SentenceGraph(sentence, cache=cache, client=client)
+    assert graph['json'] == json_obj
+    assert cache.get(sentence, old_format=True) == json_obj
+
+
+def test_concurrent_writes(tmp_path):
+    cache = ResponseCache(tmp_path, max_entries=None)
+
+    def put(start):
+        for i in range(start, start + 50):
+            cache.put(str(i), {'sentence': str(i)})
+    threads = [threading.Thread(target=put, args=(start,)) for start in range(0, 200, 50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()['disk_entries'] == len(list(tmp_path.glob('*.json'))) == 200
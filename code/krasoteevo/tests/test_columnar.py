@@ -0,0 +1,43 @@
+"""Tests for krasoteevo.columnar module"""
+import pytest_cases
+
+from krasoteevo.columnar import ColumnarCorpus
+from krasoteevo.examples import get_example_json
+from krasoteevo.sentence_graph import SentenceGraph
+
+
+def _describe(graph: SentenceGraph):
+    vertices = [(v['token'], v['is_word'],
+                 [(mi.word, mi.normal_form, mi.grammemes) for mi in v['morph_info_list'] or []])
+                for v in graph.vs]
+    edges = sorted((e.source, e.target, e['type']) for e in graph.es)
+    return graph['sentence'], vertices, edges
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_old_format(sentence, json_obj):
+    corpus = ColumnarCorpus()
+    columnar = corpus.add(json_obj)
+    assert columnar.sentence == sentence
+    assert columnar.tokens == json_obj['tokens']
+    assert _describe(columnar.graph()) == _describe(SentenceGraph(json_obj))
+
+
+def test_new_format():
+    corpus = ColumnarCorpus().extend(get_example_json(number) for number in range(20))
+    assert len(corpus) == 20
+    for number, columnar in enumerate(corpus):
+        json_obj = get_example_json(number)
+        assert not columnar.old_format
+        assert _describe(columnar.graph()) == _describe(SentenceGraph(json_obj))
+        edge_types = [corpus.edge_types[code] for code in columnar.edge_types.tolist()]
+        assert set(zip(columnar.heads.tolist(), columnar.dependents.tolist(), edge_types)) == \
+            {(item['head_i'], item['dependent_i'], item['dep_type']) for item in json_obj['synts']}
+        first = columnar.first_homonyms
+        assert all((first[i] < 0) != columnar.is_word[i] for i in range(len(columnar)))
+
+
+def test_keep_json():
+    json_obj = get_example_json(0)
+    corpus = ColumnarCorpus(keep_json=True)
+    assert corpus.add(json_obj).to_json() is json_obj
@@ -0,0 +1,51 @@
+"""Tests for benchmarks.corpus module"""
+import argparse
+
+import pytest
+
+from benchmarks.corpus import _percentile, compare, summarize
+from krasoteevo.examples import example_range
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert _percentile(samples, 50) == 50
+    assert _percentile(samples, 95) == 95
+    assert _percentile(samples, 99) == 99
+    assert _percentile([3.0], 99) == 3.0
+    assert _percentile([], 50) == 0.0
+
+
+def test_summarize():
+    summary = summarize([0.004, 0.001, 0.003, 0.002])
+    assert summary['count'] == 4
+    assert summary['total_s'] == pytest.approx(0.01)
+    assert summary['throughput'] == pytest.approx(400)
+    assert summary['mean_ms'] == pytest.approx(2.5)
+    assert summary['p50_ms'] == pytest.approx(2)
+    assert summary['p99_ms'] == pytest.approx(4)
+    assert summarize([])['throughput'] == 0.0
+
+
+def _results(**stages):
+    return {'stages': {stage: {'p50_ms': p50, 'p95_ms': p50 * 2}
+                       for stage, p50 in stages.items()}}
+
+
+def test_compare():
+    baseline = _results(render=1.0, layout=2.0)
+    assert compare(_results(render=1.1, layout=1.0), baseline, threshold=0.2) == []
+    regressions = compare(_results(render=1.3, layout=2.0, new_stage=5.0), baseline,
+                          threshold=0.2)
+    assert len(regressions) == 2
+    assert all(regression.startswith('render p') for regression in regressions)
+    assert compare(_results(render=1.3), baseline, threshold=0.5) == []
+    assert compare(_results(render=1.0), _results(render=0.0)) == []
+
+
+def test_example_range():
+    assert example_range('10:20') == (10, 20)
+    assert example_range(':5') == (0, 5)
+    assert example_range('3:') == (3, None)
+    with pytest.raises(argparse.ArgumentTypeError):
+        example_range('a:b')
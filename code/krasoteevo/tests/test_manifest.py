@@ -0,0 +1,27 @@
+"""Tests for krasoteevo.examples.manifest module"""
+import shutil
+
+from krasoteevo.examples import get_example_filename
+from krasoteevo.examples.manifest import Manifest, _dir_path as examples_path
+
+
+def test_build_and_select(tmp_path):
+    for number in range(5):
+        name = get_example_filename(number)
+        shutil.copy(examples_path / name, tmp_path / name)
+    manifest = Manifest(path=tmp_path / 'manifest.json').update(range(6), directory=tmp_path)
+    assert len(manifest) == 5
+    entry = manifest[0]
+    assert entry['tokens'] == 14
+    assert entry['pos']['ПРИЧ'] == 1
+    assert 'предик' in entry['edge_types']
+    assert 0 in manifest.select(pos=['ПРИЧ', 'ДЕЕПР'], edge_types=['предик'], min_tokens=14)
+    assert manifest.select(max_tokens=1) == []
+    assert manifest.select(where=lambda item: item['sentence'] == entry['sentence']) == [0]
+
+    manifest.save()
+    assert Manifest.load(tmp_path / 'manifest.json').entries == manifest.entries
+
+    (tmp_path / get_example_filename(4)).unlink()
+    manifest.update([4], fetched_at=1.0, directory=tmp_path)
+    assert 4 not in manifest
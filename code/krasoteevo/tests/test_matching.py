@@ -0,0 +1,75 @@
+"""Tests for matching module"""
+import pytest
+import pytest_cases
+
+from benchmarks.matching_scaling import deep_case, greedy_trap, synthetic_graph, wide_case
+from krasoteevo.sentence_graph import SentenceGraph
+from matching import Node, PatternSet, TreeMatcher
+from predicates import TIME_PATTERNS, find_time_constructions
+
+
+def test_greedy_trap():
+    """Bipartite assignment finds the match which greedy assignment misses"""
+    graph, pattern = greedy_trap()
+    assert TreeMatcher(graph).match(pattern, 0)
+    assert pattern.match(graph.vs[0])
+
+
+def test_scaling_cases():
+    graph, pattern, vertex, expected = wide_case(12)
+    assert TreeMatcher(graph).match(pattern, vertex) == expected
+    graph, pattern, _, _ = deep_case(12)
+    matcher = TreeMatcher(graph)
+    assert sum(matcher.match(pattern, index) for index in range(graph.vcount())) == 12 - 4
+
+
+def test_collected_patterns():
+    """Results of collected patterns are not returned for new patterns with the same id"""
+    graph = synthetic_graph(['root'], [])
+    matcher = TreeMatcher(graph)
+    for _ in range(100):
+        assert matcher.match(Node(white_list='root'), 0)
+        assert not matcher.match(Node(white_list='zzz'), 0)
+
+
+def _match_one_by_one(patterns: PatternSet, graph):
+    """Matching without the index: every pattern is checked against every vertex"""
+    return [(name, vertex.index) for vertex in graph.vs
+            for name, pattern in patterns._patterns.items() if pattern.match(vertex)]  # noqa
+
+
+TIME_GRAPHS = {
+    'in_time_unit': (['в', 'следующий', 'год'], [(0, 2), (2, 1)], ['PR', 'A', 'S']),
+    'in_time_unit_without_adjective': (['в', 'год'], [(0, 1)], ['PR', 'S']),
+    'by_time_unit': (['к', 'пять', 'час'], [(0, 1), (0, 2)], ['PR', 'NUM', 'S']),
+    'during_time_unit': (['за', 'неделя'], [(0, 1)], ['PR', 'S']),
+    'during_not_preposition': (['за', 'неделя'], [(0, 1)], ['S', 'S']),
+    'before_event': (['перед', 'сон', 'перед', 'ужин'], [(0, 1), (2, 3)], ['PR', 'S', 'PR', 'S']),
+    'before_common_era': (['до', 'наш', 'эра'], [(0, 2), (2, 1), (0, 1)], ['PR', 'A', 'S']),
+    'before_common_era_nested': (['до', 'наш', 'эра'], [(0, 2), (2, 1)], ['PR', 'A', 'S']),
+}
+
+
+@pytest.mark.parametrize('name', TIME_GRAPHS)
+def test_time_patterns(name):
+    """Indexed matching finds the same constructions as patterns checked one by one"""
+    graph = synthetic_graph(*TIME_GRAPHS[name])
+    assert find_time_constructions(graph) == _match_one_by_one(TIME_PATTERNS, graph)
+
+
+def test_time_patterns_found():
+    graph = synthetic_graph(*TIME_GRAPHS['before_event'])
+    assert find_time_constructions(graph) == [('before_event', 0), ('before_event', 2)]
+    assert find_time_constructions(synthetic_graph(*TIME_GRAPHS['during_not_preposition'])) == []
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_grammeme_index(sentence, json_obj):
+    """Patterns without lemmas are selected by grammemes of the root"""
+    patterns = PatternSet().add('any', Node()).add('preposition', Node(grammemes='PREP')) \
+        .add('pronoun', Node(grammemes='NPRO')).add('past', Node(grammemes=('VERB', 'past'))) \
+        .add('past_with_child', Node(grammemes=('VERB', 'past')).children(Node())) \
+        .add('verb', Node(grammemes='VERB', black_list='быть'))
+    graph = SentenceGraph(json_obj)
+    assert TIME_PATTERNS.match(graph) == _match_one_by_one(TIME_PATTERNS, graph)
+    assert patterns.match(graph) == _match_one_by_one(patterns, graph)
@@ -0,0 +1,49 @@
+"""Tests for krasoteevo.metrics module"""
+import pytest
+import pytest_cases
+
+from krasoteevo import metrics
+from krasoteevo.cache import ResponseCache
+from krasoteevo.sentence_graph import SentenceGraph
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.registry.reset()
+    metrics.enable()
+    yield metrics.registry
+    metrics.disable()
+    metrics.registry.reset()
+
+
+def test_disabled():
+    metrics.registry.reset()
+    metrics.count('requests')
+    with metrics.span('graph'):
+        pass
+    assert metrics.snapshot()['counters'] == [] and metrics.snapshot()['histograms'] == []
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_graph_metrics(sentence, json_obj, enabled_metrics):
+    cache = ResponseCache()
+    cache.put(sentence, json_obj, old_format=True)
+    SentenceGraph(sentence, cache=cache)
+    assert enabled_metrics.counters[('response_cache_total', (('result', 'memory'),))] == 1
+    tokens = enabled_metrics.histograms[('sentence_tokens', ())]
+    assert tokens.count == 1 and tokens.sum == len(json_obj['tokens'])
+    assert enabled_metrics.histograms[('stage_seconds', (('stage', 'graph'),))].count == 1
+
+
+def test_prometheus(enabled_metrics):
+    metrics.count('syntax_requests_total', labels={'format': 'new'})
+    metrics.observe('questions_per_sentence', 4)
+    with pytest.raises(ValueError):
+        with metrics.span('questions'):
+            raise ValueError
+    text = metrics.to_prometheus()
+    assert 'krasoteevo_syntax_requests_total{format="new"} 1\n' in text
+    assert 'krasoteevo_questions_per_sentence_bucket{le="3"} 0\n' in text
+    assert 'krasoteevo_questions_per_sentence_bucket{le="5"} 1\n' in text
+    assert 'krasoteevo_stage_errors_total{stage="questions"} 1\n' in text
+    assert '# TYPE krasoteevo_stage_seconds histogram\n' in text
@@ -0,0 +1,34 @@
+"""Tests for krasoteevo.examples.packed module"""
+import pytest
+
+from krasoteevo.examples import get_example_json
+from krasoteevo.examples.packed import PackedCorpus, build_pack
+
+
+def test_roundtrip(tmp_path):
+    json_objects = [get_example_json(number) for number in range(10)]
+    path = tmp_path / 'test.pack'
+    assert build_pack(json_objects, path=path, source_mtime_ns=1) == 10
+    with PackedCorpus(path) as pack:
+        assert len(pack) == 10
+        assert pack.source_mtime_ns == 1
+        assert pack[3] == json_objects[3]
+        assert list(pack) == json_objects
+        with pytest.raises(IndexError):
+            pack.raw(10)
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'test.pack'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        PackedCorpus(path)
+
+
+@pytest.mark.parametrize('size', [0, 10, 30, 100])
+def test_truncated_file(tmp_path, size):
+    path = tmp_path / 'test.pack'
+    build_pack([get_example_json(number) for number in range(3)], path=path)
+    path.write_bytes(path.read_bytes()[:size])
+    with pytest.raises(ValueError):
+        PackedCorpus(path)
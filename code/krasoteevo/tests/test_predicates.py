@@ -0,0 +1,37 @@
+"""Tests for predicates module"""
+import pytest
+from pymorphy2 import MorphAnalyzer
+
+from predicates import FEELING, FEELING_VERBS, MOVE, MOVE_VERBS, cut_affix, verb_lexicon
+
+
+class _Analyzer:
+    def __init__(self, known_words):
+        self.known_words = known_words
+
+    def word_is_known(self, word):
+        return word in self.known_words
+
+
+def test_cut_affix():
+    analyzer = _Analyzer({'бежать', 'жать'})
+    assert cut_affix('прибежаться', analyzer=analyzer) == 'бежать'
+    assert cut_affix('прибежать', analyzer=analyzer, prefixes=['при', 'бе']) == 'жать'
+    assert cut_affix('прибежать', analyzer=analyzer, prefixes=iter(['при'])) == 'бежать'
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return MorphAnalyzer()
+
+
+@pytest.mark.parametrize('verbs, verb_class', [(MOVE_VERBS, MOVE), (FEELING_VERBS, FEELING)])
+def test_base_verbs_classes(verbs, verb_class, analyzer):
+    assert {verb: verb_lexicon.classify(verb, analyzer) for verb in verbs} == \
+        {verb: verb_class for verb in verbs}
+
+
+def test_reflexive_derivatives(analyzer):
+    assert verb_lexicon.classify('возрадоваться', analyzer) == FEELING
+    assert verb_lexicon.classify('испугать', analyzer) == FEELING
+    assert verb_lexicon.classify('прибежать', analyzer) == MOVE
@@ -1,7 +1,14 @@
 """Tests for krasoteevo.request module"""
 import pytest_cases
+import pytest
+import requests
+from requests.adapters import BaseAdapter
 
-from krasoteevo.request import request_syntax_analysis
+from krasoteevo.request import (
+    request_syntax_analysis,
+    SyntaxClient,
+    EmptySentenceException,
+    TooLongSentenceException)
 
 
 @pytest_cases.parametrize_with_cases(['sentence', 'expected'], cases='krasoteevo.tests.cases')
@@ -9,3 +16,41 @@ def test_syntax_analysis_request(sentence, expected):
     """Test function 'request' in module 'krasoteevo.request'"""
     response = request_syntax_analysis(sentence)
     assert expected == response.json()
+
+
+def test_sentence_checks():
+    """Invalid sentences are rejected before any request is sent"""
+    client = SyntaxClient(connect_timeout=1, read_timeout=2)
+    assert client.timeout == (1, 2)
+    with pytest.raises(EmptySentenceException):
+        request_syntax_analysis('', client=client)
+    with pytest.raises(TooLongSentenceException):
+        client.request_syntax_analysis('а' * 301)
+
+
+class _RecordingAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.verify = []
+
+    def send(self, request, **kwargs):
+        self.verify.append(kwargs['verify'])
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_certificate_is_not_verified(monkeypatch, tmp_path):
+    """Environment variables with CA bundles don't turn verification on"""
+    monkeypatch.setenv('REQUESTS_CA_BUNDLE', str(tmp_path / 'bundle.pem'))
+    monkeypatch.setenv('CURL_CA_BUNDLE', str(tmp_path / 'bundle.pem'))
+    client = SyntaxClient()
+    adapter = _RecordingAdapter()
+    client.session.mount('https://', adapter)
+    client.request_syntax_analysis('Ваня идёт гулять.', old_format=True)
+    client.request_syntax_analysis('Ваня идёт гулять.')
+    assert adapter.verify == [False, False]
@@ -0,0 +1,61 @@
+"""Tests for krasoteevo.ruscorpora module"""
+import io
+
+from krasoteevo.columnar import ColumnarCorpus
+from krasoteevo.examples.packed import PackedCorpus, build_pack
+from krasoteevo.ruscorpora import convert_feat, iter_ruscorpora, iter_ruscorpora_graphs
+
+XML = '''<?xml version="1.0" encoding="windows-1251"?>
+<sentences>
+<S ID="1">
+<W DOM="2" FEAT="S ЕД МУЖ ИМ ОД" ID="1" LEMMA="ВАНЯ" LINK="предик">Ваня</W>
+<W DOM="_root" FEAT="V НЕСОВ ИЗЪЯВ НЕПРОШ ЕД 3-Л" ID="2" LEMMA="ИДТИ">идёт</W>
+<W DOM="2" FEAT="V НЕСОВ ИНФ" ID="3" LEMMA="ГУЛЯТЬ" LINK="обст">гулять</W>.
+</S>
+<S ID="2">
+<W DOM="2" FEAT="S ЕД ЖЕН ИМ ОД" ID="1" LEMMA="МАМА" LINK="предик">Мама</W> —
+<W DOM="_root" FEAT="V НЕСОВ ИЗЪЯВ НЕПРОШ ЕД 3-Л" ID="2" LEMMA="ИДТИ" NODETYPE="FANTOM"/>
+<W DOM="2" FEAT="PR" ID="3" LEMMA="В" LINK="2-компл">в</W>
+<W DOM="3" FEAT="S ЕД СРЕД ВИН НЕОД" ID="4" LEMMA="КИНО" LINK="предл">кино</W>!
+</S>
+</sentences>
+'''.encode('cp1251')
+
+
+def test_convert_feat():
+    assert convert_feat('S ЕД СРЕД ВИН НЕОД') == 'S ЕД СР ВИН НЕОД'
+    assert convert_feat('A ЕД МУЖ ИМ СЛ') == 'A ЕД МУЖ ИМ'
+
+
+def test_iter_ruscorpora():
+    first, second = iter_ruscorpora(io.BytesIO(XML))
+    assert first['sentence'] == 'Ваня идёт гулять.'
+    assert first['tokens'] == ['Ваня', 'идёт', 'гулять', '.']
+    assert first['morphs'][1]['homonyms'][0]['lexem'] == 'идти'
+    assert not first['morphs'][3]['homonyms'][0]['active']
+    assert {(item['head_i'], item['dependent_i'], item['dep_type'])
+            for item in first['synts']} == {(1, 0, 'предик'), (1, 2, 'обст')}
+
+    assert second['sentence'] == 'Мама — в кино!'
+    assert second['tokens'] == ['Мама', '—', 'в', 'кино', '!']
+    # the phantom verb is dropped, the preposition loses its head
+    assert {(item['head_i'], item['dependent_i'], item['dep_type'])
+            for item in second['synts']} == {(2, 3, 'предл')}
+
+
+def test_graphs():
+    graph = next(iter_ruscorpora_graphs(io.BytesIO(XML)))
+    assert graph.vs['is_word'] == [True, True, True, False]
+    assert graph.adjacency.children(1, 'обст') == [2]
+    assert graph.vs[0]['morph_info_list'][0].grammemes == 'S ЕД МУЖ ИМ ОД'
+
+
+def test_formats(tmp_path):
+    json_objects = list(iter_ruscorpora(io.BytesIO(XML)))
+    path = tmp_path / 'corpus.pack'
+    assert build_pack(iter_ruscorpora(io.BytesIO(XML)), path=path) == 2
+    with PackedCorpus(path) as pack:
+        assert list(pack) == json_objects
+    corpus = ColumnarCorpus().extend(iter_ruscorpora(io.BytesIO(XML)))
+    assert corpus[1].tokens == json_objects[1]['tokens']
+    assert list(corpus[0].is_word) == [True, True, True, False]
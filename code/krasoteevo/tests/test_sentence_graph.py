@@ -20,6 +20,24 @@ def test_json(sentence, json_obj):
     assert graph['sentence'] == sentence
     assert graph['json'] == json_obj
 
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_adjacency(sentence, json_obj):
+    graph = SentenceGraph(json_obj)
+    adjacency = graph.adjacency
+    for vertex in graph.vs:
+        children = [edge.target for edge in vertex.out_edges()]
+        assert adjacency.children(vertex.index) == list(dict.fromkeys(children))
+        for edge in vertex.out_edges():
+            assert edge.target in adjacency.children(vertex.index, edge['type'])
+            assert edge['type'] in adjacency.edge_types(vertex.index)
+        parents = [edge.source for edge in vertex.in_edges()]
+        assert adjacency.parent(vertex.index) == (parents[0] if parents else None)
+        morph_info_list = vertex['morph_info_list']
+        assert adjacency.first_homonym(vertex.index) is \
+            (morph_info_list[0] if morph_info_list else None)
+    assert graph.copy().adjacency.children(0) == adjacency.children(0)
+
 #
 # @pytest_cases.parametrize_with_cases(['sentence', 'expected_json_obj'],
 #                                      cases='krasoteevo.tests.cases')
@@ -0,0 +1,83 @@
+"""Tests for snapshot module"""
+import json
+
+import pytest
+from pymorphy2 import MorphAnalyzer
+
+from parse_proxy import choose_parse, parse_cache
+from parse_proxy.question_type import QuestionType as QType
+from snapshot import load_snapshot, save_snapshot
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    analyzer = MorphAnalyzer()
+    QType.init(analyzer)
+    return analyzer
+
+
+@pytest.fixture
+def snapshot_path(analyzer, tmp_path):
+    choose_parse(word='стали', tag='VERB', normal_form='стать', analyzer=analyzer)
+    path = tmp_path / 'snapshot.json'
+    save_snapshot(analyzer, path)
+    return path
+
+
+def _forms():
+    return {item: (str(item._parse.tag), {grammemes: form.word  # noqa
+                                          for grammemes, form in item.forms.items()})
+            for item in QType}
+
+
+def _rewrite(path, change):
+    snapshot = json.loads(path.read_text(encoding='utf-8'))
+    change(snapshot)
+    path.write_text(json.dumps(snapshot, ensure_ascii=False), encoding='utf-8')
+
+
+def test_round_trip(analyzer, snapshot_path):
+    forms = _forms()
+    entries = _parse_cache_entries()
+    parse_cache.clear()
+    assert load_snapshot(analyzer, snapshot_path)
+    assert _forms() == forms
+    assert _parse_cache_entries() == entries and entries
+
+
+def _parse_cache_entries():
+    return {key: str(getattr(parse, 'tag', parse)) for key, parse in parse_cache.items()}
+
+
+def test_fingerprint_mismatch(analyzer, snapshot_path, monkeypatch):
+    _rewrite(snapshot_path, lambda snapshot: snapshot.update(fingerprint='other'))
+    monkeypatch.setattr(QType, 'restore', _fail)
+    assert not load_snapshot(analyzer, snapshot_path)
+
+
+def _fail(*_args):
+    raise AssertionError('nothing must be restored')
+
+
+@pytest.mark.parametrize('change', [
+    lambda snapshot: snapshot['parses'].append(['слово', 'NOUN']),
+    lambda snapshot: snapshot['inflections'].append(['слово', 'слово', 'NOUN', [], [0]]),
+    lambda snapshot: snapshot['parses'].append(
+        ['слово', 'NOUN', 'слово', ['слово', 'NOUN', 'слово', 1.0, [[10 ** 6]]]]),
+    lambda snapshot: snapshot.update(question_types=[]),
+    lambda snapshot: snapshot.update(verb_classes=[1, 2]),
+], ids=['parse', 'inflection', 'unit', 'question_types', 'verb_classes'])
+def test_malformed(analyzer, snapshot_path, monkeypatch, change):
+    """Malformed snapshot is rejected before anything is restored"""
+    _rewrite(snapshot_path, change)
+    monkeypatch.setattr(QType, 'restore', _fail)
+    size = len(parse_cache.items())
+    assert not load_snapshot(analyzer, snapshot_path)
+    assert len(parse_cache.items()) == size
+
+
+def test_unreadable(analyzer, tmp_path):
+    assert not load_snapshot(analyzer, tmp_path / 'missing.json')
+    assert not load_snapshot(analyzer, tmp_path)  # IsADirectoryError
+    (tmp_path / 'list.json').write_text('[]')
+    assert not load_snapshot(analyzer, tmp_path / 'list.json')
@@ -0,0 +1,84 @@
+"""Tests for krasoteevo.text module"""
+import asyncio
+import json
+
+import pytest
+
+from krasoteevo.cache import ResponseCache
+from krasoteevo.tests.cases import case_sentence_1, case_sentence_2, case_sentence_3
+from krasoteevo.text import split_text, stream_sentence_graphs
+
+
+def test_split_sentences():
+    text = 'Маша и Петя любили зверей, и мама отвела их в зоопарк.  Ваня идёт гулять.'
+    assert split_text(text) == ['Маша и Петя любили зверей, и мама отвела их в зоопарк.',
+                                'Ваня идёт гулять.']
+
+
+def test_split_long_sentence():
+    sentence = ', '.join(['очень длинное перечисление слов'] * 20) + '.'
+    chunks = split_text(sentence, max_length=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith((',', '.')) for chunk in chunks)
+    assert ' '.join(chunks) == sentence
+
+
+def test_split_long_word():
+    chunks = split_text('а' * 250, max_length=100)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+
+def test_stream_from_cache():
+    cache = ResponseCache()
+    sentences = []
+    for sentence, json_obj in (case_sentence_2(), case_sentence_3()):
+        cache.put(sentence, json_obj, old_format=True)
+        sentences.append(sentence)
+
+    async def collect():
+        return [(graph['index'], graph['sentence'])
+                async for graph in stream_sentence_graphs(' '.join(sentences), cache=cache)]
+    assert sorted(asyncio.run(collect())) == list(enumerate(sentences))
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _Client:
+    def __init__(self, answers):
+        self.answers = answers
+        self.requests = []
+
+    def request_syntax_analysis(self, sentence, old_format=False):
+        self.requests.append(sentence)
+        return _Response(self.answers[sentence])
+
+
+def test_stream_failures():
+    """Failed sentences are skipped with warnings, other sentences are yielded"""
+    (cached, cached_json), (parsed, parsed_json), (broken, broken_json) = \
+        case_sentence_1(), case_sentence_2(), case_sentence_3()
+    cache = ResponseCache()
+    cache.put(cached, cached_json, old_format=True)
+    del broken_json['tokens']
+    client = _Client({parsed: json.dumps(parsed_json), broken: json.dumps(broken_json),
+                      'Ошибка сервиса.': '<html>502 Bad Gateway</html>'})
+    text = ' '.join([cached, 'Ошибка сервиса.', parsed, broken])
+
+    async def collect():
+        return [graph['index'] async for graph in
+                stream_sentence_graphs(text, client=client, cache=cache)]
+    with pytest.warns(UserWarning, match='is not parsed'):
+        assert sorted(asyncio.run(collect())) == [0, 2]
+    assert sorted(client.requests) == sorted([parsed, broken, 'Ошибка сервиса.'])
+    # only correct results are cached
+    assert cache.get(parsed, old_format=True) == parsed_json
+    assert cache.get(broken, old_format=True) is None
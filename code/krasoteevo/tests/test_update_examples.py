@@ -0,0 +1,120 @@
+"""Tests for krasoteevo.examples.update_examples function"""
+import json
+import shutil
+
+import pytest
+import requests
+
+from krasoteevo.examples import CHECKPOINT_NAME, get_example_filename, update_examples
+from krasoteevo.examples.manifest import Manifest, _dir_path as examples_path
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _Client:
+    """Client answering with saved examples, sentences from `failing` are not answered"""
+
+    def __init__(self, answers, failing=()):
+        self.answers = answers
+        self.failing = set(failing)
+        self.requests = []
+
+    def request_syntax_analysis(self, sentence, old_format=False):
+        self.requests.append(sentence)
+        if sentence in self.failing:
+            raise requests.ConnectionError(sentence)
+        return _Response(self.answers[sentence])
+
+
+def _answers(count):
+    """
+    :return: dict from sentences of the first examples to contents of their files
+    """
+    answers = {}
+    for number in range(count):
+        text = (examples_path / get_example_filename(number)).read_text()
+        answers[json.loads(text)['sentence']] = text
+    return answers
+
+
+def _copy_examples(directory, count):
+    for number in range(count):
+        name = get_example_filename(number)
+        shutil.copy(examples_path / name, directory / name)
+    return _answers(count)
+
+
+def test_incremental(tmp_path):
+    answers = _copy_examples(tmp_path, 4)
+    sentences = list(answers)
+    Manifest(path=tmp_path / 'manifest.json').update(range(4), directory=tmp_path).save()
+    (tmp_path / get_example_filename(2)).write_text('{"sentence"')  # torn file
+
+    client = _Client(answers, failing=[sentences[1]])
+    summary = update_examples(only_new=False, client=client, max_age=3600, directory=tmp_path)
+    # the torn file has been fetched again, other files are fresh
+    assert summary.changed == [2] and summary.skipped == [0, 1, 3]
+
+    summary = update_examples(only_new=False, client=client, directory=tmp_path)
+    assert summary.failed_old == [1]
+    assert summary.unchanged == [0, 2, 3]
+    assert (tmp_path / CHECKPOINT_NAME).exists()
+
+    # the interrupted update is resumed, only the failed example is requested again
+    client = _Client(answers)
+    summary = update_examples(only_new=False, client=client, directory=tmp_path)
+    assert summary.resumed and client.requests == [sentences[1]]
+    assert summary.unchanged == [0, 1, 2, 3] and summary.failed_old == []
+    assert not (tmp_path / CHECKPOINT_NAME).exists()
+
+
+def test_new_sentences(tmp_path):
+    answers = _answers(2)
+    sentences = list(answers)
+    client = _Client(answers, failing=[sentences[0]])
+    summary = update_examples([(10, sentences[0]), (11, sentences[1])], client=client,
+                              directory=tmp_path)
+    assert summary.created == [0] and summary.failed_new == [10]
+    assert (tmp_path / get_example_filename(0)).read_text() == answers[sentences[1]]
+
+    summary = update_examples([(10, sentences[0]), (11, sentences[1])],
+                              client=_Client(answers), directory=tmp_path)
+    assert summary.resumed and summary.created == [0, 1]
+    assert (tmp_path / get_example_filename(1)).read_text() == answers[sentences[0]]
+    assert len(Manifest.load(tmp_path / 'manifest.json')) == 2
+
+
+class _InterruptingClient(_Client):
+    def request_syntax_analysis(self, sentence, old_format=False):
+        if sentence in self.failing:
+            raise KeyboardInterrupt
+        return super().request_syntax_analysis(sentence, old_format)
+
+
+def test_interrupted_import(tmp_path):
+    answers = _answers(4)
+    new_sentences = list(enumerate(answers))
+    client = _InterruptingClient(answers, failing=[new_sentences[3][1]])
+    with pytest.raises(KeyboardInterrupt):
+        update_examples(new_sentences, client=client, concurrency=1, directory=tmp_path)
+    assert (tmp_path / CHECKPOINT_NAME).exists()
+
+    client = _Client(answers)
+    summary = update_examples(new_sentences, client=client, directory=tmp_path)
+    assert summary.resumed and client.requests == [new_sentences[3][1]]
+    assert summary.created == [0, 1, 2, 3]
+    for index, sentence in new_sentences:
+        assert (tmp_path / get_example_filename(index)).read_text() == answers[sentence]
+    assert not (tmp_path / get_example_filename(4)).exists()
+    assert len(Manifest.load(tmp_path / 'manifest.json')) == 4
+
+
+def test_checkpoint_every():
+    with pytest.raises(ValueError):
+        update_examples(checkpoint_every=0)
@@ -0,0 +1,33 @@
+"""Tests for krasoteevo.visualization module"""
+import pytest
+import pytest_cases
+
+from krasoteevo.sentence_graph import SentenceGraph
+from krasoteevo.visualization import LayoutCache, edge_color, main, prepare_plot, structure_key
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_prepare_plot(sentence, json_obj):
+    graph = SentenceGraph(json_obj)
+    cache = LayoutCache()
+    copy, coords = prepare_plot(graph, cache)
+    assert len(coords) == copy.vcount()
+    assert copy.es['color'] == [edge_color(edge_type) for edge_type in copy.es['type']]
+    assert (cache.hits, cache.misses) == (0, 1)
+    _copy, cached_coords = prepare_plot(SentenceGraph(json_obj), cache)
+    assert cached_coords == coords
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest_cases.parametrize_with_cases(['sentence', 'json_obj'], cases='krasoteevo.tests.cases')
+def test_layout_cache_directory(sentence, json_obj, tmp_path):
+    copy, coords = prepare_plot(SentenceGraph(json_obj), LayoutCache(tmp_path))
+    cache = LayoutCache(tmp_path)
+    assert cache.get(structure_key(copy)) == [list(point) for point in coords]
+    assert cache.hits == 1
+
+
+def test_bad_examples_range(capsys):
+    with pytest.raises(SystemExit):
+        main(['--examples', 'a:b'])
+    assert 'is not a range START:STOP' in capsys.readouterr().err
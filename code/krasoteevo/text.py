@@ -0,0 +1,138 @@
+"""Functions to parse texts which consist of many sentences"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List
+from warnings import warn
+
+import pymorphy2
+from razdel import sentenize, tokenize
+
+from krasoteevo.cache import ResponseCache
+from krasoteevo.request import MAX_SENTENCE_LENGTH, SyntaxClient, check_sentence
+from krasoteevo.sentence_graph import SentenceGraph
+
+_BREAK_TOKENS = frozenset({',', ';', ':', '—', '–', '-', ')', '»', '"'})
+
+
+def split_text(text: str, max_length: int = MAX_SENTENCE_LENGTH) -> List[str]:
+    """
+    Split paragraph or document into sentences which the service accepts
+
+    Sentences longer than `max_length` are split into chunks. The chunk boundary is placed
+    after the last punctuation mark which fits into the limit, or between words if there is
+    no such mark
+
+    :param text: Russian text
+    :param max_length: maximal length of the returned sentences
+    :return: list of non-empty sentences and chunks
+    """
+    result = []
+    for sentence in sentenize(text):
+        if len(sentence.text) <= max_length:
+            result.append(sentence.text)
+        else:
+            result.extend(_split_sentence(sentence.text, max_length))
+    return result
+
+
+def _split_sentence(sentence: str, max_length: int):
+    tokens = list(tokenize(sentence))
+    chunks = []
+    i = 0
+    while i < len(tokens):
+        start = tokens[i].start
+        last = None
+        last_break = None
+        j = i
+        while j < len(tokens) and tokens[j].stop - start <= max_length:
+            last = j
+            if tokens[j].text in _BREAK_TOKENS:
+                last_break = j
+            j += 1
+        if last is None:
+            # the token itself is too long
+            token = tokens[i]
+            chunks.extend(sentence[k:min(k + max_length, token.stop)]
+                          for k in range(token.start, token.stop, max_length))
+            i += 1
+            continue
+        if j < len(tokens) and last_break is not None:
+            last = last_break
+        chunks.append(sentence[start:tokens[last].stop])
+        i = last + 1
+    return chunks
+
+
+async def stream_sentence_graphs(text: str, analyzer: pymorphy2.MorphAnalyzer = None, *,
+                                 client: SyntaxClient = None, cache: ResponseCache = None,
+                                 concurrency: int = 8) -> AsyncIterator[SentenceGraph]:
+    """
+    Split text into sentences, parse them concurrently and yield graphs as they are ready
+
+    Graph attribute 'index' is the position of the sentence in the text.
+    Sentences which failed to parse are skipped with a warning. Cache lookups, requests
+    and graph construction run in a thread pool, so they don't block the event loop
+
+    :param text: Russian text
+    :param analyzer: `pymorphy2.MorphAnalyzer` object passed to every `SentenceGraph`
+    :param client: `SyntaxClient` object to send requests with. If it is None,
+        temporary client with connection pool of size `concurrency` is used
+    :param cache: `ResponseCache` object to look up sentences before sending requests
+    :param concurrency: maximal count of sentences processed at the same time
+    """
+    sentences = split_text(text)
+    if not sentences:
+        return
+    own_client = client is None
+    if own_client:
+        client = SyntaxClient(pool_size=concurrency)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def parse(index, sentence):
+        async with semaphore:
+            try:
+                graph = await loop.run_in_executor(
+                    executor, _parse_sentence, index, sentence, analyzer, client, cache)
+            except Exception as error:  # pylint: disable=broad-except
+                warn(f'Sentence {index} is not parsed: {error!r}')
+                return None
+            return graph
+
+    tasks = [asyncio.ensure_future(parse(index, sentence))
+             for index, sentence in enumerate(sentences)]
+    try:
+        for future in asyncio.as_completed(tasks):
+            graph = await future
+            if graph is not None:
+                yield graph
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False)
+        if own_client:
+            client.close()
+
+
+def _parse_sentence(index: int, sentence: str, analyzer, client: SyntaxClient,
+                    cache: ResponseCache) -> SentenceGraph:
+    json_obj = cache.get(sentence, old_format=True) if cache is not None else None
+    if json_obj is not None:
+        return _make_graph(json_obj, index, analyzer)
+    check_sentence(sentence)
+    response = client.request_syntax_analysis(sentence, old_format=True)
+    response.raise_for_status()
+    json_obj = response.json()
+    graph = _make_graph(json_obj, index, analyzer)
+    # the response is cached only if it is a correct syntax analysis result
+    if cache is not None:
+        cache.put(sentence, json_obj, old_format=True)
+    return graph
+
+
+def _make_graph(json_obj, index, analyzer):
+    graph = SentenceGraph(json_obj, analyzer=analyzer)
+    graph['index'] = index
+    return graph
@@ -1,6 +1,21 @@
-"""Function to visualize SentenceGraph. Nothing serious but it's better than nothing"""
+"""
+Functions to visualize SentenceGraph. Nothing serious but it's better than nothing
 
-import random
+Plots of many graphs are written to files by `render_all` in a pool of processes:
+
+    python -m krasoteevo.visualization --examples 0:100 -o renders --format svg
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import pathlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple, Union
 
 from igraph import plot, InternalError
 
@@ -33,9 +48,19 @@ POS_TO_COLORS = {
     'PREP': 'cyan',  # предлог
     'CONJ': 'cyan',  # союз
     'PRCL': 'grey',  # частица
+    # parts of speech of the new JSON format, they are used when there is no analyzer
+    'S': 'red',
+    'V': 'green',
+    'A': 'light pink',
+    'ADV': 'yellow',
+    'NUM': 'blue',
+    'PR': 'cyan',
+    'PART': 'grey',
     None: DEFAULT_VERTEX_COLOR
 }
 
+PLOT_OPTIONS = {'margin': 60, 'bbox': (1200, 600)}
+
 
 def _pos(vertex):
     """
@@ -47,16 +72,104 @@ def _pos(vertex):
     morph_info: MorphInfo = vertex['morph_info_list'][0]
     try:
         return morph_info.tag.POS
-    except AttributeError:
+    except (AttributeError, RuntimeError, ValueError):
         return morph_info.grammemes.replace(',', ' ').split(' ')[0]
 
 
-def _double(iterable):
-    return iterable, iterable
+def edge_color(edge_type: str) -> str:
+    """
+    :return: color of the edge type. It is the same in all processes and runs
+    """
+    return COLORS[zlib.crc32(edge_type.encode('utf-8')) % len(COLORS)]
 
 
-def show(graph: SentenceGraph):
-    """Show colorful plot with SentenceGraph"""
+def structure_key(graph) -> str:
+    """
+    :return: hash of vertex count and edges of the graph
+    """
+    digest = hashlib.sha256(str(graph.vcount()).encode())
+    digest.update(repr(sorted(graph.get_edgelist())).encode())
+    return digest.hexdigest()
+
+
+class LayoutCache:
+    """
+    LRU cache of layout coordinates keyed by `structure_key`
+
+    Layouts are saved to `directory` if it is passed, so processes rendering in parallel
+    share them
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike, None] = None, max_size: int = 4096):
+        self.directory = None if directory is None else pathlib.Path(directory)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[List[float]]]:
+        with self._lock:
+            coords = self._memory.get(key)
+            if coords is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return coords
+        if self.directory is not None:
+            try:
+                with open(self.directory / f'{key}.json') as file:
+                    coords = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                coords = None
+        with self._lock:
+            if coords is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, coords)
+        return coords
+
+    def put(self, key: str, coords: List[List[float]]):
+        with self._lock:
+            self._remember(key, coords)
+        if self.directory is not None:
+            path = self.directory / f'{key}.json'
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w') as file:
+                json.dump(coords, file)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, coords):
+        self._memory[key] = coords
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+
+layout_cache = LayoutCache()
+
+
+def _layout(graph, cache: LayoutCache):
+    key = structure_key(graph)
+    coords = cache.get(key) if cache is not None else None
+    if coords is None:
+        try:
+            layout = graph.layout_reingold_tilford()
+        except InternalError:
+            layout = graph.layout_kamada_kawai()
+        coords = layout.coords
+        if cache is not None:
+            cache.put(key, coords)
+    return coords
+
+
+def prepare_plot(graph: SentenceGraph, cache: Optional[LayoutCache] = layout_cache):
+    """
+    :param cache: cache of layouts, layouts are not cached if it is None
+    :return: simplified copy of the graph with labels and colors and its layout coordinates
+    """
     copy: SentenceGraph = graph.copy()
     copy.simplify(loops=False, combine_edges={'type': ', '.join})
     copy.vs['label'] = [f"{v['token']} [{len(v['morph_info_list'])}]" if v['is_word']
@@ -64,9 +177,104 @@ def show(graph: SentenceGraph):
     copy.es['label'] = copy.es['type']
 
     copy.vs['color'] = [POS_TO_COLORS.get(_pos(v), DEFAULT_VERTEX_COLOR) for v in copy.vs]
-    copy.es['color'], copy.es['label_color'] = _double(random.choices(COLORS, k=len(copy.es)))
+    copy.es['color'] = copy.es['label_color'] = [edge_color(edge_type)
+                                                 for edge_type in copy.es['type']]
+    return copy, _layout(copy, cache)
+
+
+def show(graph: SentenceGraph):
+    """Show colorful plot with SentenceGraph"""
+    copy, layout = prepare_plot(graph)
+    plot(copy, layout=layout, **PLOT_OPTIONS)
+
+
+def render(graph: SentenceGraph, path: Union[str, os.PathLike],
+           cache: Optional[LayoutCache] = layout_cache):
+    """
+    Write plot of the graph to a file. The format is chosen by the extension: .png, .svg, .pdf
+    """
+    copy, layout = prepare_plot(graph, cache)
+    plot(copy, target=str(path), layout=layout, **PLOT_OPTIONS)
+
+
+_worker_cache: Optional[LayoutCache] = None
+_worker_analyzer = None
+
+
+def _init_worker(cache_directory, use_analyzer: bool):
+    global _worker_cache, _worker_analyzer
+    _worker_cache = LayoutCache(cache_directory)
+    if use_analyzer and _worker_analyzer is None:
+        import pymorphy2  # pylint: disable=import-outside-toplevel
+        _worker_analyzer = pymorphy2.MorphAnalyzer()
+
+
+def _render_job(job: Tuple[dict, str]) -> Tuple[str, Optional[str]]:
+    json_obj, path = job
     try:
-        layout = copy.layout_reingold_tilford()
-    except InternalError:
-        layout = copy.layout_kamada_kawai()
-    plot(copy, layout=layout, margin=(60, 20, 60, 20), bbox=(1200, 600))
+        graph = SentenceGraph(json_obj, analyzer=_worker_analyzer)
+        render(graph, path, _worker_cache)
+    except Exception as exc:  # pylint: disable=broad-except
+        return path, f'{type(exc).__name__}: {exc}'
+    return path, None
+
+
+def render_all(json_objects: Iterable[Tuple[str, dict]], directory: Union[str, os.PathLike],
+               fmt: str = 'png', processes: int = None,
+               cache_directory: Union[str, os.PathLike, None] = None,
+               use_analyzer: bool = False) -> List[Tuple[str, Optional[str]]]:
+    """
+    Render graphs of syntax analysis results to files in a pool of processes
+
+    :param json_objects: pairs (name of the file without extension, JSON object)
+    :param directory: directory for the files
+    :param fmt: format of the files: 'png', 'svg' or 'pdf'
+    :param processes: count of worker processes, count of CPUs if it is None
+    :param cache_directory: directory of layouts shared by workers. Layouts are cached
+        in memory of every worker if it is None
+    :param use_analyzer: resolve parts of speech with `pymorphy2`, otherwise colors are
+        taken from tags of the service
+    :return: pairs (path, error message or None)
+    """
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    jobs = ((json_obj, str(directory / f'{name}.{fmt}')) for name, json_obj in json_objects)
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    with context.Pool(processes, initializer=_init_worker,
+                      initargs=(cache_directory, use_analyzer)) as pool:
+        return list(pool.imap_unordered(_render_job, jobs, chunksize=8))
+
+
+def main(argv=None):
+    # imported here because the examples package imports this module through krasoteevo
+    # pylint: disable=import-outside-toplevel
+    from krasoteevo.examples import example_range, get_count, get_example_json
+
+    parser = argparse.ArgumentParser(description='Render graphs of the examples to files')
+    parser.add_argument('--examples', type=example_range, default=(0, None), metavar='START:STOP',
+                        help='range of numbers of the examples, both bounds are optional')
+    parser.add_argument('-o', '--output', type=pathlib.Path, default=pathlib.Path('renders'))
+    parser.add_argument('--format', choices=('png', 'svg', 'pdf'), default='png')
+    parser.add_argument('-j', '--processes', type=int, default=None)
+    parser.add_argument('--layout-cache', type=pathlib.Path, default=None,
+                        help='directory of cached layouts shared between runs')
+    parser.add_argument('--analyzer', action='store_true',
+                        help='color vertices by parts of speech of pymorphy2')
+    args = parser.parse_args(argv)
+
+    start, stop = args.examples
+    numbers = range(start, get_count() if stop is None else stop)
+    results = render_all(((str(number), get_example_json(number)) for number in numbers),
+                         args.output, args.format, args.processes, args.layout_cache,
+                         args.analyzer)
+    failed = [(path, error) for path, error in results if error is not None]
+    for path, error in failed:
+        print(path, error)
+    print(f'{len(results) - len(failed)} graphs rendered to {args.output}, {len(failed)} failed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Compiled lexicon of verb classes
+
+The lexicon maps normal forms of verbs to their classes ('move', 'feeling').
+It is built offline from the lexicons in `predicates` by expanding them through the
+`pymorphy2` dictionary into every known prefixed and reflexive derivative, so
+classification of a verb is a single dict lookup:
+
+    python lexicon.py
+"""
+
+import pathlib
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from pymorphy2 import MorphAnalyzer
+
+from krasoteevo import metrics
+
+_dir_path = pathlib.Path(__file__).parent.absolute()
+
+DEFAULT_PATH = _dir_path / 'verb_lexicon.txt'
+
+_FINGERPRINT_PREFIX = '# dictionary: '
+
+
+def dictionary_fingerprint(analyzer: MorphAnalyzer) -> str:
+    """
+    :return: string which changes whenever dictionaries of `analyzer` change
+    """
+    meta = analyzer.dictionary.meta
+    return f"{meta.get('format_version')}/{meta.get('source_revision')}/" \
+           f"{meta.get('compiled_at')}"
+
+
+class PrefixTrie:
+    """Trie to find all prefixes from some set which the word starts with"""
+
+    _END = ''
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._root = {}
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self._END] = prefix
+
+    def prefixes_of(self, word: str):
+        """
+        :return: iterator over prefixes of `word` from the trie, from the shortest to the longest
+        """
+        node = self._root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return
+            if self._END in node:
+                yield node[self._END]
+
+
+def _is_known_infinitive(word: str, analyzer: MorphAnalyzer) -> bool:
+    dictionary = analyzer.dictionary
+    for para_id, idx in dictionary.words.get(word, ()):
+        if idx == 0 and 'INFN' in dictionary.build_tag_info(para_id, 0):
+            return True
+    return False
+
+
+class VerbLexicon:
+    """
+    Mapping from normal forms of verbs to their classes
+
+    Base verbs always have their classes. Other words which are not in the compiled lexicon
+    are classified once with the `cut` function and remembered, unless they are infinitives
+    known to the dictionary the lexicon was built from (such words have been considered
+    by the build and have no class)
+    """
+
+    def __init__(self, words: Dict[str, str], base: Dict[str, str],
+                 cut: Callable[[str, MorphAnalyzer], str], fingerprint: Optional[str] = None,
+                 normalize: Callable[[str], str] = None):
+        """
+        :param words: compiled mapping from normal forms to classes
+        :param base: mapping from base verbs (without prefixes) to classes
+        :param cut: function removing affixes from normal form
+        :param fingerprint: `dictionary_fingerprint` of the analyzer used by the build
+        :param normalize: function removing from base verbs affixes which `cut` removes
+            without the dictionary, e.g. reflexive postfixes
+        """
+        self.words = {**base, **words}
+        self.base = base
+        self.cut = cut
+        self.normalize = normalize
+        self.fingerprint = fingerprint
+        self._cut_base = base if normalize is None else \
+            {**{normalize(verb): verb_class for verb, verb_class in base.items()}, **base}
+        self.fingerprint = fingerprint
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def classify(self, normal_form: str, analyzer: MorphAnalyzer) -> Optional[str]:
+        """
+        :return: class of the verb or None
+        """
+        verb_class = self.words.get(normal_form)
+        if verb_class is not None:
+            return verb_class
+        try:
+            return self._memo[normal_form]
+        except KeyError:
+            pass
+        if self.fingerprint is not None and self.fingerprint == dictionary_fingerprint(analyzer) \
+                and _is_known_infinitive(normal_form, analyzer):
+            verb_class = None
+        else:
+            metrics.count('verb_lexicon_fallbacks_total')
+            verb_class = self._cut_base.get(self.cut(normal_form, analyzer))
+        with self._lock:
+            self._memo[normal_form] = verb_class
+        return verb_class
+
+    def remembered(self) -> Dict[str, Optional[str]]:
+        """
+        :return: copy of classes of words which are not in the compiled lexicon
+        """
+        with self._lock:
+            return dict(self._memo)
+
+    def remember(self, classes: Dict[str, Optional[str]]):
+        """Add classes of words computed earlier, see `remembered`"""
+        with self._lock:
+            self._memo.update(classes)
+
+    @classmethod
+    def build(cls, analyzer: MorphAnalyzer, base: Dict[str, str],
+              cut: Callable[[str, MorphAnalyzer], str],
+              normalize: Callable[[str], str] = None) -> 'VerbLexicon':
+        """
+        Expand base verbs into all infinitives of the dictionary which are derived from them.
+        It takes about a minute
+        """
+        lexicon = cls({}, base, cut, fingerprint=dictionary_fingerprint(analyzer),
+                      normalize=normalize)
+        dictionary = analyzer.dictionary
+        for word, (para_id, idx) in dictionary.words.items():
+            if idx != 0 or 'INFN' not in dictionary.build_tag_info(para_id, 0):
+                continue
+            verb_class = lexicon._cut_base.get(cut(word, analyzer))
+            if verb_class is not None:
+                lexicon.words.setdefault(word, verb_class)
+        return lexicon
+
+    def save(self, path=DEFAULT_PATH):
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(f'{_FINGERPRINT_PREFIX}{self.fingerprint}\n')
+            for word in sorted(self.words):
+                file.write(f'{self.words[word]}\t{word}\n')
+
+    @classmethod
+    def load(cls, base: Dict[str, str], cut: Callable[[str, MorphAnalyzer], str],
+             path=DEFAULT_PATH, normalize: Callable[[str], str] = None) -> 'VerbLexicon':
+        """
+        Load compiled lexicon. If the file doesn't exist, the lexicon is empty and every word
+        is classified with the `cut` function
+        """
+        words = {}
+        fingerprint = None
+        try:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    line = line.rstrip('\n')
+                    if line.startswith(_FINGERPRINT_PREFIX):
+                        fingerprint = line[len(_FINGERPRINT_PREFIX):]
+                    elif line:
+                        verb_class, word = line.split('\t')
+                        words[word] = verb_class
+        except FileNotFoundError:
+            pass
+        return cls(words, base, cut, fingerprint=fingerprint, normalize=normalize)
+
+
+def main():
+    # pylint: disable=import-outside-toplevel
+    from predicates import VERB_CLASSES, cut_affix, cut_postfixes
+
+    analyzer = MorphAnalyzer()
+    lexicon = VerbLexicon.build(analyzer, VERB_CLASSES,
+                                lambda word, morph: cut_affix(word, analyzer=morph),
+                                normalize=cut_postfixes)
+    lexicon.save()
+    print(f'{len(lexicon.words)} verbs saved to {DEFAULT_PATH}')
+
+
+if __name__ == '__main__':
+    main()
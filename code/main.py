@@ -1,16 +1,24 @@
 from pprint import pprint
+from typing import Iterable, List
 
 from igraph import Vertex
 from pymorphy2 import MorphAnalyzer
 
+from krasoteevo import metrics
 from krasoteevo.examples import get_example_graph
 from krasoteevo.sentence_graph import SentenceGraph
+from krasoteevo.text import stream_sentence_graphs
 from krasoteevo.visualization import show
 from parse_proxy.question_type import QuestionType as QType
 from parse_proxy.complex_verb import ComplexVerb
+from parse_proxy.inflection import inflect
 from parse_proxy.morph_info import MorphInfo
 from parse_proxy import ParseProxy
-from predicates import is_present, is_move_verb, is_feeling_verb
+from snapshot import warm_start
+from predicates import (
+    is_present, is_move_verb, is_feeling_verb,
+    IS_NOUN, IS_PLURAL_NOUN, IS_PLURAL, IS_VERB, IS_VERB_FORM, IS_INFINITIVE, IS_ADVERB,
+    IS_NUMERAL, IS_FIRST_PERSON, IS_PAST_IMPERFECTIVE, IS_PAST_PERFECTIVE, IS_FUTURE_PERFECTIVE)
 
 
 class Question:
@@ -20,45 +28,45 @@ class Question:
 
     def __str__(self):
         if self.question_type is QType.WHICH:
-            if {'NOUN', 'plur'} in self.target_parse.tag:
-                word = self.target_parse.inflect({'nomn'})
+            if IS_PLURAL_NOUN(self.target_parse):
+                word = inflect(self.target_parse, {'nomn'})
                 question = QType.WHICH.inflect({'plur'})
                 return f'{question.word.capitalize()} {word.word}?'
-            if {'NOUN'} in self.target_parse.tag:
+            if IS_NOUN(self.target_parse):
                 gender = self.target_parse.tag.gender if self.target_parse.tag.gender is not None\
                     else 'masc'
                 question = QType.WHICH.inflect({gender})
-                word = self.target_parse.inflect({'nomn'})
+                word = inflect(self.target_parse, {'nomn'})
                 return f'{question.word.capitalize()} {word.word}?'
             raise Warning('Unreachable point')
         if self.question_type is QType.HOW_MANY:
-            if 'NOUN' in self.target_parse.tag:
-                word = self.target_parse.inflect({'gent'})
+            if IS_NOUN(self.target_parse):
+                word = inflect(self.target_parse, {'gent'})
                 return f'{QType.HOW_MANY.word.capitalize()} {word.word}?'
             raise Warning('Unreachable point')
         if self.question_type is QType.WHERE_FROM:
-            if 'VERB' in self.target_parse.tag:
+            if IS_VERB(self.target_parse):
                 return f'{QType.WHERE_FROM.word.capitalize()} {self.target_parse.word}?'
             raise Warning('TODO: add support for GRND and PRTF (PRTS)')
         elif self.question_type is QType.WHERE_TO:
-            if 'VERB' in self.target_parse.tag:
+            if IS_VERB(self.target_parse):
                 return f'{QType.WHERE_TO.word.capitalize()} {self.target_parse.word}?'
         elif self.question_type is QType.WHERE:
-            if 'VERB' in self.target_parse.tag:
+            if IS_VERB(self.target_parse):
                 return f'{QType.WHERE.word.capitalize()} {self.target_parse.word}?'
         elif self.question_type is QType.HOW:
-            if 'VERB' in self.target_parse.tag:
+            if IS_VERB(self.target_parse):
                 return f'{QType.HOW.word.capitalize()} {self.target_parse.word}?'
         elif self.question_type is QType.WHEN:
-            if 'VERB' in self.target_parse.tag:
-                if {'past', 'impf'} in self.target_parse.tag:
+            if IS_VERB(self.target_parse):
+                if IS_PAST_IMPERFECTIVE(self.target_parse):
                     return 'Когда это происходило?'
-                if {'past', 'perf'} in self.target_parse.tag:
+                if IS_PAST_PERFECTIVE(self.target_parse):
                     return 'Когда это произошло?'
-                if {'futr', 'perf'} in self.target_parse.tag:
+                if IS_FUTURE_PERFECTIVE(self.target_parse):
                     return 'Когда это произойдёт?'
         elif self.question_type is QType.WHO:
-            if 'NUMR' in self.target_parse.tag:
+            if IS_NUMERAL(self.target_parse):
                 return f'{QType.WHO.inflect("gent").word.capitalize()} {self.target_parse.word}?'
         return f"Не знаю: {self.question_type.word} {self.target_parse.word} " \
                f"{self.target_parse.tag}"
@@ -73,10 +81,10 @@ TIME_PHRASES = ('сон', 'ужин', 'обед', 'ужин', 'до нашей 
 def verb(vertex: Vertex, word: ParseProxy, analyzer: MorphAnalyzer):
     question_types = {QType.HOW, QType.WHEN, QType.WHERE, QType.WHERE_TO,
                       QType.WHERE_FROM}
-    edges = vertex.out_edges()
-    for edge in edges:
-        child = edge.graph.vs[edge.target]['morph_info_list'][0]
-        if 'INFN' in child.tag:
+    adjacency = vertex.graph.adjacency
+    for child_index in adjacency.children(vertex.index):
+        child = adjacency.first_homonym(child_index)
+        if IS_INFINITIVE(child):
             word = ComplexVerb(word, child)
             break
     if is_present(word):
@@ -89,13 +97,11 @@ def verb(vertex: Vertex, word: ParseProxy, analyzer: MorphAnalyzer):
     else:
         question_types.discard(QType.WHERE_FROM)
         question_types.discard(QType.WHERE_TO)
-    for edge in edges:
-        if edge['type'] != 'обст':
-            continue
-        child = edge.graph.vs[edge.target]['morph_info_list'][0]
+    for child_index in adjacency.children(vertex.index, 'обст'):
+        child = adjacency.first_homonym(child_index)
         if child.word in TIME_ADVERBS:
             question_types.discard(QType.WHEN)
-        elif 'ADVB' in child.tag:
+        elif IS_ADVERB(child):
             question_types.discard(QType.HOW)
         else:
             question_types.discard({QType.WHERE_FROM, QType.WHERE_TO, QType.WHERE, QType.WHEN,
@@ -105,43 +111,78 @@ def verb(vertex: Vertex, word: ParseProxy, analyzer: MorphAnalyzer):
 
 def noun(vertex: Vertex, morph_info: ParseProxy, analyzer: MorphAnalyzer):
     word = analyzer.parse(morph_info.word)[0]
-    edge_types = [edge['type'] for edge in vertex.out_edges()]
+    edge_types = vertex.graph.adjacency.edge_types(vertex.index)
     questions = [Question(QType.WHICH, word, vertex)]
 
-    if morph_info.tag.number == 'plur' and 'количест' not in edge_types:
+    if IS_PLURAL(morph_info) and 'количест' not in edge_types:
         questions.append(Question(QType.HOW_MANY, word, vertex))
     return questions
 
 
 def get_questions(graph: SentenceGraph, analyzer: MorphAnalyzer):
+    with metrics.span('questions'):
+        questions = _get_questions(graph, analyzer)
+    metrics.observe('questions_per_sentence', len(questions))
+    return questions
+
+
+def _get_questions(graph: SentenceGraph, analyzer: MorphAnalyzer):
     questions = []
-    for vertex in graph.vs:
-        if not vertex['is_word']:
+    for index, morph_info in enumerate(graph.adjacency.first_homonyms):
+        if morph_info is None:
             continue
-        morph_info: MorphInfo = vertex['morph_info_list'][0]
+        vertex = graph.vs[index]
 
-        if 'NOUN' in morph_info.tag:
+        if IS_NOUN(morph_info):
             questions.extend(noun(vertex, morph_info, analyzer))
-        elif morph_info.tag.POS in {'VERB', 'GRND', 'PRTF', 'PRTS'}:
-            if {'1per'} in morph_info.tag:
+        elif IS_VERB_FORM(morph_info):
+            if IS_FIRST_PERSON(morph_info):
                 morph_info = morph_info.inflect({'2per'})
             questions.extend(verb(vertex, morph_info, analyzer))
-        elif 'NUMR' in morph_info.tag:
+        elif IS_NUMERAL(morph_info):
             if morph_info.normal_form in {'двое', 'трое'} or morph_info.normal_form[-1:] == 'о':
                 questions.append(Question(QType.WHO, morph_info, vertex))
     return questions
 
 
+def render_all(questions: Iterable[Question]) -> List[str]:
+    """
+    Render questions to strings. Questions of the same type about the same word are
+    rendered once
+    """
+    rendered = {}
+    result = []
+    with metrics.span('render'):
+        for question in questions:
+            target = question.target_parse
+            key = (question.question_type, target.word, str(target.tag))
+            text = rendered.get(key)
+            if text is None:
+                text = rendered[key] = str(question)
+            result.append(text)
+    return result
+
+
+async def stream_questions(text: str, analyzer: MorphAnalyzer, **kwargs):
+    """
+    Split text into sentences and yield questions for each sentence as soon as it is parsed
+
+    :param kwargs: arguments passed to `krasoteevo.text.stream_sentence_graphs`
+    :return: async iterator of pairs (graph, list of questions)
+    """
+    async for graph in stream_sentence_graphs(text, analyzer, **kwargs):
+        yield graph, get_questions(graph, analyzer=analyzer)
+
+
 def main():
-    analyzer = MorphAnalyzer()
-    QType.init(analyzer)
+    analyzer = warm_start()
 
     # sentence = input()
     # graph = SentenceGraph(sentence, analyzer=analyzer)
     number = 5
     graph = get_example_graph(number, analyzer=analyzer)
 
-    pprint([str(question) for question in get_questions(graph, analyzer=analyzer)])
+    pprint(render_all(get_questions(graph, analyzer=analyzer)))
     # pprint(graph['json'])
     show(graph)
 
@@ -1,39 +1,208 @@
-from igraph import Vertex
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from igraph import Graph, Vertex
+
+from krasoteevo.sentence_graph import AdjacencyIndex, SentenceGraph
+from parse_proxy.grammemes import TagPredicate, mask_of
+
+
+def _as_set(value):
+    if isinstance(value, str):
+        return frozenset({value})
+    if value is None:
+        return None
+    return frozenset(value)
 
 
 class Node:
     def __init__(self, *, grammemes=None, white_list=None, black_list=None):
-        if isinstance(grammemes, str):
-            grammemes = frozenset(grammemes)
-        if isinstance(white_list, str):
-            white_list = frozenset(white_list)
-        if isinstance(black_list, str):
-            black_list = frozenset(black_list)
+        grammemes = _as_set(grammemes)
         self.grammemes = grammemes
-        self.white_list = white_list
-        self.black_list = black_list
+        self.white_list = _as_set(white_list)
+        self.black_list = _as_set(black_list)
+        self._predicate = TagPredicate(*grammemes) if grammemes else None
         self._children: list['Node'] = []
 
     def children(self, *children):
         self._children = children
         return self
 
-    def match(self, vertex: Vertex):
-        if not vertex['morph_inf_list']:
+    def match_root(self, vertex: Vertex):
+        """Check the vertex itself without children"""
+        morph_info_list = vertex['morph_info_list']
+        return self.match_morph(morph_info_list[0] if morph_info_list else None)
+
+    def match_morph(self, morph_info) -> bool:
+        """Check the first MorphInfo of the vertex, it is None for punctuation marks"""
+        if morph_info is None:
             return False
-        if self.grammemes and self.grammemes not in vertex['morph_info_list'][0].tag:
+        if self._predicate is not None and not self._predicate(morph_info):
             return False
-        if self.white_list and vertex['morph_info_list'].normal_form.lower() not in self.white_list:
+        if self.white_list and morph_info.normal_form.lower() not in self.white_list:
             return False
-        if self.black_list and vertex['morph_info_list'].normal_form.lower() in self.black_list:
+        if self.black_list and morph_info.normal_form.lower() in self.black_list:
             return False
-        if not self._children:
+        return True
+
+    def match(self, vertex: Vertex):
+        """
+        Check that the pattern matches the subtree with root in `vertex`.
+        Use `TreeMatcher` to check many patterns or vertices of one graph
+        """
+        return TreeMatcher(vertex.graph).match(self, vertex.index)
+
+
+class TreeMatcher:
+    """
+    Matcher of tree patterns memoizing results per graph
+
+    Child patterns are assigned to distinct children of the vertex by maximum bipartite
+    matching, so a match is found whenever it exists. Every pair (pattern node, vertex)
+    is evaluated at most once, so matching takes polynomial time even on wide nodes
+    """
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        if isinstance(graph, SentenceGraph):
+            adjacency = graph.adjacency
+        else:
+            adjacency = AdjacencyIndex(graph)
+        self.adjacency = adjacency
+        # keys hold pattern nodes, so their ids are not reused while the matcher is alive
+        self._memo: Dict[Tuple[Node, int], bool] = {}
+
+    def match(self, pattern: Node, vertex: int) -> bool:
+        """
+        :param pattern: root of the pattern
+        :param vertex: index of the vertex
+        """
+        key = (pattern, vertex)
+        result = self._memo.get(key)
+        if result is None:
+            result = self._match(pattern, vertex)
+            self._memo[key] = result
+        return result
+
+    def _match(self, pattern: Node, vertex: int) -> bool:
+        if not pattern.match_morph(self.adjacency.first_homonyms[vertex]):
+            return False
+        child_patterns = pattern._children  # noqa
+        if not child_patterns:
             return True
-        children = {e.graph.vs[e.target] for e in vertex.out_edges()}
-        for child_pattern in self._children:
-            for child in filter(child_pattern.match, children):
-                children.discard(child)
-                break
-            else:
+        children = self.adjacency.children(vertex)
+        if len(children) < len(child_patterns):
+            return False
+        candidates = []
+        for child_pattern in child_patterns:
+            matched = [child for child in children if self.match(child_pattern, child)]
+            if not matched:
                 return False
-        return True
+            candidates.append(matched)
+        return _has_perfect_assignment(candidates)
+
+
+def _has_perfect_assignment(candidates: List[List[int]]) -> bool:
+    """
+    :param candidates: for every pattern list of vertices which it matches
+    :return: True if every pattern can be assigned to its own vertex
+        (Kuhn's augmenting path algorithm)
+    """
+    owner = {}
+
+    def assign(pattern_index, visited):
+        for vertex in candidates[pattern_index]:
+            if vertex in visited:
+                continue
+            visited.add(vertex)
+            if vertex not in owner or assign(owner[vertex], visited):
+                owner[vertex] = pattern_index
+                return True
+        return False
+
+    return all(assign(pattern_index, set()) for pattern_index in range(len(candidates)))
+
+
+class PatternSet:
+    """
+    Registry of named patterns compiled into one matcher
+
+    Patterns are indexed by lemmas and grammemes of their roots, so for every vertex only
+    patterns which can match its lemma and tag are checked. Patterns without lemmas are
+    grouped by grammemes, so one bitmask check selects the whole group.
+    The matcher runs once over the graph
+
+    >>> patterns = PatternSet().add('until', Node(grammemes='PREP', white_list='до'))
+    >>> patterns.match(graph)  # doctest: +SKIP
+    [('until', 5)]
+    """
+
+    def __init__(self):
+        self._patterns: Dict[str, Node] = {}
+        self._by_lemma = None
+        self._by_mask = None
+
+    def add(self, name: str, pattern: Node) -> 'PatternSet':
+        self._patterns[name] = pattern
+        self._by_lemma = self._by_mask = None
+        return self
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _compile(self):
+        # entries are (order of registration, grammemes mask, name, pattern)
+        by_lemma = defaultdict(list)
+        by_mask = defaultdict(list)
+        for order, (name, pattern) in enumerate(self._patterns.items()):
+            mask = 0 if pattern._predicate is None else pattern._predicate.all_mask  # noqa
+            if pattern.white_list:
+                for lemma in pattern.white_list:
+                    by_lemma[lemma].append((order, mask, name, pattern))
+            else:
+                by_mask[mask].append((order, mask, name, pattern))
+        self._by_lemma = dict(by_lemma)
+        self._by_mask = dict(by_mask)
+
+    def _candidates(self, morph_info):
+        """
+        :return: pairs (name, pattern) in order of registration whose roots can match
+            the lemma and grammemes of `morph_info`
+        """
+        if morph_info is None:
+            return ()
+        if self._by_lemma is None:
+            self._compile()
+        tag_mask = mask_of(morph_info)
+        candidates = [entry for entry in self._by_lemma.get(morph_info.normal_form.lower(), ())
+                      if tag_mask & entry[1] == entry[1]]
+        for mask, entries in self._by_mask.items():
+            if tag_mask & mask == mask:
+                candidates.extend(entries)
+        candidates.sort(key=lambda entry: entry[0])
+        return [(name, pattern) for _order, _mask, name, pattern in candidates]
+
+    def match_vertex(self, vertex: Vertex, matcher: TreeMatcher = None) -> List[str]:
+        """
+        :param matcher: `TreeMatcher` of the graph to share memoized results between calls
+        :return: names of patterns with the root in `vertex`
+        """
+        if matcher is None:
+            matcher = TreeMatcher(vertex.graph)
+        return self._match_index(vertex.index, matcher)
+
+    def _match_index(self, vertex: int, matcher: TreeMatcher) -> List[str]:
+        return [name for name, pattern in
+                self._candidates(matcher.adjacency.first_homonyms[vertex])
+                if matcher.match(pattern, vertex)]
+
+    def match(self, graph: Graph) -> List[Tuple[str, int]]:
+        """
+        :return: all pairs (pattern name, index of root vertex) found in the graph
+        """
+        matcher = TreeMatcher(graph)
+        hits = []
+        for vertex in range(graph.vcount()):
+            for name in self._match_index(vertex, matcher):
+                hits.append((name, vertex))
+        return hits
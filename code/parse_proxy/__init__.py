@@ -1,13 +1,24 @@
 """This package contains interface ParseLike and classes with this interface"""
-from .parse_proxy import choose_parse, ParseProxy
+from .parse_proxy import choose_parse, ParseProxy, ParseCache, NO_PARSE, parse_cache, \
+    warm_up_parse_cache
 from .complex_verb import ComplexVerb
+from .grammemes import TagPredicate, GrammemeRegistry
+from .inflection import inflect, inflection_cache
 from .morph_info import MorphInfo
 from .question_type import QuestionType
 
 __all__ = [
     'ParseProxy',
     'choose_parse',
+    'ParseCache',
+    'NO_PARSE',
+    'parse_cache',
+    'warm_up_parse_cache',
+    'inflect',
+    'inflection_cache',
     'MorphInfo',
     'ComplexVerb',
+    'TagPredicate',
+    'GrammemeRegistry',
     'QuestionType'
 ]
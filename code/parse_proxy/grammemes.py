@@ -0,0 +1,145 @@
+"""
+Integer bitmask representation of grammemes
+
+Every grammeme is interned into one bit of an integer, so a tag is a bitmask
+and containment check of several grammemes is a single AND
+
+>>> NOUN_PLUR = TagPredicate('NOUN', 'plur')
+>>> NOUN_PLUR.matches(grammemes_mask('NOUN,inan,masc plur,nomn'))
+True
+"""
+
+import threading
+from typing import Iterable
+
+from krasoteevo.krasoteevo_tag import KrasoteevoTag
+from . import parse_proxy as _parse_proxy
+
+
+class GrammemeRegistry:
+    """Class interning grammemes into bits"""
+
+    def __init__(self, grammemes: Iterable[str] = ()):
+        self._bits = {}
+        self._names = []
+        self._lock = threading.Lock()
+        for grammeme in grammemes:
+            self.bit(grammeme)
+
+    def bit(self, grammeme: str) -> int:
+        """
+        :return: bitmask with the only bit corresponding to `grammeme`
+        """
+        bit = self._bits.get(grammeme)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.get(grammeme)
+                if bit is None:
+                    bit = 1 << len(self._names)
+                    self._names.append(grammeme)
+                    self._bits[grammeme] = bit
+        return bit
+
+    def mask(self, grammemes: Iterable[str]) -> int:
+        """
+        :return: bitmask of all `grammemes`
+        """
+        mask = 0
+        for grammeme in grammemes:
+            mask |= self.bit(grammeme)
+        return mask
+
+    def names(self, mask: int) -> frozenset:
+        """
+        :return: grammemes corresponding to bits of `mask`
+        """
+        return frozenset(name for index, name in enumerate(self._names) if mask >> index & 1)
+
+    def __len__(self):
+        return len(self._names)
+
+
+# grammemes produced by translation of krasoteevo tags take the lowest bits
+registry = GrammemeRegistry((
+    'NOUN', 'NPRO', 'VERB', 'INFN', 'PRTF', 'PRTS', 'GRND', 'ADJF', 'ADJS', 'ADVB', 'NUMR',
+    'PREP', 'CONJ', 'PRCL', 'sing', 'plur', 'masc', 'femn', 'neut', 'nomn', 'gent', 'datv',
+    'accs', 'ablt', 'loct', 'anim', 'inan', 'perf', 'impf', 'pres', 'past', 'futr', 'indc',
+    '1per', '2per', '3per'))
+
+_tag_masks = {}
+_string_masks = {}
+_krasoteevo_masks = {}
+
+
+def tag_mask(tag) -> int:
+    """
+    :param tag: `pymorphy2` tag object
+    :return: bitmask of all grammemes of the tag
+    """
+    mask = _tag_masks.get(tag)
+    if mask is None:
+        mask = registry.mask(tag.grammemes)
+        _tag_masks[tag] = mask
+    return mask
+
+
+def grammemes_mask(grammemes: str) -> int:
+    """
+    :param grammemes: grammemes separated by commas or spaces, for example 'NOUN,anim masc'
+    :return: bitmask of the grammemes
+    """
+    mask = _string_masks.get(grammemes)
+    if mask is None:
+        mask = registry.mask(grammeme for grammeme in grammemes.replace(',', ' ').split(' ')
+                             if grammeme)
+        _string_masks[grammemes] = mask
+    return mask
+
+
+def krasoteevo_mask(raw_tags: KrasoteevoTag) -> int:
+    """
+    :param raw_tags: tag from the new JSON format of `krasoteevo.ru`
+    :return: bitmask of `pymorphy2` grammemes corresponding to the tag
+    """
+    mask = _krasoteevo_masks.get(raw_tags)
+    if mask is None:
+        mask = grammemes_mask(_parse_proxy.krasoteevo_to_pymorphy(raw_tags))
+        _krasoteevo_masks[raw_tags] = mask
+    return mask
+
+
+def mask_of(word) -> int:
+    """
+    :param word: object with `ParseProxy` interface or `MorphInfo`
+    :return: bitmask of the word tag
+    """
+    mask = getattr(word, 'mask', None)
+    if mask is None:
+        return tag_mask(word.tag)
+    return mask
+
+
+class TagPredicate:
+    """
+    Precompiled check that tag contains all grammemes `all_of`
+    and at least one of grammemes `any_of` (if they are passed)
+    """
+
+    __slots__ = ('all_mask', 'any_mask')
+
+    def __init__(self, *all_of: str, any_of: Iterable[str] = ()):
+        self.all_mask = registry.mask(all_of)
+        self.any_mask = registry.mask(any_of)
+
+    def matches(self, mask: int) -> bool:
+        """
+        :param mask: bitmask of the tag
+        """
+        return mask & self.all_mask == self.all_mask and \
+            (not self.any_mask or bool(mask & self.any_mask))
+
+    def __call__(self, word) -> bool:
+        """
+        :param word: object with `ParseProxy` interface or `MorphInfo`
+        """
+        return self.matches(mask_of(word))
@@ -0,0 +1,37 @@
+"""Memoized inflection of :class:`ParseProxy` objects"""
+from typing import Iterable, Union
+
+from .parse_proxy import NO_PARSE, ParseCache, ParseProxy
+
+# keys are (normal form, word, tag, required grammemes)
+inflection_cache = ParseCache(max_size=50_000)
+
+
+def required_grammemes_set(required_grammemes: Union[str, Iterable[str]]) -> frozenset:
+    """
+    :param required_grammemes: grammeme or iterable of grammemes
+    :return: frozenset of grammemes. A single string is one grammeme, not a set of letters
+    """
+    if isinstance(required_grammemes, str):
+        return frozenset({required_grammemes})
+    return frozenset(required_grammemes)
+
+
+def inflect(target: ParseProxy, required_grammemes: Union[str, Iterable[str]]):
+    """
+    Cached `target.inflect(required_grammemes)`
+
+    :return: inflected object or None if the form doesn't exist
+    """
+    grammemes = required_grammemes_set(required_grammemes)
+    tag = target.tag
+    if tag is None:
+        return target.inflect(grammemes)
+    key = (target.normal_form, target.word, str(tag), grammemes)
+    result = inflection_cache.get(key)
+    if result is None:
+        result = target.inflect(grammemes)
+        inflection_cache.put(key, NO_PARSE if result is None else result)
+    elif result is NO_PARSE:
+        result = None
+    return result
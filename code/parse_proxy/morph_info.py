@@ -1,10 +1,23 @@
 from pymorphy2 import MorphAnalyzer
 
-from .parse_proxy import choose_parse
+from krasoteevo.krasoteevo_tag import KrasoteevoTag
+# the module is imported instead of its functions because of circular import
+# parse_proxy -> krasoteevo -> parse_proxy.morph_info
+from . import parse_proxy as _parse_proxy
+from .grammemes import tag_mask, grammemes_mask, krasoteevo_mask
 
 
 class MorphInfo:
-    """Class representing morphological information about word"""
+    """
+    Class representing morphological information about word
+
+    `pymorphy2.Parse` object is resolved on the first access to `tag`, `inflect` or
+    `normalized`, because most of words in a sentence are never inspected
+    """
+
+    __slots__ = ('_word', '_normal_form', 'grammemes', 'analyzer', '_parse', '_mask')
+
+    _UNRESOLVED = object()
 
     def __init__(self, word: str, normal_form: str, grammemes: str,
                  analyzer: MorphAnalyzer = None):
@@ -19,16 +32,27 @@ class MorphInfo:
         self._word = word
         self._normal_form = normal_form
         self.grammemes = grammemes
-        if analyzer is None:
-            self.tag = None
-            self._parse = None
-            self.analyzer = None
-        else:
-            print(grammemes, word)
-            self._parse = choose_parse(word, tag=grammemes, normal_form=normal_form,
-                                       analyzer=analyzer)
-            self.tag = self._parse.tag
-            self.analyzer = analyzer
+        self.analyzer = analyzer
+        self._parse = None if analyzer is None else self._UNRESOLVED
+        self._mask = None
+
+    @property
+    def parse(self):
+        """
+        :return: `pymorphy2.Parse` object or None if analyzer has not been passed
+
+        :raises RuntimeError: no parse matches the word
+        """
+        if self._parse is self._UNRESOLVED:
+            self._parse = _parse_proxy.choose_parse(self._word, tag=self.grammemes,
+                                                    normal_form=self._normal_form,
+                                                    analyzer=self.analyzer)
+        return self._parse
+
+    @property
+    def tag(self):
+        parse = self.parse
+        return None if parse is None else parse.tag
 
     @property
     def word(self):
@@ -38,12 +62,25 @@ class MorphInfo:
     def normal_form(self):
         return self._normal_form
 
+    @property
+    def mask(self) -> int:
+        """Bitmask of grammemes from `parse_proxy.grammemes`"""
+        if self._mask is None:
+            tag = self.tag
+            if tag is not None:
+                self._mask = tag_mask(tag)
+            elif isinstance(self.grammemes, KrasoteevoTag):
+                self._mask = krasoteevo_mask(self.grammemes)
+            else:
+                self._mask = grammemes_mask(self.grammemes)
+        return self._mask
+
     @property
     def normalized(self):
-        return self._parse.normalized
+        return self.parse.normalized
 
     def inflect(self, required_grammemes):
-        parse = self._parse.inflect(required_grammemes)
+        parse = self.parse.inflect(required_grammemes)
         return parse
 
     @property
@@ -1,8 +1,12 @@
+import threading
 from abc import abstractmethod
-from typing import Protocol, Any, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Protocol, Any, Iterable, Optional
 
 from pymorphy2 import MorphAnalyzer
 
+from krasoteevo import metrics
 from krasoteevo.krasoteevo_tag import KrasoteevoTag
 
 
@@ -40,6 +44,76 @@ class ParseProxy(Protocol):
         pass
 
 
+# value cached for words which can't be resolved to a parse
+NO_PARSE = object()
+
+
+class ParseCache:
+    """
+    Bounded thread-safe LRU cache for results of :func:`choose_parse`
+
+    Keys are triples (word, normalized tag, normal form). Failed resolutions are cached too
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :return: cached parse, `NO_PARSE` for failed resolution or None
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def items(self) -> list:
+        """
+        :return: list of pairs (key, value) from the least to the most recently used
+        """
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """
+        :return: dict with counters of the cache
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data),
+                    'hit_rate': self.hit_rate}
+
+
+parse_cache = ParseCache()
+
+
 def choose_parse(word: str, tag: Any, analyzer: MorphAnalyzer, normal_form: str = None):
     """Function to convert word to pymorphy2.Parse object"""
     if normal_form is None:
@@ -47,18 +121,75 @@ def choose_parse(word: str, tag: Any, analyzer: MorphAnalyzer, normal_form: str
     if isinstance(tag, KrasoteevoTag):
         tag = krasoteevo_to_pymorphy(tag)
     if isinstance(tag, str):
-        tags = set(tag.replace(',', ' ').split(' '))
+        tag_key = _grammemes(tag)
+    else:
+        tag_key = str(tag)
+    key = (word, tag_key, normal_form)
+    parse = parse_cache.get(key)
+    if parse is None:
+        metrics.count('parse_cache_total', labels={'result': 'miss'})
+        parse = _find_parse(word, tag_key, analyzer, normal_form)
+        parse_cache.put(key, parse)
+    else:
+        metrics.count('parse_cache_total', labels={'result': 'hit'})
+    if parse is NO_PARSE:
+        metrics.count('parse_failures_total')
+        raise RuntimeError("No parse matches")
+    return parse
+
+
+def _find_parse(word: str, tag_key, analyzer: MorphAnalyzer, normal_form: str):
+    if isinstance(tag_key, frozenset):
         for parse in analyzer.parse(word):
-            print(tags)
-            if tags in parse.tag and parse.normal_form == normal_form:
+            if tag_key in parse.tag and parse.normal_form == normal_form:
                 return parse
     else:
         for parse in analyzer.parse(word):
-            if parse.tag == tag and parse.normal_form == normal_form:
+            if str(parse.tag) == tag_key and parse.normal_form == normal_form:
                 return parse
-    raise RuntimeError("No parse matches")
-
-
+    return NO_PARSE
+
+
+@lru_cache(maxsize=4096)
+def _grammemes(tag: str) -> frozenset:
+    return frozenset(tag.replace(',', ' ').split(' '))
+
+
+def warm_up_parse_cache(analyzer: MorphAnalyzer, json_objects: Iterable = None) -> dict:
+    """
+    Fill the cache of :func:`choose_parse` with words from syntax analysis results
+
+    :param analyzer: `MorphAnalyzer` object
+    :param json_objects: JSON objects from `krasoteevo.ru`.
+        All examples from `krasoteevo.examples` are used if it is None
+    :return: stats of the cache after warm-up
+    """
+    if json_objects is None:
+        from krasoteevo.examples import get_count, get_example_json  # pylint: disable=import-outside-toplevel
+        json_objects = (get_example_json(number) for number in range(get_count()))
+    for json_obj in json_objects:
+        for morphs in json_obj['morphs']:
+            if isinstance(morphs, dict):  # new JSON format
+                homonyms = [item for item in morphs['homonyms'] if item['active']]
+                tags = [KrasoteevoTag(item['tags']) for item in homonyms]
+            else:  # old JSON format
+                homonyms = morphs
+                tags = [_clear_opencorpora_tag(item['tags']) for item in homonyms]
+            for item, tag in zip(homonyms, tags):
+                try:
+                    choose_parse(item['word'], tag=tag, normal_form=item['lexem'],
+                                 analyzer=analyzer)
+                except (RuntimeError, ValueError):
+                    # unknown grammemes or no matching parse
+                    pass
+    return parse_cache.stats()
+
+
+def _clear_opencorpora_tag(opencorpora_tag: str):
+    return opencorpora_tag[len("OpencorporaTag('"):-len("')")]
+
+
+@lru_cache(maxsize=4096)
 def krasoteevo_to_pymorphy(raw_tags: KrasoteevoTag):
     tags = set(raw_tags.split(' '))
     if 'ПРИЧ' in tags or 'ДЕЕПР' in tags or 'ИНФ' in tags:
@@ -2,8 +2,15 @@ from enum import Enum
 
 from pymorphy2 import MorphAnalyzer
 
+from .inflection import inflect, required_grammemes_set
 from .parse_proxy import choose_parse
 
+# forms of question words computed in `QuestionType.init`
+QUESTION_FORMS = (
+    ('masc',), ('femn',), ('neut',), ('plur',),
+    ('nomn',), ('gent',), ('datv',), ('accs',), ('ablt',), ('loct',),
+)
+
 
 class QuestionType(Enum):
     WHICH = {'word': 'какой', 'tag': 'ADJF,Apro masc,sing,nomn'}
@@ -27,9 +34,14 @@ class QuestionType(Enum):
     def __init__(self, value):
         self._parse = None
         self._morph = None
+        self._forms = {}
 
-    def inflect(self, *args, **kwargs):
-        return self._parse.inflect(*args, **kwargs)
+    def inflect(self, required_grammemes):
+        grammemes = required_grammemes_set(required_grammemes)
+        form = self._forms.get(grammemes)
+        if form is None:
+            form = inflect(self._parse, grammemes)
+        return form
 
     @property
     def normalized(self):
@@ -39,10 +51,26 @@ class QuestionType(Enum):
     def tag(self):
         return self._parse.tag
 
+    @property
+    def forms(self) -> dict:
+        """Precomputed forms of the question word by frozensets of grammemes"""
+        return self._forms
+
+    def restore(self, analyzer: MorphAnalyzer, parse, forms: dict):
+        """Set the state computed by `init` earlier, see `snapshot` module"""
+        self._morph = analyzer
+        self._parse = parse
+        self._forms = forms
+
     @classmethod
     def init(cls, analyzer: MorphAnalyzer):
         for item in cls:
-            item._morph = analyzer
-            item._parse = choose_parse(word=item.word, tag=item.raw_tag,
-                                       normal_form=item.normal_form, analyzer=analyzer)
+            parse = choose_parse(word=item.word, tag=item.raw_tag,
+                                 normal_form=item.normal_form, analyzer=analyzer)
+            forms = {}
+            for grammemes in map(frozenset, QUESTION_FORMS):
+                form = parse.inflect(grammemes)
+                if form is not None:
+                    forms[grammemes] = form
+            item.restore(analyzer, parse, forms)
 
@@ -1,9 +1,13 @@
-from igraph import Vertex
+from functools import lru_cache
+
+from igraph import Graph, Vertex
 from pymorphy2 import MorphAnalyzer
 
 from parse_proxy.complex_verb import ComplexVerb
 from parse_proxy import ParseProxy
-from matching import Node
+from parse_proxy.grammemes import TagPredicate
+from matching import Node, PatternSet
+from lexicon import PrefixTrie, VerbLexicon
 
 MOVE_VERBS = (
     'бегать', 'бежать', 'брести', 'бродить', 'везти', 'вести', 'водить', 'возить', 'гнать',
@@ -41,56 +45,68 @@ TIME_UNITS = ('секунда', 'минута', 'час', 'день', 'неде
               'столетие', 'век', 'тысячелетие')
 
 
+IS_NOUN = TagPredicate('NOUN')
+IS_PLURAL_NOUN = TagPredicate('NOUN', 'plur')
+IS_PLURAL = TagPredicate('plur')
+IS_VERB = TagPredicate('VERB')
+IS_VERB_FORM = TagPredicate(any_of=('VERB', 'GRND', 'PRTF', 'PRTS'))
+IS_INFINITIVE = TagPredicate('INFN')
+IS_ADVERB = TagPredicate('ADVB')
+IS_NUMERAL = TagPredicate('NUMR')
+IS_FIRST_PERSON = TagPredicate('1per')
+IS_PAST_IMPERFECTIVE = TagPredicate('past', 'impf')
+IS_PAST_PERFECTIVE = TagPredicate('past', 'perf')
+IS_FUTURE_PERFECTIVE = TagPredicate('futr', 'perf')
+IS_FUTURE_IMPERFECTIVE = TagPredicate('futr', 'impf')
+IS_PRESENT = TagPredicate('pres')
+
+
 def is_present(verb: ParseProxy):
-    return {'futr', 'impf'} in verb.tag or 'pres' in verb.tag
+    return IS_FUTURE_IMPERFECTIVE(verb) or IS_PRESENT(verb)
 
 
 def is_move_verb(verb: ParseProxy, analyzer: MorphAnalyzer):
     if isinstance(verb, ComplexVerb):
         return is_move_verb(verb.modal, analyzer) or is_move_verb(verb.infinitive, analyzer)
-    normal_form_cleared = cut_affix(verb.normal_form, analyzer=analyzer)
-    if isinstance(normal_form_cleared, str):
-        return normal_form_cleared in MOVE_VERBS
-    return verb.normal_form in MOVE_VERBS
+    return verb_lexicon.classify(verb.normal_form, analyzer) == MOVE
 
 
 def is_feeling_verb(verb: ParseProxy, analyzer: MorphAnalyzer):
     if isinstance(verb, ComplexVerb):
         return is_feeling_verb(verb.modal, analyzer) or is_feeling_verb(verb.infinitive, analyzer)
-    normal_form = verb.normal_form
-    normal_form2 = cut_affix(verb.normal_form, analyzer=analyzer)
-    if not isinstance(normal_form2, list):
-        normal_form = normal_form2
-    return normal_form in FEELING_VERBS
+    return verb_lexicon.classify(verb.normal_form, analyzer) == FEELING
 
 
-def is_time_construction(vertex: Vertex):
-    def match(pattern):
-        return pattern.match(vertex)
-
-    pattern1 = Node(grammemes='PREP', white_list=('в', 'на')).children(
+TIME_PATTERNS = PatternSet().add(
+    'in_time_unit', Node(grammemes='PREP', white_list=('в', 'на')).children(
         Node(white_list=TIME_UNITS).children(
-            Node(white_list=('следующий', 'текущий', 'прошлый', 'прошедший', 'этот')))
-    )
-
-    pattern2 = Node(grammemes='PREP', white_list=('к', 'ко')).children(
+            Node(white_list=('следующий', 'текущий', 'прошлый', 'прошедший', 'этот'))))
+).add(
+    'by_time_unit', Node(grammemes='PREP', white_list=('к', 'ко')).children(
         Node(grammemes='NUMR'),
-        Node(white_list=TIME_UNITS)
-    )
+        Node(white_list=TIME_UNITS))
+).add(
+    'during_time_unit', Node(grammemes='PREP', white_list='за').children(
+        Node(white_list=TIME_UNITS))
+).add(
+    'before_event', Node(grammemes='PREP', white_list='перед').children(
+        Node(white_list=('сон', 'ужин', 'обед', 'ужин')))
+).add(
+    'before_common_era', Node(grammemes='PREP', white_list='до').children(
+        Node(white_list='наш'),
+        Node(white_list='эра'))
+)
 
-    pattern3 = Node(grammemes='PREP', white_list='за').children(
-        Node(white_list=TIME_UNITS)
-    )
 
-    pattern4 = Node(grammemes='PREP', white_list='перед').children(
-        Node(white_list=('сон', 'ужин', 'обед', 'ужин'))
-    )
+def is_time_construction(vertex: Vertex):
+    return bool(TIME_PATTERNS.match_vertex(vertex))
 
-    pattern5 = Node(grammemes='PREP', white_list='до').children(
-        Node(white_list='наш'),
-        Node(white_list='эра')
-    )
-    return any(map(match, [pattern1, pattern2, pattern3, pattern4, pattern5]))
+
+def find_time_constructions(graph: Graph):
+    """
+    :return: pairs (pattern name, index of vertex) for all time constructions in the graph
+    """
+    return TIME_PATTERNS.match(graph)
 
 
 _russian_prefixes = (
@@ -107,23 +123,48 @@ class NoPrefixToRemoveException(Exception):
     pass
 
 
+@lru_cache(maxsize=16)
+def _prefix_trie(prefixes):
+    return PrefixTrie(prefixes)
+
+
 def _remove_prefix(word, prefixes, analyzer):
-    for prefix in prefixes:
-        if word.startswith(prefix):
-            new_word = word[len(prefix):]
-            if analyzer.word_is_known(new_word):
-                return new_word
+    for prefix in _prefix_trie(prefixes).prefixes_of(word):
+        new_word = word[len(prefix):]
+        if analyzer.word_is_known(new_word):
+            return new_word
     raise NoPrefixToRemoveException
 
 
-def cut_affix(word: str, *, analyzer: MorphAnalyzer, prefixes=_russian_prefixes,
-              suffixes=_russian_postfixes):
-    """Function to remove prefixes and postfixes from Russian words"""
+def cut_postfixes(word: str, suffixes=_russian_postfixes):
+    """Function to remove postfixes from Russian words"""
     for suffix in suffixes:
         if word.endswith(suffix):
             word = word[:-len(suffix)]
+    return word
+
+
+def cut_affix(word: str, *, analyzer: MorphAnalyzer, prefixes=_russian_prefixes,
+              suffixes=_russian_postfixes):
+    """Function to remove prefixes and postfixes from Russian words"""
+    # tries are cached by prefixes, so they have to be hashable
+    prefixes = tuple(prefixes)
+    word = cut_postfixes(word, suffixes)
     try:
         while True:
             word = _remove_prefix(word, prefixes, analyzer)
     except NoPrefixToRemoveException:
         return word
+
+
+MOVE = 'move'
+FEELING = 'feeling'
+
+VERB_CLASSES = {
+    **{verb: MOVE for verb in MOVE_VERBS},
+    **{verb: FEELING for verb in FEELING_VERBS}
+}
+
+verb_lexicon = VerbLexicon.load(VERB_CLASSES,
+                                lambda word, analyzer: cut_affix(word, analyzer=analyzer),
+                                normalize=cut_postfixes)
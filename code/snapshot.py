@@ -0,0 +1,247 @@
+"""
+Warm-start snapshot of the state derived from `pymorphy2` dictionaries
+
+The snapshot keeps parses and forms of question words, hot entries of the parse and
+inflection caches and classes of verbs missing in the compiled lexicon. Parses are stored
+with their analysis methods, so they are restored without dictionary lookups.
+The snapshot is ignored when dictionaries or analyzer units change. Build it with
+
+    python snapshot.py
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import time
+from typing import Dict, Iterable, List, Optional, Union
+
+import pymorphy2
+from pymorphy2 import MorphAnalyzer
+from pymorphy2.analyzer import Parse
+
+from lexicon import dictionary_fingerprint
+from parse_proxy import NO_PARSE, parse_cache, inflection_cache, warm_up_parse_cache
+from parse_proxy.question_type import QuestionType as QType
+
+_dir_path = pathlib.Path(__file__).parent.absolute()
+
+DEFAULT_PATH = _dir_path / 'snapshot.json'
+
+# it is increased when saved state can be wrong for the current code,
+# version 2 drops verb classes remembered before reflexive base verbs were fixed
+SNAPSHOT_VERSION = 2
+
+
+def _units(analyzer: MorphAnalyzer) -> list:
+    units = []
+    for unit, _terminal in analyzer._units:  # noqa
+        if isinstance(unit, (list, tuple)):
+            units.extend(unit)
+        else:
+            units.append(unit)
+    return units
+
+
+def snapshot_fingerprint(analyzer: MorphAnalyzer) -> str:
+    """
+    :return: string which changes whenever dictionaries, units of `analyzer`
+        or version of `pymorphy2` change
+    """
+    units = hashlib.sha256(repr(_units(analyzer)).encode('utf-8')).hexdigest()[:16]
+    return f'{dictionary_fingerprint(analyzer)}/{pymorphy2.__version__}/{units}'
+
+
+def _dump_parse(parse, unit_indices: Dict[int, int]) -> Optional[list]:
+    """
+    :return: JSON array of the parse or None if it can't be serialized
+    """
+    if not isinstance(parse, Parse):
+        return None
+    stack = []
+    for unit, *args in parse.methods_stack:
+        index = unit_indices.get(id(unit))
+        if index is None or not all(isinstance(arg, (str, int)) for arg in args):
+            return None
+        stack.append([index, *args])
+    return [parse.word, str(parse.tag), parse.normal_form, parse.score, stack]
+
+
+def _load_parse(data: list, analyzer: MorphAnalyzer, units: list):
+    word, tag, normal_form, score, stack = data
+    methods_stack = tuple((units[index], *args) for index, *args in stack)
+    return analyzer._result_type(word, analyzer.TagClass(tag),  # noqa
+                                 normal_form, score, methods_stack)
+
+
+def _dump_grammemes(grammemes):
+    return sorted(grammemes) if isinstance(grammemes, frozenset) else grammemes
+
+
+def _load_grammemes(grammemes):
+    return frozenset(grammemes) if isinstance(grammemes, list) else grammemes
+
+
+def save_snapshot(analyzer: MorphAnalyzer, path: Union[str, os.PathLike] = DEFAULT_PATH,
+                  max_parses: int = 50_000) -> dict:
+    """
+    Write the current derived state atomically. `QuestionType.init` must have been called
+
+    :param max_parses: count of the most recently used entries of the parse cache to save
+    :return: counts of saved entries
+    """
+    # imported here because predicates loads the compiled lexicon
+    from predicates import verb_lexicon  # pylint: disable=import-outside-toplevel
+
+    unit_indices = {id(unit): index for index, unit in enumerate(_units(analyzer))}
+    question_types = {}
+    for item in QType:
+        question_types[item.name] = {
+            'parse': _dump_parse(item._parse, unit_indices),  # noqa
+            'forms': [[sorted(grammemes), _dump_parse(form, unit_indices)]
+                      for grammemes, form in item.forms.items()]}
+    parses = []
+    for (word, tag_key, normal_form), parse in parse_cache.items()[-max_parses:]:
+        if parse is NO_PARSE:
+            parses.append([word, _dump_grammemes(tag_key), normal_form, None])
+            continue
+        data = _dump_parse(parse, unit_indices)
+        if data is not None:
+            parses.append([word, _dump_grammemes(tag_key), normal_form, data])
+    inflections = []
+    for (normal_form, word, tag, grammemes), form in inflection_cache.items():
+        if form is NO_PARSE:
+            inflections.append([normal_form, word, tag, sorted(grammemes), None])
+            continue
+        data = _dump_parse(form, unit_indices)
+        if data is not None:
+            inflections.append([normal_form, word, tag, sorted(grammemes), data])
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': snapshot_fingerprint(analyzer),
+        'created_at': time.time(),
+        'question_types': question_types,
+        'parses': parses,
+        'inflections': inflections,
+        'verb_classes': verb_lexicon.remembered(),
+    }
+    path = pathlib.Path(path)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(snapshot, file, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return {'parses': len(parses), 'inflections': len(inflections),
+            'verb_classes': len(snapshot['verb_classes'])}
+
+
+def load_snapshot(analyzer: MorphAnalyzer,
+                  path: Union[str, os.PathLike] = DEFAULT_PATH) -> bool:
+    """
+    Restore the derived state. It replaces `QuestionType.init`.
+    Nothing is restored unless the whole snapshot is decoded
+
+    :return: False if the snapshot doesn't exist, it can't be read
+        or it was built for other dictionaries
+    """
+    from predicates import verb_lexicon  # pylint: disable=import-outside-toplevel
+
+    try:
+        with open(path, encoding='utf-8') as file:
+            snapshot = json.load(file)
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION or \
+                snapshot.get('fingerprint') != snapshot_fingerprint(analyzer):
+            return False
+        state = _decode_snapshot(snapshot, analyzer)
+    except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+        return False
+    if state is None:
+        return False
+
+    question_types, parses, inflections, verb_classes = state
+    for item, parse, forms in question_types:
+        item.restore(analyzer, parse, forms)
+    for key, parse in parses:
+        parse_cache.put(key, parse)
+    for key, form in inflections:
+        inflection_cache.put(key, form)
+    verb_lexicon.remember(verb_classes)
+    return True
+
+
+def _decode_snapshot(snapshot: dict, analyzer: MorphAnalyzer):
+    """
+    :return: question types with their parses and forms, entries of the parse
+        and inflection caches and classes of verbs, or None if a question type is missing
+    :raises (ValueError, KeyError, TypeError, IndexError, AttributeError): the snapshot
+        is malformed
+    """
+    units = _units(analyzer)
+    question_types = []
+    for item in QType:
+        state = snapshot['question_types'].get(item.name)
+        if state is None or state['parse'] is None:
+            return None
+        forms = {frozenset(grammemes): _load_parse(form, analyzer, units)
+                 for grammemes, form in state['forms'] if form is not None}
+        question_types.append((item, _load_parse(state['parse'], analyzer, units), forms))
+    parses = []
+    for word, tag_key, normal_form, data in snapshot['parses']:
+        parse = NO_PARSE if data is None else _load_parse(data, analyzer, units)
+        parses.append(((word, _load_grammemes(tag_key), normal_form), parse))
+    inflections = []
+    for normal_form, word, tag, grammemes, data in snapshot['inflections']:
+        form = NO_PARSE if data is None else _load_parse(data, analyzer, units)
+        inflections.append(((normal_form, word, tag, frozenset(grammemes)), form))
+    verb_classes = snapshot['verb_classes']
+    if not isinstance(verb_classes, dict) or \
+            not all(isinstance(value, (str, type(None))) for value in verb_classes.values()):
+        raise TypeError('classes of verbs must be a dict of strings')
+    return question_types, parses, inflections, verb_classes
+
+
+def warm_start(analyzer: MorphAnalyzer = None,
+               path: Union[str, os.PathLike] = DEFAULT_PATH) -> MorphAnalyzer:
+    """
+    Create `MorphAnalyzer` if it is not passed and restore the snapshot.
+    `QuestionType.init` is called if the snapshot can't be used
+
+    :return: the analyzer
+    """
+    if analyzer is None:
+        analyzer = MorphAnalyzer()
+    if not load_snapshot(analyzer, path):
+        QType.init(analyzer)
+    return analyzer
+
+
+def build_snapshot(analyzer: MorphAnalyzer, json_objects: Iterable = None,
+                   path: Union[str, os.PathLike] = DEFAULT_PATH) -> dict:
+    """
+    Generate questions for syntax analysis results and save the state they derived
+
+    :param json_objects: JSON objects from `krasoteevo.ru`.
+        All examples from `krasoteevo.examples` are used if it is None
+    :return: counts of saved entries
+    """
+    # pylint: disable=import-outside-toplevel
+    from krasoteevo.examples import iter_examples
+    from krasoteevo.sentence_graph import SentenceGraph
+    from main import get_questions, render_all
+
+    QType.init(analyzer)
+    json_objects: List = list(iter_examples() if json_objects is None else json_objects)
+    warm_up_parse_cache(analyzer, json_objects)
+    for json_obj in json_objects:
+        try:
+            render_all(get_questions(SentenceGraph(json_obj, analyzer=analyzer),
+                                     analyzer=analyzer))
+        except (RuntimeError, ValueError, TypeError, Warning):
+            pass
+    return save_snapshot(analyzer, path)
+
+
+if __name__ == '__main__':
+    import warnings
+
+    warnings.simplefilter('ignore')
+    print(build_snapshot(MorphAnalyzer()), 'saved to', DEFAULT_PATH)